@@ -0,0 +1,133 @@
+# backend/alias_miner.py
+"""
+Mine frequent unmatched questions from the chat history as alias candidates.
+
+A question is unmatched when the bot answered with the fallback answer.
+Each frequent one is listed with the FAQ it came closest to; reviewed
+candidates go into that entry's "aliases" list in faq.json.
+
+    python alias_miner.py --min-count 3 --output candidates.json
+    python alias_miner.py --history export.jsonl
+"""
+import argparse
+import json
+import os
+from collections import Counter
+from typing import Dict, Iterator, List
+
+from answer_cache import normalize_text
+from history_store import HISTORY_DIR, iter_records
+
+# Field names a history record may use for the question and the bot's answer
+QUESTION_FIELDS = ("message", "question", "user_input", "text")
+ANSWER_FIELDS = ("response", "answer", "bot_response")
+
+
+def _first(record: dict, fields) -> str:
+    for name in fields:
+        value = record.get(name)
+        if isinstance(value, str):
+            return value
+    return ""
+
+
+def iter_history(path: str) -> Iterator[dict]:
+    """
+    Records from the history store directory, or from a single file:
+    JSON Lines, or one JSON document that is a list of records or a
+    {session_id: [records]} mapping.
+    """
+    if os.path.isdir(path):
+        yield from iter_records(path)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        head = f.read(1)
+        f.seek(0)
+        if head == "[" or head == "{":
+            try:
+                document = json.load(f)
+            except json.JSONDecodeError:
+                # A JSONL file whose records start with "{"
+                f.seek(0)
+            else:
+                sessions = document.values() if isinstance(document, dict) else [document]
+                for records in sessions:
+                    yield from (r for r in records if isinstance(r, dict))
+                return
+
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line of a log being written
+            if isinstance(record, dict):
+                yield record
+
+
+def unmatched_questions(records, fallback_answer: str) -> Counter:
+    """Count unmatched questions by normalized text, remembering the most common raw spelling."""
+    counts: Counter = Counter()
+    spellings: Dict[str, Counter] = {}
+    for record in records:
+        question = _first(record, QUESTION_FIELDS).strip()
+        if not question or _first(record, ANSWER_FIELDS) != fallback_answer:
+            continue
+        key = normalize_text(question)
+        counts[key] += 1
+        spellings.setdefault(key, Counter())[question] += 1
+    return Counter({spellings[key].most_common(1)[0][0]: count for key, count in counts.items()})
+
+
+def suggest_aliases(questions: List[str]) -> List[dict]:
+    """Nearest FAQ for each question, even below the match threshold."""
+    import nlp
+
+    # top_k=1 always reports the nearest FAQ, whatever its score
+    results = nlp.match_faqs(questions, top_k=1)
+    suggestions = []
+    for question, result in zip(questions, results):
+        nearest = result.get("alternatives") or [{}]
+        suggestions.append({
+            "query": question,
+            "faq_id": nearest[0].get("faq_id"),
+            "faq_question": nearest[0].get("question"),
+            "score": nearest[0].get("score", 0.0)
+        })
+    return suggestions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", default=HISTORY_DIR, help="History store directory, or a JSONL/JSON export")
+    parser.add_argument("--min-count", type=int, default=3, help="Ignore questions asked fewer times")
+    parser.add_argument("--limit", type=int, default=100, help="Most frequent questions to report")
+    parser.add_argument("--output", help="Write candidates as JSON for review")
+    args = parser.parse_args()
+
+    import nlp
+
+    counts = unmatched_questions(iter_history(args.history), nlp.FALLBACK_ANSWER)
+    frequent = [(q, n) for q, n in counts.most_common(args.limit) if n >= args.min_count]
+    print(f"🔎 {sum(counts.values())} unmatched questions ({len(counts)} distinct), "
+          f"{len(frequent)} asked at least {args.min_count} times")
+    if not frequent:
+        return
+
+    candidates = suggest_aliases([q for q, _ in frequent])
+    for candidate, (_, count) in zip(candidates, frequent):
+        candidate["count"] = count
+        print(f"{count:>5}  {candidate['score']:.3f}  {candidate['query']!r} -> "
+              f"#{candidate['faq_id']} {candidate['faq_question']!r}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(candidates, f, ensure_ascii=False, indent=2)
+        print(f"✅ Wrote {len(candidates)} candidates to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# backend/audio_io.py
+import io
+import os
+import tempfile
+from typing import BinaryIO, Union
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# Memory-backed scratch space for engines that can only write to a path
+SCRATCH_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def decode_audio_buffer(source: Union[bytes, bytearray, memoryview, BinaryIO],
+                        sampling_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode a compressed clip (webm/ogg/mp3/wav...) held in memory.
+
+    PyAV reads straight from the buffer or file object, so nothing is
+    written to disk.
+
+    Args:
+        source: Encoded audio bytes, or a readable binary file object
+        sampling_rate: Output sample rate
+
+    Returns:
+        Mono float32 samples in [-1, 1]
+    """
+    from faster_whisper import decode_audio
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    elif hasattr(source, "seek"):
+        source.seek(0)
+    return decode_audio(source, sampling_rate=sampling_rate)
+
+
+def pcm16_to_float32(pcm: Union[bytes, bytearray, memoryview]) -> np.ndarray:
+    """Convert little-endian 16-bit PCM to float32 samples in [-1, 1]."""
+    return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def scratch_path(suffix: str) -> str:
+    """
+    Unique per-call scratch file, on tmpfs when available.
+
+    Callers own the file and must remove it.
+    """
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=SCRATCH_DIR)
+    os.close(fd)
+    return path
+
+
+def resample_linear(samples: np.ndarray, from_rate: int, to_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Cheap linear-interpolation resampler, good enough for speech into Whisper."""
+    if from_rate == to_rate or len(samples) == 0:
+        return samples
+    n_out = int(round(len(samples) * to_rate / from_rate))
+    positions = np.arange(n_out) * (from_rate / to_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+class StreamDecoder:
+    """
+    Turns frames from a streaming client into 16 kHz mono float32.
+
+    Formats:
+        pcm16: little-endian 16-bit PCM at `sample_rate`
+        f32: little-endian float32 PCM at `sample_rate`
+        opus: one raw Opus packet per frame (e.g. from WebCodecs), decoded with PyAV
+    """
+
+    FORMATS = ("pcm16", "f32", "opus")
+
+    def __init__(self, fmt: str = "pcm16", sample_rate: int = SAMPLE_RATE):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unsupported audio format {fmt!r}; expected one of {', '.join(self.FORMATS)}")
+        self.fmt = fmt
+        self.sample_rate = sample_rate
+        self._codec = None
+        self._resampler = None
+        if fmt == "opus":
+            import av
+            self._codec = av.CodecContext.create("opus", "r")
+            self._codec.sample_rate = 48000
+            self._codec.layout = "mono"
+            self._resampler = av.AudioResampler(format="flt", layout="mono", rate=SAMPLE_RATE)
+
+    def decode(self, data: bytes) -> np.ndarray:
+        if self.fmt == "pcm16":
+            return resample_linear(pcm16_to_float32(data), self.sample_rate)
+        if self.fmt == "f32":
+            return resample_linear(np.frombuffer(data, dtype="<f4"), self.sample_rate)
+
+        import av
+        chunks = []
+        for frame in self._codec.decode(av.Packet(data)):
+            for resampled in self._resampler.resample(frame):
+                chunks.append(resampled.to_ndarray().reshape(-1))
+        if not chunks:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(chunks).astype(np.float32, copy=False)
@@ -0,0 +1,15 @@
+# backend/benchmarks/__init__.py
+"""
+Offline benchmarks for the MindMend backend.
+
+    bench_micro.py              match_faq, detect_language, WAV encoding
+    load_test.py                concurrent load against the FastAPI app
+    bench_whisper_batching.py   Whisper micro-batching (needs a model)
+    bench_pcm_path.py           audio hand-off to Whisper
+    bench_worker_memory.py      memory per gunicorn worker, with and without preload
+
+fakes.py holds stand-ins for Whisper and gTTS with configurable latency,
+so the load test runs without models or network access. report.py
+computes percentiles and saves/compares baselines (baselines/*.json).
+Run the scripts from backend/.
+"""
@@ -0,0 +1,102 @@
+# backend/benchmarks/bench_micro.py
+"""
+Per-call latency of the hot helpers behind /ask and the voice paths.
+
+    python benchmarks/bench_micro.py
+    python benchmarks/bench_micro.py --save-baseline micro
+    python benchmarks/bench_micro.py --compare micro --tolerance 0.25
+
+match_faq uses whichever encoder and index FAQ_ENCODER / FAQ_INDEX_*
+select; the index is built or loaded before timing starts.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.report import add_baseline_arguments, finish, summarize  # noqa: E402
+
+# Mixed scripts on purpose: script-identified text skips langdetect
+LANGUAGE_SAMPLES = [
+    "How can I manage stress at work?",
+    "I feel anxious all the time and can't sleep",
+    "எனக்கு மன அழுத்தம் அதிகமாக இருக்கிறது",
+    "मुझे बहुत चिंता हो रही है",
+    "Je me sens très seul ces derniers temps",
+    "enaku romba stress ah iruku",
+    "ನನಗೆ ನಿದ್ರೆ ಬರುತ್ತಿಲ್ಲ",
+    "What are the symptoms of depression?"
+]
+
+UNMATCHED_SAMPLES = [
+    "what's the weather like tomorrow",
+    "recommend a good pizza place",
+    "how do I reset my router"
+]
+
+
+def time_calls(fn, inputs, repeat: int, before_each=None) -> dict:
+    """
+    Call fn on every input, repeat times over, timing each call.
+
+    before_each runs untimed ahead of every call (e.g. to clear a cache);
+    throughput is then computed from the timed calls only.
+    """
+    for item in inputs[:5]:
+        fn(item)  # warm-up
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in inputs:
+            if before_each:
+                before_each()
+            start = time.perf_counter()
+            fn(item)
+            latencies.append(time.perf_counter() - start)
+    return summarize(latencies, sum(latencies) if before_each else time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over each input set")
+    parser.add_argument("--questions", type=int, default=200, help="FAQ questions used as match_faq inputs")
+    parser.add_argument("--clip-seconds", type=float, default=5.0, help="Clip length for WAV encoding")
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    import nlp
+    from answer_cache import answer_cache
+    from faq_store import phrasings
+    from language_detect import language_detector
+    from transcription_scheduler import SAMPLE_RATE
+    from voice_assistant import VoiceAssistant
+
+    nlp.faqs.get()  # build or load the index outside the timings
+    # Indexed entries always have at least one phrasing
+    questions = [phrasings(faq)[0] for faq in nlp.store.snapshot.data[:args.questions]] + UNMATCHED_SAMPLES
+
+    # The WAV helper doesn't touch the model, so skip loading it
+    va = VoiceAssistant.__new__(VoiceAssistant)
+    va.SAMPLE_RATE = SAMPLE_RATE
+    va.CHANNELS = 1
+    rng = np.random.default_rng(0)
+    clips = [(0.1 * rng.standard_normal(int(args.clip_seconds * SAMPLE_RATE))).astype(np.float32) for _ in range(4)]
+
+    results = {
+        # Encoder + index search on every call
+        "match_faq.uncached": time_calls(nlp.match_faq, questions, args.repeat, before_each=answer_cache.clear),
+        "match_faq.cached": time_calls(nlp.match_faq, questions, args.repeat),
+        "detect_language.memoized": time_calls(nlp.detect_language, LANGUAGE_SAMPLES, args.repeat * 50),
+        # The layered detector without its memo: script histogram, then langdetect
+        "detect_language.uncached": time_calls(language_detector._detect, LANGUAGE_SAMPLES, args.repeat * 5),
+        "numpy_to_wav_bytes": time_calls(va._numpy_to_wav_bytes, clips, args.repeat * 5)
+    }
+    sys.exit(finish(results, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# backend/benchmarks/bench_pcm_path.py
+"""
+Per-call cost of handing captured audio to Whisper: the old path
+(float32 -> int16 WAV in a BytesIO -> PyAV decode back to float32) versus
+passing the float32 array straight through.
+
+    python benchmarks/bench_pcm_path.py --seconds 2 5 30
+    python benchmarks/bench_pcm_path.py --model small    # also time full transcribe() calls
+
+The conversion numbers need no model; --model adds end-to-end timings
+so the saving can be seen relative to the inference it precedes.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stage_pool import percentile  # noqa: E402
+from transcription_scheduler import SAMPLE_RATE  # noqa: E402
+
+
+def capture(seconds: float) -> np.ndarray:
+    """What sounddevice hands back: (n, 1) float32 in [-1, 1]."""
+    rng = np.random.default_rng(0)
+    return (0.1 * rng.standard_normal((int(seconds * SAMPLE_RATE), 1))).astype(np.float32)
+
+
+def time_calls(fn, repeat: int) -> dict:
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "peak_kb": peak / 1024
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, nargs="+", default=[2.0, 5.0, 30.0], help="Clip lengths")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--model", help="Whisper model to also time full transcribe() calls with")
+    args = parser.parse_args()
+
+    from faster_whisper import decode_audio
+    from voice_assistant import VoiceAssistant
+
+    # The conversion helpers don't touch the model, so skip loading it
+    va = VoiceAssistant.__new__(VoiceAssistant)
+    va.SAMPLE_RATE = SAMPLE_RATE
+    va.CHANNELS = 1
+
+    def wav_path(recording):
+        return decode_audio(va._numpy_to_wav_bytes(recording.flatten()), sampling_rate=SAMPLE_RATE)
+
+    def direct_path(recording):
+        return va._as_model_input(recording.reshape(-1))
+
+    print(f"{'clip s':>6} {'path':<7} {'p50 ms':>9} {'p95 ms':>9} {'peak KB':>9}")
+    for seconds in args.seconds:
+        recording = capture(seconds)
+        for name, fn in (("wav", wav_path), ("direct", direct_path)):
+            result = time_calls(lambda: fn(recording), args.repeat)
+            print(f"{seconds:>6.1f} {name:<7} {result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f} {result['peak_kb']:>9.0f}")
+
+    if args.model:
+        from faster_whisper import WhisperModel
+
+        model = WhisperModel(args.model, device="cpu", compute_type="int8")
+        print(f"\nend to end, model={args.model}")
+        for seconds in args.seconds:
+            recording = capture(seconds)
+            for name, fn in (("wav", wav_path), ("direct", direct_path)):
+                def call():
+                    segments, _ = model.transcribe(fn(recording), language="en")
+                    list(segments)
+                result = time_calls(call, max(3, args.repeat // 10))
+                print(f"{seconds:>6.1f} {name:<7} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# backend/benchmarks/bench_whisper_batching.py
+"""
+Requests/sec versus p95 latency for Whisper transcription, with and
+without the micro-batching scheduler.
+
+    python benchmarks/bench_whisper_batching.py --audio sample.wav --concurrency 1 4 8 16
+
+Without --audio a synthetic 3 s tone-plus-noise clip is used; it only
+exercises the encoder/decoder cost, not transcription quality.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stage_pool import percentile  # noqa: E402
+from transcription_scheduler import SAMPLE_RATE, TranscriptionScheduler, transcribe_single  # noqa: E402
+
+
+def synthetic_clip(seconds: float = 3.0) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    rng = np.random.default_rng(0)
+    clip = 0.3 * np.sin(2 * np.pi * 220 * t) * (1 + np.sin(2 * np.pi * 3 * t))
+    return (clip + 0.05 * rng.standard_normal(t.size)).astype(np.float32)
+
+
+def run_load(transcribe, audio: np.ndarray, concurrency: int, requests: int) -> dict:
+    """Fire `requests` transcriptions from `concurrency` client threads."""
+    latencies = []
+    lock = threading.Lock()
+
+    def client(n):
+        for _ in range(n):
+            start = time.perf_counter()
+            transcribe(audio)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    per_client = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, per_client))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", help="Clip to transcribe (any format ffmpeg/PyAV can decode)")
+    parser.add_argument("--model", default="small")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=32, help="Requests per concurrency level")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--wait-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    from faster_whisper import WhisperModel, decode_audio
+
+    model = WhisperModel(args.model, device="cpu", compute_type="int8")
+    audio = decode_audio(args.audio, sampling_rate=SAMPLE_RATE) if args.audio else synthetic_clip()
+
+    # Unbatched baseline: one request at a time on the shared model, like a 1-worker STT stage
+    model_lock = threading.Lock()
+
+    def unbatched(clip):
+        with model_lock:
+            return transcribe_single(model, clip)
+
+    scheduler = TranscriptionScheduler(lambda: model, max_batch_size=args.batch_size,
+                                       max_wait_ms=args.wait_ms, max_pending=10_000)
+
+    def batched(clip):
+        return scheduler.submit(clip).result()
+
+    # Warm up both paths so model initialization is not measured
+    unbatched(audio)
+    batched(audio)
+
+    print(f"{'mode':<10} {'clients':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9}")
+    for concurrency in args.concurrency:
+        for mode, fn in (("unbatched", unbatched), ("batched", batched)):
+            result = run_load(fn, audio, concurrency, args.requests)
+            print(f"{mode:<10} {concurrency:>7} {result['rps']:>8.2f} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f}")
+
+    print(f"\nscheduler: {scheduler.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# backend/benchmarks/bench_worker_memory.py
+"""
+Memory per gunicorn worker, with and without preloading models before fork.
+
+    python benchmarks/bench_worker_memory.py --workers 1 2 4 8
+    python benchmarks/bench_worker_memory.py --workers 4 --preload encoder,faq_index --requests 50
+
+For each worker count and mode the server is started with
+gunicorn_conf.py, every worker is made to load the same components
+(MINDMEND_WARMUP) and serve /ask traffic, and then memory is read from
+/proc/<pid>/smaps_rollup (Linux only):
+
+    PSS  proportional set size; shared pages are split between the
+         processes sharing them, so PSS sums to real usage
+    USS  private pages only: what one more worker costs
+
+Run it on the deployment's own models; the numbers depend on them.
+"""
+import argparse
+import glob
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def smaps_rollup(pid: int) -> Dict[str, int]:
+    """Memory counters of one process, in kB."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1])
+    values["Uss"] = values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)
+    return values
+
+
+def child_pids(parent: int) -> List[int]:
+    children = []
+    for stat_path in glob.glob("/proc/[0-9]*/stat"):
+        try:
+            with open(stat_path, "r") as f:
+                # pid (comm) state ppid ...; comm may contain spaces
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == parent:
+            children.append(int(stat_path.split("/")[2]))
+    return sorted(children)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure(workers: int, preload: bool, components: str, requests: int, settle: float, timeout: float) -> dict:
+    port = free_port()
+    env = dict(
+        os.environ,
+        BIND=f"127.0.0.1:{port}",
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_PRELOAD="1" if preload else "0",
+        MINDMEND_PRELOAD=components,
+        MINDMEND_WARMUP=components,
+        LOG_LEVEL="WARNING"
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "main:app"],
+        cwd=BACKEND_DIR, env=env
+    )
+    try:
+        url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + timeout
+        with httpx.Client(base_url=url, timeout=30.0) as client:
+            while True:
+                try:
+                    if client.get("/ready").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError(f"server with {workers} workers did not become ready")
+                time.sleep(0.5)
+            # Spread traffic so every worker has loaded and used its components
+            for n in range(requests * workers):
+                client.post("/ask", json={"question": "What is anxiety?", "session_id": f"mem-{n}"})
+        time.sleep(settle)
+
+        worker_pids = child_pids(server.pid)
+        master = smaps_rollup(server.pid)
+        per_worker = [smaps_rollup(pid) for pid in worker_pids]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    mb = 1024.0
+    return {
+        "workers": len(per_worker),
+        "master_pss_mb": master["Pss"] / mb,
+        "worker_pss_mb": sum(w["Pss"] for w in per_worker) / len(per_worker) / mb,
+        "worker_uss_mb": sum(w["Uss"] for w in per_worker) / len(per_worker) / mb,
+        "total_pss_mb": (master["Pss"] + sum(w["Pss"] for w in per_worker)) / mb
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--preload", default="encoder,faq_index", help="Components loaded in every worker")
+    parser.add_argument("--requests", type=int, default=20, help="/ask requests per worker before measuring")
+    parser.add_argument("--settle", type=float, default=2.0, help="Seconds to wait before reading memory")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for /ready")
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'workers':>7} {'master PSS':>11} {'worker PSS':>11} {'worker USS':>11} {'total PSS':>10}  (MB)")
+    for workers in args.workers:
+        for preload in (False, True):
+            result = measure(workers, preload, args.preload, args.requests, args.settle, args.timeout)
+            print(f"{'preload' if preload else 'per-fork':<10} {result['workers']:>7} {result['master_pss_mb']:>11.1f} "
+                  f"{result['worker_pss_mb']:>11.1f} {result['worker_uss_mb']:>11.1f} {result['total_pss_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
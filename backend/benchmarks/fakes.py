@@ -0,0 +1,136 @@
+# backend/benchmarks/fakes.py
+"""
+Local stand-ins for Whisper and gTTS with configurable latency.
+
+They block their calling thread for the configured time (like the real
+engines, which hold a stage worker) and return fixed but well-formed
+results, so load tests exercise the whole request path offline.
+"""
+import io
+import random
+import threading
+import time
+import wave
+from types import SimpleNamespace
+from typing import Optional
+
+import numpy as np
+
+from tts_cache import TTSCache
+from tts_handler import TTSHandler
+
+SAMPLE_RATE = 16000
+
+
+def _sleep_ms(base_ms: float, jitter: float, rng: random.Random, lock: threading.Lock):
+    with lock:
+        factor = 1.0 + rng.uniform(-jitter, jitter) if jitter else 1.0
+    if base_ms > 0:
+        time.sleep(base_ms * factor / 1000)
+
+
+class FakeWhisperModel:
+    """
+    Replaces faster_whisper.WhisperModel for transcribe() callers.
+
+    Latency is latency_ms plus ms_per_audio_second for each second of
+    input, each call varied by +/- jitter.
+    """
+
+    def __init__(self, text: str = "What is anxiety?", language: str = "en",
+                 latency_ms: float = 300.0, ms_per_audio_second: float = 0.0,
+                 jitter: float = 0.1, seed: int = 0):
+        self.text = text
+        self.language = language
+        self.latency_ms = latency_ms
+        self.ms_per_audio_second = ms_per_audio_second
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None, **kwargs):
+        seconds = len(audio) / SAMPLE_RATE
+        _sleep_ms(self.latency_ms + self.ms_per_audio_second * seconds, self.jitter, self._rng, self._lock)
+        with self._lock:
+            self.calls += 1
+        segments = iter([SimpleNamespace(text=self.text, start=0.0, end=seconds)])
+        info = SimpleNamespace(language=language or self.language, language_probability=0.99, duration=seconds)
+        return segments, info
+
+
+class FakeTTSHandler(TTSHandler):
+    """
+    TTSHandler whose engine sleeps instead of calling gTTS.
+
+    Caching and base64 encoding are inherited, so cache hits behave as
+    in production. Clips are silent 16 kHz WAV, about 60 ms per character.
+    """
+
+    def __init__(self, latency_ms: float = 200.0, ms_per_char: float = 0.0,
+                 jitter: float = 0.1, cache: Optional[TTSCache] = None, seed: int = 0):
+        super().__init__(engine="fake", cache=cache)
+        self.latency_ms = latency_ms
+        self.ms_per_char = ms_per_char
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.calls = 0
+
+    def voice_settings(self) -> str:
+        return "fake"
+
+    def _synthesize(self, text: str, lang: str) -> Optional[bytes]:
+        _sleep_ms(self.latency_ms + self.ms_per_char * len(text), self.jitter, self._rng, self._rng_lock)
+        with self._rng_lock:
+            self.calls += 1
+        return silent_wav(0.06 * len(text))
+
+
+def silent_wav(seconds: float, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """A WAV file of silence."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(b"\x00\x00" * int(seconds * sample_rate))
+    return buffer.getvalue()
+
+
+def speech_like_wav(seconds: float = 3.0, sample_rate: int = SAMPLE_RATE, seed: int = 0) -> bytes:
+    """A WAV upload for /voice/transcribe: an amplitude-modulated tone with noise."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    rng = np.random.default_rng(seed)
+    clip = 0.3 * np.sin(2 * np.pi * 220 * t) * (1 + np.sin(2 * np.pi * 3 * t)) / 2
+    clip = clip + 0.02 * rng.standard_normal(t.size)
+    pcm = (np.clip(clip, -1.0, 1.0) * 32767).astype(np.int16)
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def install_fakes(app_module, stt: Optional[FakeWhisperModel] = None, tts: Optional[FakeTTSHandler] = None):
+    """
+    Swap the app's Whisper and TTS components for fakes.
+
+    Whisper micro-batching is switched off: the scheduler drives model
+    internals (feature extractor, generate) that the fake does not have,
+    so uploads take the single-request path on the STT stage.
+
+    Args:
+        app_module: The imported main module
+        stt: Fake Whisper model (default: FakeWhisperModel())
+        tts: Fake TTS handler (default: FakeTTSHandler())
+    """
+    stt = stt or FakeWhisperModel()
+    tts = tts or FakeTTSHandler()
+    app_module.voice_assistant.override(SimpleNamespace(model=stt))
+    app_module.tts_handler.override(tts)
+    app_module.WHISPER_BATCHING = False
+    return stt, tts
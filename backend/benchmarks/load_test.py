@@ -0,0 +1,211 @@
+# backend/benchmarks/load_test.py
+"""
+Closed-loop load generator for /ask, /voice/transcribe and /voice/tts.
+
+By default the app runs in-process with Whisper and gTTS replaced by
+fakes (benchmarks/fakes.py), so no model, microphone or network is
+needed:
+
+    python benchmarks/load_test.py --concurrency 8 --duration 20
+    python benchmarks/load_test.py --mix ask=1 --concurrency 32 --unique
+    python benchmarks/load_test.py --stt-ms 800 --tts-ms 300 --save-baseline load
+    python benchmarks/load_test.py --compare load
+
+With --url the same load goes to a running server and its real backends.
+
+Each client sends its next request as soon as the previous one returns.
+In-process the clients share the server's event loop and CPU, so read
+the numbers as relative: compare runs on one machine, not across machines.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.report import add_baseline_arguments, finish, summarize  # noqa: E402
+
+FAQ_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "faq.json")
+
+ENDPOINTS = ("ask", "transcribe", "tts", "tts_stream")
+
+UNMATCHED_QUESTIONS = [
+    "what's the weather like tomorrow",
+    "recommend a good pizza place",
+    "how do I reset my router"
+]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """"ask=8,transcribe=1,tts=1" -> relative weights per endpoint."""
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class LoadClient:
+    """Builds and sends one request per endpoint kind."""
+
+    def __init__(self, client, questions: List[str], clip: bytes, unique: bool, rng: random.Random):
+        self.client = client
+        self.questions = questions
+        self.clip = clip
+        self.unique = unique
+        self.rng = rng
+        self.sent = 0
+
+    def _question(self) -> str:
+        question = self.rng.choice(self.questions)
+        self.sent += 1
+        # A suffix changes the normalized text, so every request misses the answer cache
+        return f"{question} ({id(self)}-{self.sent})" if self.unique else question
+
+    async def send(self, endpoint: str, session_id: str) -> int:
+        if endpoint == "ask":
+            response = await self.client.post("/ask", json={"question": self._question(), "session_id": session_id})
+        elif endpoint == "transcribe":
+            response = await self.client.post(
+                "/voice/transcribe", params={"session_id": session_id, "include_audio": "true"},
+                files={"file": ("clip.wav", self.clip, "audio/wav")}
+            )
+        elif endpoint == "tts":
+            response = await self.client.post("/voice/tts", json={"question": self._question()})
+        else:
+            response = await self.client.post("/voice/tts/stream", json={"text": self._question(), "lang": "en"})
+        return response.status_code
+
+
+async def run_load(client, mix: Dict[str, float], concurrency: int, duration: float,
+                   total_requests: int, questions: List[str], clip: bytes, unique: bool,
+                   seed: int) -> Tuple[Dict[str, list], Dict[str, list], float]:
+    """Returns (latencies by endpoint, status codes by endpoint, elapsed seconds)."""
+    latencies: Dict[str, list] = defaultdict(list)
+    statuses: Dict[str, list] = defaultdict(list)
+    names, weights = list(mix), list(mix.values())
+    remaining = [total_requests]
+    deadline = time.perf_counter() + duration
+
+    async def worker(n: int):
+        rng = random.Random(seed + n)
+        sender = LoadClient(client, questions, clip, unique, rng)
+        while time.perf_counter() < deadline:
+            if total_requests:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            endpoint = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                status = await sender.send(endpoint, f"load-{n}")
+            except Exception:
+                status = 0  # connection error or timeout
+            latencies[endpoint].append(time.perf_counter() - start)
+            statuses[endpoint].append(status)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+def build_results(latencies: Dict[str, list], statuses: Dict[str, list], elapsed: float) -> Dict[str, dict]:
+    results = {}
+    for endpoint in sorted(latencies):
+        codes = statuses[endpoint]
+        result = summarize(latencies[endpoint], elapsed)
+        # 503 is load shedding by a saturated stage, reported apart from failures
+        result["rejected"] = sum(1 for code in codes if code == 503)
+        result["errors"] = sum(1 for code in codes if code == 0 or (code >= 400 and code != 503))
+        results[endpoint] = result
+    everything = [latency for samples in latencies.values() for latency in samples]
+    total = summarize(everything, elapsed)
+    total["rejected"] = sum(r["rejected"] for r in results.values())
+    total["errors"] = sum(r["errors"] for r in results.values())
+    results["all"] = total
+    return results
+
+
+def load_questions() -> List[str]:
+    from faq_store import phrasings
+
+    # First phrasing of every entry the store indexes, whichever keys it uses
+    with open(FAQ_PATH, "r", encoding="utf-8") as f:
+        texts = [phrasings(faq) for faq in json.load(f)]
+    return [entry[0] for entry in texts if entry] + UNMATCHED_QUESTIONS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Load a running server instead of the in-process app with fakes")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("ask=8,transcribe=1,tts=1"),
+                        help=f"Weighted endpoints from {', '.join(ENDPOINTS)}")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests (0: run for --duration)")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests first, to load models and fill caches")
+    parser.add_argument("--unique", action="store_true", help="Make every question unique to bypass the answer cache")
+    parser.add_argument("--clip-seconds", type=float, default=3.0, help="Length of the uploaded clip")
+    parser.add_argument("--stt-ms", type=float, default=300.0, help="Fake Whisper latency per request")
+    parser.add_argument("--stt-ms-per-second", type=float, default=50.0, help="Fake Whisper latency per second of audio")
+    parser.add_argument("--tts-ms", type=float, default=200.0, help="Fake TTS latency per request")
+    parser.add_argument("--tts-ms-per-char", type=float, default=0.5, help="Fake TTS latency per character")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Fake latency variation, +/- fraction")
+    parser.add_argument("--seed", type=int, default=0)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    import httpx
+
+    from benchmarks.fakes import FakeTTSHandler, FakeWhisperModel, install_fakes, speech_like_wav
+
+    questions = load_questions()
+    clip = speech_like_wav(args.clip_seconds, seed=args.seed)
+    fakes = None
+
+    if args.url:
+        make_client = lambda: httpx.AsyncClient(base_url=args.url, timeout=60.0)  # noqa: E731
+    else:
+        # Keep the run's history and access logs out of the way
+        os.environ.setdefault("HISTORY_DIR", tempfile.mkdtemp(prefix="mindmend-load-"))
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        import main as app_module
+
+        fakes = install_fakes(
+            app_module,
+            stt=FakeWhisperModel(latency_ms=args.stt_ms, ms_per_audio_second=args.stt_ms_per_second,
+                                 jitter=args.jitter, seed=args.seed),
+            tts=FakeTTSHandler(latency_ms=args.tts_ms, ms_per_char=args.tts_ms_per_char,
+                               jitter=args.jitter, seed=args.seed)
+        )
+        transport = httpx.ASGITransport(app=app_module.app)
+        make_client = lambda: httpx.AsyncClient(transport=transport, base_url="http://mindmend", timeout=60.0)  # noqa: E731
+
+    async def run():
+        async with make_client() as client:
+            if args.warmup:
+                await run_load(client, args.mix, min(args.concurrency, args.warmup), 3600.0, args.warmup,
+                               questions, clip, args.unique, args.seed + 10_000)
+            return await run_load(client, args.mix, args.concurrency, args.duration, args.requests,
+                                  questions, clip, args.unique, args.seed)
+
+    latencies, statuses, elapsed = asyncio.run(run())
+    print(f"{args.concurrency} clients, {elapsed:.1f}s, target {args.url or 'in-process app with fakes'}")
+    if fakes:
+        stt, tts = fakes
+        print(f"fake backends: {stt.calls} transcriptions, {tts.calls} syntheses\n")
+    sys.exit(finish(build_results(latencies, statuses, elapsed), args))
+
+
+if __name__ == "__main__":
+    main()
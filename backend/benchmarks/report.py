@@ -0,0 +1,126 @@
+# backend/benchmarks/report.py
+"""Latency summaries and baseline files shared by the benchmark scripts."""
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stage_pool import percentile  # noqa: E402
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+# Changes smaller than this are timer noise, whatever the ratio
+NOISE_FLOOR_MS = 0.05
+
+
+def summarize(latencies: List[float], elapsed: Optional[float] = None) -> dict:
+    """
+    Percentiles of latencies given in seconds, reported in ms.
+
+    With elapsed (wall-clock seconds for the whole run) throughput is
+    included as rps.
+    """
+    summary = {"count": len(latencies)}
+    if elapsed:
+        summary["rps"] = round(len(latencies) / elapsed, 2)
+    summary.update({
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 4) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4)
+    })
+    return summary
+
+
+def print_table(results: Dict[str, dict]):
+    columns = ["count", "rps", "p50_ms", "p95_ms", "p99_ms", "rejected", "errors"]
+    shown = [c for c in columns if any(c in r for r in results.values())]
+    width = max([len(name) for name in results] + [9])
+    print(f"{'benchmark':<{width}} " + " ".join(f"{c:>10}" for c in shown))
+    for name, result in results.items():
+        cells = []
+        for column in shown:
+            value = result.get(column, "")
+            cells.append(f"{value:>10.3f}" if isinstance(value, float) else f"{value!s:>10}")
+        print(f"{name:<{width}} " + " ".join(cells))
+
+
+def baseline_path(name: str) -> str:
+    return name if name.endswith(".json") else os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def save_baseline(name: str, results: Dict[str, dict]) -> str:
+    path = baseline_path(name)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} cpus)",
+            "results": results
+        }, f, indent=2)
+    return path
+
+
+def load_baseline(name: str) -> dict:
+    with open(baseline_path(name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_regressions(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float = 0.2) -> List[str]:
+    """
+    Metrics worse than the baseline by more than tolerance (0.2 = 20%).
+
+    Latencies (*_ms) regress upwards, throughput (rps) downwards, and
+    errors whenever they appear where the baseline had none.
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for metric, value in result.items():
+            old = before.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)):
+                continue
+            if metric.endswith("_ms"):
+                worse = value > old * (1 + tolerance) and value - old > NOISE_FLOOR_MS
+            elif metric == "rps":
+                worse = value < old * (1 - tolerance)
+            elif metric == "errors":
+                worse = value > 0 and old == 0
+            else:
+                continue
+            if worse:
+                regressions.append(f"{name}.{metric}: {old} -> {value}")
+    return regressions
+
+
+def add_baseline_arguments(parser):
+    parser.add_argument("--save-baseline", metavar="NAME", help="Store results as baselines/NAME.json (or a .json path)")
+    parser.add_argument("--compare", metavar="NAME", help="Compare with a saved baseline; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%)")
+
+
+def finish(results: Dict[str, dict], args) -> int:
+    """Print results, then save and/or compare baselines as requested. Returns the exit status."""
+    print_table(results)
+    status = 0
+    if args.compare:
+        baseline = load_baseline(args.compare)
+        regressions = find_regressions(results, baseline["results"], args.tolerance)
+        print(f"\nbaseline {args.compare} ({baseline['created']}, {baseline['machine']})")
+        if regressions:
+            print(f"❌ {len(regressions)} regressions beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"   {line}")
+            status = 1
+        else:
+            print(f"✅ no regressions beyond {args.tolerance:.0%}")
+    if args.save_baseline:
+        print(f"💾 Saved baseline to {save_baseline(args.save_baseline, results)}")
+    return status
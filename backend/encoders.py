@@ -0,0 +1,132 @@
+# backend/encoders.py
+from typing import List
+
+import numpy as np
+
+# Default model for FAQ_ENCODER=multilingual; any sentence-transformers
+# model name or local directory works
+DEFAULT_MULTILINGUAL_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+
+class SpacyEncoder:
+    """
+    Document vectors from a spaCy pipeline (averaged word vectors).
+
+    English-only: other languages mostly hit out-of-vocabulary tokens.
+    """
+
+    name = "spacy"
+    multilingual = False
+
+    def __init__(self, nlp):
+        self.nlp = nlp
+
+    def fingerprint(self) -> str:
+        meta = self.nlp.meta
+        return f"{meta.get('lang', 'xx')}_{meta.get('name', 'unknown')}-{meta.get('version', '0')}"
+
+    def encode(self, texts: List[str], batch_size: int = 256, n_process: int = 1) -> np.ndarray:
+        """Raw vectors, shape (len(texts), dim)."""
+        docs = self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process)
+        return np.stack([doc.vector for doc in docs])
+
+    def encode_one(self, text: str) -> np.ndarray:
+        return self.nlp(text).vector
+
+
+class StaticVectorEncoder:
+    """
+    spaCy-style document vectors from the tokenizer and a vector table alone.
+
+    Averages token vectors like SpacyEncoder (identical scores with a
+    float32 table and uniform weights) without loading or running any
+    pipeline components. Built by static_vectors.load_static_encoder().
+    With stopword_weight below 1, stop words count less and punctuation
+    not at all, so content words dominate short questions.
+    """
+
+    name = "static"
+    multilingual = False
+
+    def __init__(self, table, tokenizer, stopword_weight: float = 1.0):
+        """
+        Args:
+            table: static_vectors.VectorTable
+            tokenizer: spaCy tokenizer with the source model's rules
+            stopword_weight: Weight of stop words relative to other tokens
+        """
+        self.table = table
+        self.tokenizer = tokenizer
+        self.stopword_weight = stopword_weight
+
+    def fingerprint(self) -> str:
+        weighting = "" if self.stopword_weight == 1.0 else f"-stop{self.stopword_weight:g}"
+        return f"static_{self.table.source}-{self.table.dtype}{weighting}"
+
+    def _vector(self, doc) -> np.ndarray:
+        if not len(doc):
+            return np.zeros(self.table.dim, dtype=np.float32)
+        vectors = self.table.lookup(np.fromiter((token.orth for token in doc), dtype=np.uint64, count=len(doc)))
+        if self.stopword_weight == 1.0:
+            # Out-of-vocabulary tokens count as zero vectors, as in Doc.vector
+            return vectors.mean(axis=0)
+
+        weights = np.fromiter(
+            (0.0 if token.is_punct or token.is_space else self.stopword_weight if token.is_stop else 1.0
+             for token in doc),
+            dtype=np.float32, count=len(doc)
+        )
+        total = weights.sum()
+        if total == 0:
+            return vectors.mean(axis=0)
+        return weights @ vectors / total
+
+    def encode(self, texts: List[str], batch_size: int = 256, n_process: int = 1) -> np.ndarray:
+        """Raw vectors, shape (len(texts), dim). n_process is ignored; tokenizing is cheap."""
+        return np.stack([self._vector(doc) for doc in self.tokenizer.pipe(texts, batch_size=batch_size)])
+
+    def encode_one(self, text: str) -> np.ndarray:
+        return self._vector(self.tokenizer(text))
+
+
+class SentenceTransformerEncoder:
+    """
+    Multilingual sentence embeddings from a local sentence-transformers model.
+
+    Questions and queries in every supported language land in one vector
+    space, so a Tamil or Hindi question matches the English FAQ directly,
+    without a translation round trip.
+    """
+
+    name = "multilingual"
+    multilingual = True
+
+    def __init__(self, model_name: str = DEFAULT_MULTILINGUAL_MODEL, device: str = "cpu"):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "FAQ_ENCODER=multilingual needs sentence-transformers: pip install sentence-transformers"
+            ) from e
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device=device)
+
+    def fingerprint(self) -> str:
+        return f"st_{self.model_name.replace('/', '_')}-{self.model.get_sentence_embedding_dimension()}"
+
+    def encode(self, texts: List[str], batch_size: int = 256, n_process: int = 1) -> np.ndarray:
+        """Raw vectors, shape (len(texts), dim). n_process is ignored; the model batches internally."""
+        return np.asarray(
+            self.model.encode(list(texts), batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False),
+            dtype=np.float32
+        )
+
+    def encode_one(self, text: str) -> np.ndarray:
+        return self.encode([text])[0]
+
+
+ENCODERS = {
+    SpacyEncoder.name: SpacyEncoder,
+    StaticVectorEncoder.name: StaticVectorEncoder,
+    SentenceTransformerEncoder.name: SentenceTransformerEncoder,
+}
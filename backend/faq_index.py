@@ -0,0 +1,333 @@
+# backend/faq_index.py
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bump when the on-disk layout or normalization changes
+INDEX_FORMAT_VERSION = 2
+
+# Storage types for the normalized matrix: float16 halves memory, int8
+# (with one scale per row) quarters it, at ~1e-3 score error
+INDEX_DTYPES = ("float32", "float16", "int8")
+
+# Quantized rows are widened to float32 this many at a time when scoring,
+# so scratch memory stays bounded however large the index is
+SCORE_BLOCK_ROWS = 4096
+
+INDEX_DIR = os.getenv(
+    "FAQ_INDEX_DIR",
+    os.path.join(os.path.dirname(__file__), ".index_cache")
+)
+
+
+def quantize(matrix: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Store a normalized float32 matrix as `dtype`.
+
+    Returns:
+        Tuple of (stored matrix, per-row float32 scales for int8 or None)
+    """
+    if dtype not in INDEX_DTYPES:
+        raise ValueError(f"Unsupported index dtype {dtype!r}; expected one of {', '.join(INDEX_DTYPES)}")
+    if dtype == "float32":
+        return matrix, None
+    if dtype == "float16":
+        return matrix.astype(np.float16), None
+
+    # Symmetric per-row int8: each row's largest component maps to +/-127
+    peaks = np.abs(matrix).max(axis=1) if matrix.size else np.zeros(len(matrix), dtype=np.float32)
+    scales = (np.where(peaks > 0, peaks, 1.0) / 127.0).astype(np.float32)
+    return np.rint(matrix / scales[:, None]).astype(np.int8), scales
+
+
+class FAQIndex:
+    """
+    Pre-normalized matrix of FAQ question vectors.
+
+    Cosine similarity against every FAQ becomes a single matrix-vector
+    product, which with float32 storage scores exactly like spaCy's
+    ``Doc.similarity``.
+    """
+
+    def __init__(self, vectors: np.ndarray, dtype: str = "float32"):
+        """
+        Build the index from raw (unnormalized) question vectors.
+
+        Args:
+            vectors: Array of shape (n_faqs, dim), one row per FAQ question
+            dtype: Storage type, one of INDEX_DTYPES
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2:
+            raise ValueError(f"Expected a 2-D vector matrix, got shape {vectors.shape}")
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        # Zero vectors (all tokens out of vocabulary) score 0.0, as in Doc.similarity
+        safe_norms = np.where(norms > 0, norms, 1.0)
+        normalized = np.ascontiguousarray(vectors / safe_norms, dtype=np.float32)
+        self.matrix, self.scales = quantize(normalized, dtype)
+
+    @classmethod
+    def from_normalized(cls, matrix: np.ndarray, scales: Optional[np.ndarray] = None) -> "FAQIndex":
+        """Wrap an already-normalized (and possibly quantized) matrix, e.g. a memory-mapped artifact, without copying."""
+        index = cls.__new__(cls)
+        index.matrix = matrix
+        index.scales = scales
+        return index
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    @property
+    def dtype(self) -> str:
+        return self.matrix.dtype.name
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def rows(self, idx=None) -> np.ndarray:
+        """Normalized rows as float32 (dequantized), all of them or those at `idx`."""
+        matrix = self.matrix if idx is None else self.matrix[idx]
+        rows = np.asarray(matrix, dtype=np.float32)
+        if self.scales is not None:
+            rows = rows * (self.scales if idx is None else self.scales[idx])[:, None]
+        return rows
+
+    def _project(self, queries: np.ndarray) -> np.ndarray:
+        """Unit queries (n_queries, dim) dotted with every row, widening quantized rows block by block."""
+        if self.matrix.dtype == np.float32:
+            return queries @ self.matrix.T
+        out = np.empty((len(queries), len(self)), dtype=np.float32)
+        for start in range(0, len(self), SCORE_BLOCK_ROWS):
+            block = np.asarray(self.matrix[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            out[:, start:start + len(block)] = queries @ block.T
+        if self.scales is not None:
+            out *= self.scales
+        return out
+
+    def scores(self, query_vector: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of a query vector against every FAQ.
+
+        Args:
+            query_vector: Raw query vector of shape (dim,)
+
+        Returns:
+            Array of shape (n_faqs,) with one score per FAQ
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0 or len(self) == 0:
+            return np.zeros(len(self), dtype=np.float32)
+        if self.matrix.dtype == np.float32:
+            return self.matrix @ (query / norm)
+        return self._project((query / norm)[None, :])[0]
+
+    def scores_batch(self, query_vectors: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of many query vectors against every FAQ in one matrix product.
+
+        Args:
+            query_vectors: Raw query vectors of shape (n_queries, dim)
+
+        Returns:
+            Array of shape (n_queries, n_faqs)
+        """
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms > 0, norms, 1.0)
+        return self._project(queries)
+
+    def best(self, query_vector: np.ndarray) -> Tuple[int, float]:
+        """
+        Return the best matching FAQ for a query vector.
+
+        Mirrors the original linear scan: the first FAQ wins ties and
+        non-positive scores yield no match.
+
+        Returns:
+            Tuple of (faq_index, score), or (-1, 0.0) when nothing scores above 0
+        """
+        return best_of(self.scores(query_vector))
+
+    def top_k(self, query_vector: np.ndarray, k: int = 3) -> List[Tuple[int, float]]:
+        """
+        Return the k best matching FAQs, highest score first.
+
+        Args:
+            query_vector: Raw query vector of shape (dim,)
+            k: Number of results to return
+
+        Returns:
+            List of (faq_index, score) tuples
+        """
+        return top_k_of(self.scores(query_vector), k)
+
+
+def best_of(scores: np.ndarray) -> Tuple[int, float]:
+    """Best (index, score) in a score row; the first index wins ties, non-positive scores give (-1, 0.0)."""
+    if scores.size == 0:
+        return -1, 0.0
+    idx = int(np.argmax(scores))
+    score = float(scores[idx])
+    if score <= 0.0:
+        return -1, 0.0
+    return idx, score
+
+
+def top_k_of(scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """The k highest (index, score) pairs in a score row, highest first."""
+    k = min(k, scores.size)
+    if k <= 0:
+        return []
+    if k == 1:
+        # argmax already returns the first of equal scores
+        idx = int(np.argmax(scores))
+        return [(idx, float(scores[idx]))]
+    if k < scores.size:
+        # argpartition picks arbitrary rows among ties at the k-th score, so
+        # take everything above it, then the lowest-index rows that tie it
+        kth = np.partition(scores, scores.size - k)[scores.size - k]
+        above = np.flatnonzero(scores > kth)
+        tied = np.flatnonzero(scores == kth)[:k - len(above)]
+        candidates = np.concatenate([above, tied])
+    else:
+        candidates = np.arange(scores.size)
+    # Lowest FAQ index first among equal scores
+    order = candidates[np.lexsort((candidates, -scores[candidates]))]
+    return [(int(i), float(scores[i])) for i in order]
+
+
+def index_key(faq_bytes: bytes, model_fingerprint: str) -> str:
+    """
+    Content key for a compiled index.
+
+    Args:
+        faq_bytes: Raw contents of faq.json
+        model_fingerprint: Model name and version the vectors come from
+
+    Returns:
+        Hex digest that changes whenever the FAQs, model or format change
+    """
+    digest = hashlib.sha256()
+    digest.update(f"v{INDEX_FORMAT_VERSION}:{model_fingerprint}:".encode("utf-8"))
+    digest.update(faq_bytes)
+    return digest.hexdigest()[:16]
+
+
+def _artifact_paths(index_dir: str, key: str) -> Tuple[str, str, str]:
+    base = os.path.join(index_dir, f"faq_index-{key}")
+    return base + ".npy", base + ".scales.npy", base + ".json"
+
+
+def save_index(index: FAQIndex, index_dir: str, key: str, metadata: Optional[dict] = None):
+    """
+    Write the normalized matrix and its metadata atomically.
+
+    Older artifacts in the same directory are removed once the new one is in place.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    npy_path, scales_path, meta_path = _artifact_paths(index_dir, key)
+
+    meta = dict(metadata or {})
+    meta.update({
+        "key": key,
+        "format_version": INDEX_FORMAT_VERSION,
+        "count": len(index),
+        "dim": index.dim,
+        "dtype": index.dtype,
+    })
+
+    def write_array(path: str, array: np.ndarray):
+        # Write to a temp file first so concurrent workers never mmap a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=index_dir, suffix=".npy.tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, np.asarray(array))
+        os.replace(tmp_path, path)
+
+    write_array(npy_path, index.matrix)
+    if index.scales is not None:
+        write_array(scales_path, index.scales)
+
+    # Metadata goes last: its presence marks the artifact as complete
+    fd, tmp_meta = tempfile.mkstemp(dir=index_dir, suffix=".json.tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta, meta_path)
+
+    for name in os.listdir(index_dir):
+        path = os.path.join(index_dir, name)
+        if name.startswith("faq_index-") and path not in (npy_path, scales_path, meta_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    logger.info(f"Saved FAQ index {key} ({len(index)} x {index.dim} {index.dtype}) to {index_dir}")
+
+
+def load_index(index_dir: str, key: str) -> Optional[FAQIndex]:
+    """
+    Memory-map a compiled index if one exists for this key.
+
+    The matrix is opened read-only, so every worker shares the same page-cache pages.
+
+    Returns:
+        FAQIndex backed by the mapped file, or None if missing or stale
+    """
+    npy_path, scales_path, meta_path = _artifact_paths(index_dir, key)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("key") != key or meta.get("format_version") != INDEX_FORMAT_VERSION:
+            return None
+        matrix = np.load(npy_path, mmap_mode="r")
+        scales = np.load(scales_path, mmap_mode="r") if meta.get("dtype") == "int8" else None
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable FAQ index {key}: {e}")
+        return None
+
+    if matrix.shape != (meta["count"], meta["dim"]) or (scales is not None and scales.shape != (meta["count"],)):
+        logger.warning(f"FAQ index {key} has shape {matrix.shape}, expected ({meta['count']}, {meta['dim']})")
+        return None
+
+    logger.info(f"Memory-mapped FAQ index {key} ({matrix.shape[0]} x {matrix.shape[1]} {matrix.dtype})")
+    return FAQIndex.from_normalized(matrix, scales)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the compiled FAQ index ahead of deployment")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--force", action="store_true", help="Rebuild even if an artifact for the current key exists")
+    args = parser.parse_args()
+
+    import nlp
+
+    # Loads the artifact for the current faq.json, building it if missing
+    nlp.load_faqs(force_rebuild=args.force)
+
+    snapshot = nlp.store.snapshot
+    if snapshot.index is None:
+        raise SystemExit("FAQ index could not be loaded")
+    index = snapshot.index
+    print(f"FAQ index {snapshot.key}: {len(index)} x {index.dim} {index.dtype} "
+          f"({index.nbytes / 1024:.0f} KB, {snapshot.fingerprint}) in {INDEX_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+# backend/faq_store.py
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from faq_index import FAQIndex, INDEX_DIR, index_key, load_index, quantize, save_index
+from index_backends import ExactBackend
+
+logger = logging.getLogger(__name__)
+
+
+def entry_hash(question: str) -> str:
+    """Content hash of one phrasing that gets embedded."""
+    return hashlib.sha1(question.encode("utf-8")).hexdigest()
+
+
+def phrasings(faq: dict) -> List[str]:
+    """
+    Every phrasing indexed for an entry: the canonical "question" first,
+    then any "questions" / "aliases", without duplicates. Entries may
+    leave out "question" and list only "questions".
+    """
+    texts = [faq.get("question"), *faq.get("questions", []), *faq.get("aliases", [])]
+    return list(dict.fromkeys(text for text in texts if text and text.strip()))
+
+
+def canonical_question(faq: dict) -> Optional[str]:
+    """The question shown for an entry: "question", else its first phrasing."""
+    texts = phrasings(faq)
+    return texts[0] if texts else None
+
+
+@dataclass(frozen=True)
+class FAQSnapshot:
+    """
+    Immutable view of the FAQ set and its index.
+
+    Readers grab the current snapshot once per request, so a reload that
+    swaps in a new one never exposes a half-built state.
+    """
+    data: List[dict]
+    index: Optional[FAQIndex]
+    key: Optional[str] = None
+    fingerprint: Optional[str] = None
+    by_id: Dict = field(default_factory=dict)
+    rows_by_hash: Dict[str, int] = field(default_factory=dict)
+    # Index row of each entry's first phrasing; entry i owns rows row_starts[i]:row_starts[i + 1]
+    row_starts: Optional[np.ndarray] = None
+    # Search backend over `index` (see index_backends)
+    search: Any = None
+
+
+EMPTY_SNAPSHOT = FAQSnapshot(data=[], index=None)
+
+
+class FAQStore:
+    """
+    Owns faq.json and its vector index, and reloads them incrementally.
+
+    Each phrasing of an entry (see `phrasings`) is one index row, and
+    rows are grouped by entry. On reload, phrasings are diffed by content
+    hash against the current snapshot. Only added or changed ones are
+    re-embedded; the rest reuse their existing normalized rows.
+    """
+
+    def __init__(self, path: str, encode: Callable[[List[str]], np.ndarray],
+                 fingerprint: Callable[[], str], index_dir: str = INDEX_DIR,
+                 on_swap: Optional[Callable[[], None]] = None, dtype: str = "float32",
+                 backend: Callable[[FAQIndex, np.ndarray], Any] = ExactBackend):
+        """
+        Args:
+            path: Path to faq.json
+            encode: Returns raw vectors of shape (n, dim) for a list of questions
+            fingerprint: Identifies the vector model, for artifact keys
+            index_dir: Directory holding compiled index artifacts
+            on_swap: Called after a new snapshot is published (e.g. to clear caches)
+            dtype: Index storage type (see faq_index.INDEX_DTYPES)
+            backend: Builds the search backend for a new index, given (index, row_starts)
+        """
+        self.path = path
+        self.index_dir = index_dir
+        self.dtype = dtype
+        self._backend = backend
+        self._encode = encode
+        self._fingerprint = fingerprint
+        self._on_swap = on_swap
+        self._snapshot = EMPTY_SNAPSHOT
+        self._reload_lock = threading.Lock()
+        self._file_signature: Optional[Tuple[int, int]] = None
+        self._watch_stop = threading.Event()
+        self.last_reload: Optional[dict] = None
+
+    @property
+    def snapshot(self) -> FAQSnapshot:
+        return self._snapshot
+
+    def _read_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self, force_rebuild: bool = False) -> dict:
+        """
+        Load faq.json and publish a new snapshot if its content changed.
+
+        Blocks until done; concurrent loads are serialized.
+
+        Args:
+            force_rebuild: Re-embed every question, ignoring artifacts and the current snapshot
+
+        Returns:
+            Summary of what was reused, embedded and removed
+        """
+        with self._reload_lock:
+            start = time.perf_counter()
+            summary = self._load_locked(force_rebuild)
+            summary["seconds"] = round(time.perf_counter() - start, 3)
+            self.last_reload = summary
+            return summary
+
+    def _load_locked(self, force_rebuild: bool) -> dict:
+        # Recorded even if parsing fails, so the watcher retries only after the next edit
+        self._file_signature = self._read_signature()
+        with open(self.path, "rb") as f:
+            faq_bytes = f.read()
+        data = json.loads(faq_bytes)
+
+        if not data:
+            logger.warning("FAQ file is empty")
+            self._publish(EMPTY_SNAPSHOT)
+            return {"status": "empty", "count": 0}
+
+        # Entries without an explicit id are addressed by position
+        for idx, faq in enumerate(data):
+            faq.setdefault("id", idx)
+
+        # An entry with no phrasing would own zero index rows, and max-pooling
+        # by row_starts would credit it with its neighbour's score
+        blank = [faq["id"] for faq in data if not phrasings(faq)]
+        if blank:
+            logger.warning(f"Skipping FAQ entries without a question: {blank}")
+            data = [faq for faq in data if phrasings(faq)]
+            if not data:
+                self._publish(EMPTY_SNAPSHOT)
+                return {"status": "empty", "count": 0}
+
+        # Storage type is part of the fingerprint: a float32 and an int8 index never share rows
+        fingerprint = f"{self._fingerprint()}/{self.dtype}"
+        key = index_key(faq_bytes, fingerprint)
+        current = self._snapshot
+
+        if key == current.key and not force_rebuild:
+            return {"status": "unchanged", "key": key, "count": len(data)}
+
+        texts_per_entry = [phrasings(faq) for faq in data]
+        texts = [text for entry in texts_per_entry for text in entry]
+        row_starts = np.cumsum([0] + [len(entry) for entry in texts_per_entry[:-1]])
+        hashes = [entry_hash(text) for text in texts]
+        summary = {"status": "loaded", "key": key, "count": len(data), "phrasings": len(texts),
+                   "embedded": 0, "reused": 0, "skipped": blank}
+
+        # Another worker may already have compiled this exact content
+        index = None if force_rebuild else load_index(self.index_dir, key)
+        if index is None:
+            index, embedded = self._build_index(texts, hashes, fingerprint, current, force_rebuild)
+            summary["embedded"] = embedded
+            summary["reused"] = len(texts) - embedded
+            try:
+                save_index(index, self.index_dir, key, {"model": fingerprint})
+            except OSError as e:
+                logger.warning(f"Could not save FAQ index to {self.index_dir}: {e}")
+
+        if len(index) != len(texts):
+            raise ValueError(f"FAQ index has {len(index)} rows for {len(texts)} phrasings")
+
+        summary["removed"] = len(set(current.rows_by_hash) - set(hashes))
+
+        snapshot = FAQSnapshot(
+            data=data,
+            index=index,
+            key=key,
+            fingerprint=fingerprint,
+            by_id={faq["id"]: faq for faq in data},
+            rows_by_hash={h: row for row, h in enumerate(hashes)},
+            row_starts=row_starts,
+            # Built before the swap, so requests never wait on clustering or graph building
+            search=self._backend(index, row_starts)
+        )
+        self._publish(snapshot)
+        logger.info(f"Loaded {len(data)} FAQs (index {key}, {summary['embedded']} embedded)")
+        return summary
+
+    def _build_index(self, texts: List[str], hashes: List[str], fingerprint: str,
+                     current: FAQSnapshot, force_rebuild: bool) -> Tuple[FAQIndex, int]:
+        """Assemble a new index, embedding only phrasings the current snapshot lacks."""
+        reusable = {}
+        if not force_rebuild and current.index is not None and current.fingerprint == fingerprint:
+            reusable = current.rows_by_hash
+
+        missing = [row for row, h in enumerate(hashes) if h not in reusable]
+        if not missing:
+            dim = current.index.dim
+        else:
+            new_rows = FAQIndex(self._encode([texts[row] for row in missing])).matrix
+            dim = new_rows.shape[1]
+
+        matrix = np.empty((len(texts), dim), dtype=np.float32)
+        if missing:
+            matrix[missing] = new_rows
+
+        reused = [row for row, h in enumerate(hashes) if h in reusable]
+        if reused:
+            matrix[reused] = current.index.rows([reusable[hashes[row]] for row in reused])
+
+        return FAQIndex.from_normalized(*quantize(matrix, self.dtype)), len(missing)
+
+    def _publish(self, snapshot: FAQSnapshot):
+        # Single reference assignment: readers see the old or the new snapshot, never a mix
+        self._snapshot = snapshot
+        if self._on_swap is not None:
+            self._on_swap()
+
+    def reload(self) -> dict:
+        """Load like load(), but log failures and keep serving the current snapshot."""
+        try:
+            return self.load()
+        except Exception as e:
+            logger.error(f"FAQ reload failed, keeping index {self._snapshot.key}: {e}")
+            self.last_reload = {"status": "failed", "error": str(e)}
+            return self.last_reload
+
+    def reload_async(self) -> bool:
+        """
+        Start a reload on a background thread.
+
+        Returns:
+            False if a reload is already running
+        """
+        if self._reload_lock.locked():
+            return False
+        threading.Thread(target=self.reload, name="faq-reload", daemon=True).start()
+        return True
+
+    def watch(self, interval: float = 5.0) -> threading.Thread:
+        """
+        Poll faq.json and reload in the background whenever it changes.
+
+        Nothing happens until the first load, which stays lazy.
+        """
+        def _loop():
+            while not self._watch_stop.wait(interval):
+                if self._file_signature is None:
+                    continue
+                signature = self._read_signature()
+                if signature is not None and signature != self._file_signature:
+                    self.reload()
+
+        thread = threading.Thread(target=_loop, name="faq-watch", daemon=True)
+        thread.start()
+        return thread
+
+    def stop_watching(self):
+        self._watch_stop.set()
+
+    def status(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "key": snapshot.key,
+            "count": len(snapshot.data),
+            "dtype": snapshot.index.dtype if snapshot.index is not None else self.dtype,
+            "index_bytes": snapshot.index.nbytes if snapshot.index is not None else 0,
+            "search": snapshot.search.stats() if snapshot.search is not None else None,
+            "reloading": self._reload_lock.locked(),
+            "last_reload": self.last_reload
+        }
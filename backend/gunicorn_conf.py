@@ -0,0 +1,77 @@
+# backend/gunicorn_conf.py
+"""
+Multi-worker deployment with models loaded once, before fork.
+
+    pip install gunicorn
+    gunicorn -c gunicorn_conf.py main:app
+    WEB_CONCURRENCY=8 INFERENCE_SOCKET=/run/mindmend/whisper.sock gunicorn -c gunicorn_conf.py main:app
+
+The master imports the app and loads MINDMEND_PRELOAD components, then
+forks the workers. They share those pages copy-on-write, and the FAQ
+index is memory-mapped, so they share its page cache too. Whisper is
+not preloaded (CTranslate2 starts threads, which do not survive fork);
+run inference_server.py and set INFERENCE_SOCKET to load it once for
+all workers instead of once per worker.
+
+Each worker publishes its metrics to METRICS_DIR, so /metrics on any
+worker reports all of them (see metrics.MultiprocessMetrics).
+"""
+import gc
+import itertools
+import os
+import shutil
+import tempfile
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") != "0"
+
+# Read-only components worth sharing between workers; "encoder" loads the
+# spaCy pipeline itself when FAQ_ENCODER=spacy, and skips it for "static"
+PRELOAD = [name.strip() for name in os.getenv("MINDMEND_PRELOAD", "encoder,faq_index").split(",") if name.strip()]
+
+
+# Shared by the workers of this server; loaded in the master, so the pid is the master's
+METRICS_DIR = os.getenv("METRICS_DIR") or os.path.join(tempfile.gettempdir(), f"mindmend-metrics-{os.getpid()}")
+
+
+def on_starting(server):
+    # Files left by an earlier run's workers would be merged as live ones
+    shutil.rmtree(METRICS_DIR, ignore_errors=True)
+    os.makedirs(METRICS_DIR, exist_ok=True)
+
+
+def on_exit(server):
+    if not os.getenv("METRICS_DIR"):
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+
+
+def when_ready(server):
+    """Runs in the master after the app is imported and before the first fork."""
+    if not preload_app or not PRELOAD:
+        return
+    from lazy import warm_up
+
+    warm_up(PRELOAD, background=False)
+    # Freeze what is loaded: the GC would otherwise write to these objects'
+    # headers in every worker and turn shared pages into private copies
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Preloaded {', '.join(PRELOAD)} before forking {workers} workers")
+
+
+def pre_fork(server, worker):
+    # Stable worker slots (0..workers-1), reused when a worker is replaced
+    taken = {getattr(w, "slot", None) for w in server.WORKERS.values()}
+    worker.slot = next(slot for slot in itertools.count() if slot not in taken)
+
+
+def post_fork(server, worker):
+    import main
+    import metrics
+
+    # One history writer per directory: each worker appends under root/worker-N
+    main.history.reopen(os.path.join(main.history.root, f"worker-{worker.slot}"))
+    metrics.enable_multiprocess(METRICS_DIR, f"worker-{worker.slot}", main._collect_metrics)
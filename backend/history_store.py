@@ -0,0 +1,451 @@
+# backend/history_store.py
+import argparse
+import glob
+import json
+import logging
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DIR = os.getenv(
+    "HISTORY_DIR",
+    os.path.join(os.path.dirname(__file__), "history")
+)
+
+_SEGMENT_NAME = re.compile(r"history-(\d{6})\.jsonl$")
+_STOP = object()
+
+
+def segment_paths(directory: str) -> List[str]:
+    """History segments in write order, oldest first."""
+    paths = [p for p in glob.glob(os.path.join(directory, "history-*.jsonl")) if _SEGMENT_NAME.search(p)]
+    return sorted(paths, key=lambda p: int(_SEGMENT_NAME.search(p).group(1)))
+
+
+def writer_directories(root: str) -> List[str]:
+    """
+    The root plus the per-worker directories under it.
+
+    Multi-process deployments give every worker its own directory
+    (root/worker-N, see HistoryStore.reopen), since each directory has
+    exactly one writer.
+    """
+    workers = [p for p in glob.glob(os.path.join(root, "worker-*")) if os.path.isdir(p)]
+    return [root] + sorted(workers)
+
+
+def read_segment(path: str) -> Iterator[dict]:
+    """Records in one segment; a torn last line (crash mid-write) is skipped."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        return
+
+
+class _Session:
+    __slots__ = ("turns", "last_seen")
+
+    def __init__(self, max_turns: int):
+        self.turns = deque(maxlen=max_turns)
+        self.last_seen = time.monotonic()
+
+
+class HistoryStore:
+    """
+    Append-only chat history in JSONL segments.
+
+    append() only updates memory and enqueues the record; a writer thread
+    group-commits queued records with one write per batch, so no request
+    ever waits on disk. Recent turns of active sessions are kept in an
+    LRU bounded by session count, and sessions idle past the TTL are
+    dropped from memory (they stay on disk).
+
+    Each directory has a single writer. Forked workers move to their own
+    directory under the root with reopen(); reloads read all of them.
+
+    Segments rotate at segment_bytes. Once enough closed segments pile
+    up they are compacted: records past the retention window are dropped
+    and runs of undersized segments merged. Full segments with nothing
+    to drop are left alone, so a compaction never rewrites the whole
+    history. A crash mid-compaction can leave duplicate turns, never
+    lost ones.
+    """
+
+    def __init__(self, directory: str = HISTORY_DIR, segment_bytes: int = 16 * 1024 * 1024,
+                 flush_interval: float = 0.2, max_batch: int = 512, max_sessions: int = 10000,
+                 session_ttl: float = 3600.0, turns_per_session: int = 50,
+                 retention_days: float = 0.0, compact_segments: int = 8, fsync: bool = False):
+        """
+        Args:
+            directory: Where segments are written
+            segment_bytes: Size at which the active segment is closed
+            flush_interval: Longest a record waits in the queue before being written
+            max_batch: Records written per group commit at most
+            max_sessions: Sessions kept in memory
+            session_ttl: Seconds of inactivity before a session leaves memory
+            turns_per_session: Recent turns kept in memory per session
+            retention_days: Compaction drops older records (0 keeps everything)
+            compact_segments: Closed segments that trigger a compaction
+            fsync: fsync after every group commit (durable, slower)
+        """
+        self.directory = directory
+        # Reads cover every writer directory under the root
+        self.root = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.turns_per_session = turns_per_session
+        self.retention_days = retention_days
+        self.compact_segments = compact_segments
+        self.fsync = fsync
+
+        self.sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._sessions_lock = threading.Lock()
+        self._segments_lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._file = None
+        self._seq = 0
+
+        self.appended = 0
+        self.written = 0
+        self.commits = 0
+        self.evicted_sessions = 0
+        self.compactions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._open_active()
+        self._start_writer()
+
+    def _start_writer(self):
+        self._writer = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._writer.start()
+
+    def reopen(self, directory: str):
+        """
+        Continue in another directory under the same root, with a new writer.
+
+        For forked workers: the parent's writer thread does not survive
+        fork, and two processes must not share a directory.
+        """
+        if self._writer.is_alive():
+            # Not forked: let the current writer drain and close its segment
+            self.close()
+        elif not self._file.closed:
+            self._file.close()
+        self.directory = directory
+        self._queue = queue.Queue()
+        self._sessions_lock = threading.Lock()
+        self._segments_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._open_active()
+        self._start_writer()
+
+    def append(self, session_id: str, message: str, role: str = "user", response: Optional[str] = None):
+        """Record one turn. Never touches disk."""
+        record = {
+            "timestamp": datetime.now().isoformat(),
+            "session_id": session_id,
+            "role": role,
+            "message": message,
+            "response": response
+        }
+        with self._sessions_lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = self.sessions[session_id] = _Session(self.turns_per_session)
+            else:
+                self.sessions.move_to_end(session_id)
+            session.turns.append(record)
+            session.last_seen = time.monotonic()
+            self._trim()
+        self.appended += 1
+        self._queue.put(record)
+
+    def recent(self, session_id: str, limit: Optional[int] = None) -> List[dict]:
+        """
+        Latest turns of a session, oldest first.
+
+        Served from memory; a session that was evicted is reloaded from
+        the segments, which scans them newest first.
+        """
+        with self._sessions_lock:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                self.sessions.move_to_end(session_id)
+                session.last_seen = time.monotonic()
+                turns = list(session.turns)
+                return turns[-limit:] if limit else turns
+
+        turns = self._load_session(session_id)
+        if turns:
+            with self._sessions_lock:
+                session = self.sessions.setdefault(session_id, _Session(self.turns_per_session))
+                if not session.turns:
+                    session.turns.extend(turns)
+                self._trim()
+        return turns[-limit:] if limit else turns
+
+    def _trim(self):
+        # Caller holds _sessions_lock
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.evicted_sessions += 1
+
+    def _load_session(self, session_id: str) -> List[dict]:
+        turns = []
+        with self._segments_lock:
+            for directory in writer_directories(self.root):
+                found = 0
+                for path in reversed(segment_paths(directory)):
+                    matches = [r for r in read_segment(path) if r.get("session_id") == session_id]
+                    turns.extend(matches)
+                    found += len(matches)
+                    if found >= self.turns_per_session:
+                        break
+        # A session served by several workers has turns in several directories;
+        # ISO timestamps order them (the sort is stable for ties)
+        turns.sort(key=lambda record: record.get("timestamp", ""))
+        return turns[-self.turns_per_session:]
+
+    def _open_active(self):
+        paths = segment_paths(self.directory)
+        if paths:
+            self._seq = int(_SEGMENT_NAME.search(paths[-1]).group(1))
+            if os.path.getsize(paths[-1]) >= self.segment_bytes:
+                self._seq += 1
+        else:
+            self._seq = 1
+        self._file = open(self._segment_path(self._seq), "a", encoding="utf-8")
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"history-{seq:06d}.jsonl")
+
+    def _run(self):
+        sweep_every = max(1.0, min(self.session_ttl / 4, 60.0))
+        next_sweep = time.monotonic() + sweep_every
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=sweep_every)
+            except queue.Empty:
+                first = None
+
+            batch = []
+            if first is _STOP:
+                stopping = True
+            elif first is not None:
+                batch.append(first)
+                # Group commit: gather whatever arrives within flush_interval
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.max_batch:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+
+            if stopping:
+                # Drain everything queued before close()
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _STOP:
+                        batch.append(item)
+
+            if batch:
+                try:
+                    self._commit(batch)
+                except Exception as e:
+                    logger.error(f"Failed to write {len(batch)} history records: {e}")
+
+            if time.monotonic() >= next_sweep:
+                self.evict_idle()
+                next_sweep = time.monotonic() + sweep_every
+
+        self._file.close()
+
+    def _commit(self, batch: List[dict]):
+        self._file.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.written += len(batch)
+        self.commits += 1
+
+        if self._file.tell() >= self.segment_bytes:
+            self._file.close()
+            self._seq += 1
+            self._file = open(self._segment_path(self._seq), "a", encoding="utf-8")
+            if len(segment_paths(self.directory)) - 1 >= self.compact_segments:
+                self.compact()
+
+    def evict_idle(self) -> int:
+        """Drop sessions idle longer than the TTL from memory."""
+        cutoff = time.monotonic() - self.session_ttl
+        evicted = 0
+        with self._sessions_lock:
+            # LRU order is last-seen order, so idle sessions are at the front
+            while self.sessions:
+                session_id, session = next(iter(self.sessions.items()))
+                if session.last_seen >= cutoff:
+                    break
+                del self.sessions[session_id]
+                evicted += 1
+        self.evicted_sessions += evicted
+        return evicted
+
+    def compact(self, small_bytes: Optional[int] = None) -> dict:
+        """
+        Drop records older than the retention window and merge runs of
+        undersized closed segments. The active segment is never touched.
+
+        Segments are in write order, so expired records only sit in a
+        prefix of them; each compaction rewrites that prefix plus any
+        segments smaller than small_bytes (default: segment_bytes) and
+        nothing else.
+        """
+        small_bytes = self.segment_bytes if small_bytes is None else small_bytes
+        active = self._segment_path(self._seq)
+        closed = [p for p in segment_paths(self.directory) if p != active]
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).isoformat() if self.retention_days else None
+
+        # Adjacent segments to rewrite together; an untouched segment ends a group
+        groups, group = [], []
+        expiring = cutoff is not None
+        for path in closed:
+            if expiring:
+                first = next(read_segment(path), None)
+                # ISO timestamps from one clock compare correctly as strings
+                expiring = first is not None and first.get("timestamp", "") < cutoff
+            if expiring or os.path.getsize(path) < small_bytes:
+                group.append(path)
+            elif group:
+                groups.append(group)
+                group = []
+        if group:
+            groups.append(group)
+
+        kept = dropped = rewritten = 0
+        for group in groups:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".jsonl.tmp")
+            group_kept = group_dropped = 0
+            with os.fdopen(fd, "w", encoding="utf-8") as out:
+                for path in group:
+                    for record in read_segment(path):
+                        if cutoff and record.get("timestamp", "") < cutoff:
+                            group_dropped += 1
+                            continue
+                        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        group_kept += 1
+            if len(group) == 1 and not group_dropped:
+                # A lone undersized segment with nothing to drop
+                os.remove(tmp_path)
+                continue
+
+            kept += group_kept
+            dropped += group_dropped
+
+            rewritten += len(group)
+            with self._segments_lock:
+                if group_kept:
+                    # Replace the newest segment of the group first: a crash
+                    # before the deletes below duplicates turns but never loses them
+                    os.replace(tmp_path, group[-1])
+                    group = group[:-1]
+                else:
+                    os.remove(tmp_path)
+                for path in group:
+                    os.remove(path)
+
+        summary = {"segments": len(closed), "rewritten": rewritten, "kept": kept, "dropped": dropped}
+        if rewritten:
+            self.compactions += 1
+            logger.info(f"Compacted history: {summary}")
+        return summary
+
+    def close(self, timeout: float = 5.0):
+        """Write out everything queued and stop the writer."""
+        self._queue.put(_STOP)
+        self._writer.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "directory": self.directory,
+            "segments": len(segment_paths(self.directory)),
+            "sessions_in_memory": len(self.sessions),
+            "queued": self._queue.qsize(),
+            "appended": self.appended,
+            "written": self.written,
+            "commits": self.commits,
+            "records_per_commit": round(self.written / self.commits, 2) if self.commits else 0.0,
+            "evicted_sessions": self.evicted_sessions,
+            "compactions": self.compactions
+        }
+
+
+def iter_records(directory: str = HISTORY_DIR) -> Iterator[dict]:
+    """Every stored record, oldest first within each writer directory."""
+    for writer_directory in writer_directories(directory):
+        for path in segment_paths(writer_directory):
+            yield from read_segment(path)
+
+
+def history_store_from_env() -> HistoryStore:
+    """Store configured from HISTORY_DIR and HISTORY_* variables."""
+    return HistoryStore(
+        directory=HISTORY_DIR,
+        segment_bytes=_segment_bytes(),
+        flush_interval=float(os.getenv("HISTORY_FLUSH_MS", "200")) / 1000,
+        max_sessions=int(os.getenv("HISTORY_MAX_SESSIONS", "10000")),
+        session_ttl=float(os.getenv("HISTORY_SESSION_TTL", "3600")),
+        turns_per_session=int(os.getenv("HISTORY_TURNS_PER_SESSION", "50")),
+        retention_days=float(os.getenv("HISTORY_RETENTION_DAYS", "0")),
+        compact_segments=int(os.getenv("HISTORY_COMPACT_SEGMENTS", "8")),
+        fsync=os.getenv("HISTORY_FSYNC", "0") == "1"
+    )
+
+
+def _segment_bytes() -> int:
+    return int(float(os.getenv("HISTORY_SEGMENT_MB", "16")) * 1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the chat history segments (stop the server first)")
+    parser.add_argument("command", choices=["compact", "stats"])
+    parser.add_argument("--retention-days", type=float, default=float(os.getenv("HISTORY_RETENTION_DAYS", "0")))
+    args = parser.parse_args()
+
+    for directory in writer_directories(HISTORY_DIR):
+        # Rotate first so the current segment is closed and gets compacted too
+        store = HistoryStore(directory=directory, segment_bytes=0, retention_days=args.retention_days)
+        if args.command == "compact":
+            print(f"🗜️ {directory}: {store.compact(small_bytes=_segment_bytes())}")
+        store.close()
+        print(store.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+# backend/index_backends.py
+"""
+Search backends over a FAQIndex.
+
+Every backend answers ``search(query, k)`` / ``search_batch(queries, k)``
+with (entry, score) pairs, highest score first. When entries have several
+phrasings (``row_starts``), an entry scores the max over its rows.
+
+    exact   brute-force scan of every row (FAQIndex.scores)
+    ivf     inverted file: spherical k-means lists, only the n_probe
+            closest lists are scanned; pure NumPy
+    hnsw    hnswlib graph (optional dependency)
+
+Approximate backends are checked against exact search when built, and
+the recall is reported with their stats.
+
+    python index_backends.py check --backend ivf --probe 4 8 16 32
+    python index_backends.py check --synthetic 50000 --backend hnsw --ef 32 64 128
+"""
+import argparse
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from faq_index import FAQIndex, top_k_of
+
+logger = logging.getLogger(__name__)
+
+Hits = List[Tuple[int, float]]
+
+
+def _grouping(index: FAQIndex, row_starts: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    """row_starts, or None when every entry has exactly one row and pooling is a no-op."""
+    if row_starts is None or len(row_starts) == len(index):
+        return None
+    row_starts = np.asarray(row_starts, dtype=np.intp)
+    # reduceat gives an empty group its neighbour's value, so every entry needs a row
+    if len(row_starts) and (row_starts[0] != 0 or np.any(np.diff(row_starts) <= 0)
+                            or row_starts[-1] >= len(index)):
+        raise ValueError("Every FAQ entry needs at least one indexed row")
+    return row_starts
+
+
+class ExactBackend:
+    """Scores every row; the reference the approximate backends are checked against."""
+
+    name = "exact"
+
+    def __init__(self, index: FAQIndex, row_starts: Optional[np.ndarray] = None):
+        self.index = index
+        self.row_starts = _grouping(index, row_starts)
+        self.recall: Optional[dict] = None
+
+    def search(self, query_vector: np.ndarray, k: int) -> Hits:
+        scores = self.index.scores(query_vector)
+        if self.row_starts is not None:
+            # Max-pool each entry's contiguous rows in one vectorized pass
+            scores = np.maximum.reduceat(scores, self.row_starts)
+        return top_k_of(scores, k)
+
+    def search_batch(self, query_vectors: np.ndarray, k: int) -> List[Hits]:
+        scores = self.index.scores_batch(query_vectors)
+        if self.row_starts is not None:
+            scores = np.maximum.reduceat(scores, self.row_starts, axis=1)
+        return [top_k_of(row, k) for row in scores]
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "rows": len(self.index),
+                "entries": len(self.row_starts) if self.row_starts is not None else len(self.index)}
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+class ApproximateBackend:
+    """
+    Shared entry pooling for backends that return nearest rows.
+
+    Subclasses implement _search_rows; enough extra rows are fetched that
+    entries with several close phrasings don't crowd out the top k.
+    """
+
+    name = ""
+
+    def _init_grouping(self, index: FAQIndex, row_starts: Optional[np.ndarray]):
+        self.index = index
+        self.row_starts = _grouping(index, row_starts)
+        self.recall: Optional[dict] = None
+        if self.row_starts is None:
+            self.row_entry = None
+            self.fetch_factor = 1
+        else:
+            sizes = np.diff(np.append(self.row_starts, len(index)))
+            self.row_entry = np.repeat(np.arange(len(sizes)), sizes)
+            self.fetch_factor = int(min(sizes.max(), 8))
+
+    def _search_rows(self, queries: np.ndarray, k: int) -> List[Hits]:
+        raise NotImplementedError
+
+    def search_batch(self, query_vectors: np.ndarray, k: int) -> List[Hits]:
+        row_hits = self._search_rows(_unit(query_vectors), k * self.fetch_factor)
+        if self.row_entry is None:
+            return row_hits
+        pooled = []
+        for hits in row_hits:
+            # Hits are best first, so an entry's first hit is its max
+            entries = {}
+            for row, score in hits:
+                entries.setdefault(int(self.row_entry[row]), score)
+                if len(entries) == k:
+                    break
+            pooled.append(list(entries.items()))
+        return pooled
+
+    def search(self, query_vector: np.ndarray, k: int) -> Hits:
+        return self.search_batch(np.asarray(query_vector)[None, :], k)[0]
+
+
+class IVFBackend(ApproximateBackend):
+    """
+    Inverted-file index: rows are clustered with spherical k-means and a
+    query only scores the rows in its n_probe nearest clusters.
+
+    Scanned rows per query are roughly len(index) * n_probe / n_lists;
+    raise n_probe for recall, lower it for latency. Like any inverted
+    file it keeps its own copy of the rows, grouped by list so each
+    probe is one contiguous slice (in the index's storage dtype).
+    """
+
+    name = "ivf"
+
+    def __init__(self, index: FAQIndex, row_starts: Optional[np.ndarray] = None,
+                 n_lists: Optional[int] = None, n_probe: int = 8,
+                 iterations: int = 10, train_size: int = 20000, seed: int = 0):
+        """
+        Args:
+            index: Rows to search
+            row_starts: First row of each entry, for entries with several phrasings
+            n_lists: Number of clusters (default ~sqrt(rows))
+            n_probe: Clusters scanned per query
+            iterations: k-means iterations
+            train_size: Rows sampled to train the centroids
+            seed: Makes clustering deterministic across workers
+        """
+        self._init_grouping(index, row_starts)
+        self.n_lists = max(1, min(n_lists or int(np.sqrt(len(index))), len(index)))
+        self.n_probe = n_probe
+
+        start = time.perf_counter()
+        rows = index.rows()
+        rng = np.random.default_rng(seed)
+        train = rows[rng.choice(len(rows), min(train_size, len(rows)), replace=False)]
+        # Centroids are drawn from the training sample, which may be smaller than the index
+        self.n_lists = max(1, min(self.n_lists, len(train)))
+        centroids = train[rng.choice(len(train), self.n_lists, replace=False)]
+        for _ in range(iterations):
+            assign = np.argmax(train @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, train)
+            empty = np.bincount(assign, minlength=self.n_lists) == 0
+            # Re-seed empty clusters so every list stays useful
+            sums[empty] = train[rng.choice(len(train), int(empty.sum()))]
+            centroids = _unit(sums)
+        self.centroids = centroids
+
+        assign = np.concatenate([
+            np.argmax(rows[i:i + 8192] @ centroids.T, axis=1) for i in range(0, len(rows), 8192)
+        ]) if len(rows) else np.zeros(0, dtype=np.int64)
+        # Rows grouped by list: list j owns order[offsets[j]:offsets[j + 1]]
+        self.order = np.argsort(assign, kind="stable")
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=self.n_lists))))
+        self.list_rows = np.ascontiguousarray(index.matrix[self.order])
+        self.list_scales = index.scales[self.order] if index.scales is not None else None
+        self.build_seconds = time.perf_counter() - start
+
+    def _search_unit(self, query: np.ndarray, probes: np.ndarray, k: int) -> Hits:
+        candidates, scores = [], []
+        for j in probes:
+            start, end = self.offsets[j], self.offsets[j + 1]
+            block = self.list_rows[start:end]
+            list_scores = (block if block.dtype == np.float32 else block.astype(np.float32)) @ query
+            if self.list_scales is not None:
+                list_scores *= self.list_scales[start:end]
+            candidates.append(self.order[start:end])
+            scores.append(list_scores)
+        candidates = np.concatenate(candidates)
+        if candidates.size == 0:
+            return []
+        # Ascending rows keep exact search's tie order
+        by_row = np.argsort(candidates)
+        candidates, scores = candidates[by_row], np.concatenate(scores)[by_row]
+        return [(int(candidates[i]), score) for i, score in top_k_of(scores, k)]
+
+    def _search_rows(self, queries: np.ndarray, k: int) -> List[Hits]:
+        n_probe = min(self.n_probe, self.n_lists)
+        centroid_scores = queries @ self.centroids.T
+        probes = np.argpartition(-centroid_scores, n_probe - 1, axis=1)[:, :n_probe]
+        return [
+            self._search_unit(query, probe, k) if np.any(query) else []
+            for query, probe in zip(queries, probes)
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "rows": len(self.index),
+            "n_lists": self.n_lists,
+            "n_probe": self.n_probe,
+            "build_seconds": round(self.build_seconds, 3),
+            "recall": self.recall
+        }
+
+
+class HNSWBackend(ApproximateBackend):
+    """Hierarchical navigable small-world graph from hnswlib; raise ef for recall, lower it for latency."""
+
+    name = "hnsw"
+
+    def __init__(self, index: FAQIndex, row_starts: Optional[np.ndarray] = None,
+                 m: int = 16, ef_construction: int = 200, ef: int = 64):
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError("FAQ_INDEX_BACKEND=hnsw needs hnswlib: pip install hnswlib") from e
+
+        start = time.perf_counter()
+        self._init_grouping(index, row_starts)
+        self.ef = ef
+        self.graph = hnswlib.Index(space="ip", dim=index.dim)
+        self.graph.init_index(max_elements=max(1, len(index)), ef_construction=ef_construction, M=m, random_seed=0)
+        if len(index):
+            self.graph.add_items(index.rows(), np.arange(len(index)))
+        self.graph.set_ef(ef)
+        self.build_seconds = time.perf_counter() - start
+
+    def _search_rows(self, queries: np.ndarray, k: int) -> List[Hits]:
+        k = min(k, len(self.index))
+        if k <= 0:
+            return [[] for _ in queries]
+        self.graph.set_ef(max(self.ef, k))
+        labels, distances = self.graph.knn_query(queries, k=k)
+        # Inner-product space reports 1 - similarity
+        return [
+            [(int(row), float(1.0 - dist)) for row, dist in zip(label_row, dist_row)] if np.any(query) else []
+            for query, label_row, dist_row in zip(queries, labels, distances)
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "rows": len(self.index),
+            "ef": self.ef,
+            "build_seconds": round(self.build_seconds, 3),
+            "recall": self.recall
+        }
+
+
+BACKENDS = {backend.name: backend for backend in (ExactBackend, IVFBackend, HNSWBackend)}
+
+
+def sample_queries(index: FAQIndex, n: int = 200, noise: float = 0.6, seed: int = 1) -> np.ndarray:
+    """
+    Stand-in queries for recall checks: indexed rows plus Gaussian noise.
+
+    With noise 0.6 a query's cosine to its source row is about 0.85, near
+    a typical paraphrase; pass real query vectors when you have them.
+    """
+    rng = np.random.default_rng(seed)
+    rows = index.rows(np.sort(rng.choice(len(index), min(n, len(index)), replace=False)))
+    return _unit(rows + rng.standard_normal(rows.shape).astype(np.float32) * noise / np.sqrt(index.dim))
+
+
+def check_recall(backend, queries: np.ndarray, k: int = 5) -> dict:
+    """
+    Recall@k and latency of `backend` against exact search on the same index.
+
+    Recall@1 is the share of queries whose best match is unchanged, which
+    is what match_faq answers with.
+    """
+    exact = ExactBackend(backend.index, backend.row_starts)
+    start = time.perf_counter()
+    truth = [exact.search(query, k) for query in queries]
+    exact_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = [backend.search(query, k) for query in queries]
+    backend_seconds = time.perf_counter() - start
+
+    top1 = sum(1 for t, f in zip(truth, found) if t and f and t[0][0] == f[0][0])
+    overlap = sum(len({row for row, _ in t} & {row for row, _ in f}) for t, f in zip(truth, found))
+    expected = sum(len(t) for t in truth)
+    return {
+        "queries": len(queries),
+        "k": k,
+        "recall_at_1": round(top1 / max(1, sum(1 for t in truth if t)), 4),
+        "recall_at_k": round(overlap / max(1, expected), 4),
+        "ms_per_query": round(backend_seconds * 1000 / max(1, len(queries)), 3),
+        "exact_ms_per_query": round(exact_seconds * 1000 / max(1, len(queries)), 3)
+    }
+
+
+def backend_params_from_env() -> Dict[str, dict]:
+    """Tuning knobs for the approximate backends, from FAQ_IVF_* / FAQ_HNSW_*."""
+    return {
+        "ivf": {"n_lists": int(os.getenv("FAQ_IVF_LISTS", "0")) or None,
+                "n_probe": int(os.getenv("FAQ_IVF_PROBE", "8"))},
+        "hnsw": {"m": int(os.getenv("FAQ_HNSW_M", "16")),
+                 "ef_construction": int(os.getenv("FAQ_HNSW_EF_CONSTRUCTION", "200")),
+                 "ef": int(os.getenv("FAQ_HNSW_EF", "64"))},
+    }
+
+
+def build_backend(index: FAQIndex, row_starts: Optional[np.ndarray] = None, name: str = "exact",
+                  min_rows: int = 0, params: Optional[dict] = None, recall_queries: int = 200):
+    """
+    Build the named backend over `index`, pooling rows per entry by `row_starts`.
+
+    Indexes smaller than min_rows always get the exact backend, since a
+    full scan of a few thousand rows is already sub-millisecond.
+    Approximate backends run a recall check against exact search and
+    log a warning when top-1 recall drops below 0.95.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown index backend {name!r}; expected one of {', '.join(BACKENDS)}")
+    if name == ExactBackend.name or len(index) < max(1, min_rows):
+        return ExactBackend(index, row_starts)
+
+    backend = BACKENDS[name](index, row_starts, **(params or {}))
+    if recall_queries > 0:
+        backend.recall = check_recall(backend, sample_queries(index, recall_queries))
+        level = logging.WARNING if backend.recall["recall_at_1"] < 0.95 else logging.INFO
+        logger.log(level, f"{name} index over {len(index)} FAQs: {backend.recall}")
+    return backend
+
+
+def _synthetic_index(rows: int, dim: int, seed: int = 0) -> FAQIndex:
+    """Clustered random vectors, roughly like paraphrase groups of FAQ questions."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, rows // 20), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), rows)] + 0.5 * rng.standard_normal((rows, dim)).astype(np.float32)
+    return FAQIndex(vectors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["check"])
+    parser.add_argument("--backend", default="ivf", choices=[name for name in BACKENDS if name != "exact"])
+    parser.add_argument("--synthetic", type=int, help="Check a synthetic index of this many rows instead of faq.json")
+    parser.add_argument("--dim", type=int, default=384, help="Vector size for --synthetic")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--lists", type=int, help="IVF: number of lists")
+    parser.add_argument("--probe", type=int, nargs="+", default=[8], help="IVF: lists scanned per query")
+    parser.add_argument("--ef", type=int, nargs="+", default=[64], help="HNSW: search beam width")
+    args = parser.parse_args()
+
+    row_starts = None
+    if args.synthetic:
+        index = _synthetic_index(args.synthetic, args.dim)
+    else:
+        import nlp
+
+        nlp.load_faqs()
+        index, row_starts = nlp.store.snapshot.index, nlp.store.snapshot.row_starts
+        if index is None:
+            raise SystemExit("FAQ index could not be loaded")
+
+    queries = sample_queries(index, args.queries)
+    print(f"{len(index)} rows x {index.dim}, {len(queries)} queries, k={args.k}")
+    print(f"{'setting':<12} {'recall@1':>9} {'recall@k':>9} {'ms/query':>9} {'exact ms':>9}")
+
+    if args.backend == "ivf":
+        backend = IVFBackend(index, row_starts, n_lists=args.lists)
+        print(f"built {backend.n_lists} lists in {backend.build_seconds:.2f}s")
+        settings = [("probe", probe) for probe in args.probe]
+    else:
+        backend = HNSWBackend(index, row_starts)
+        print(f"built graph in {backend.build_seconds:.2f}s")
+        settings = [("ef", ef) for ef in args.ef]
+
+    for knob, value in settings:
+        setattr(backend, "n_probe" if knob == "probe" else "ef", value)
+        result = check_recall(backend, queries, args.k)
+        print(f"{knob}={value:<{12 - len(knob) - 1}} {result['recall_at_1']:>9.4f} {result['recall_at_k']:>9.4f} "
+              f"{result['ms_per_query']:>9.3f} {result['exact_ms_per_query']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# backend/inference_server.py
+"""
+Local inference server: one process owns the Whisper model and serves
+every HTTP worker over a Unix socket.
+
+    python inference_server.py --socket /run/mindmend/whisper.sock
+    INFERENCE_SOCKET=/run/mindmend/whisper.sock gunicorn -c gunicorn_conf.py main:app
+
+Workers send decoded 16 kHz float32 audio and get the transcript back, so
+the model is loaded once however many workers run. Requests from all
+workers share one TranscriptionScheduler, so they are micro-batched
+together.
+
+Frames are a "!II" header (JSON length, payload length), the JSON
+header, then the raw payload. Replies carry JSON only.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+from typing import Optional, Tuple
+
+import numpy as np
+
+from stage_pool import StageSaturated
+from transcription_scheduler import Transcription, scheduler_from_env
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_SOCKET = os.getenv("INFERENCE_SOCKET", "")
+
+_FRAME = struct.Struct("!II")
+
+
+def _encode_frame(header: dict, payload: bytes = b"") -> bytes:
+    body = json.dumps(header).encode("utf-8")
+    return _FRAME.pack(len(body), len(payload)) + body + payload
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("inference server closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+class InferenceClient:
+    """
+    Blocking client used by the HTTP workers (on their STT stage threads).
+
+    One short-lived connection per request: connecting to a Unix socket
+    costs microseconds, and no connection state is shared between threads.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 120.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.requests = 0
+        self.errors = 0
+
+    def _request(self, header: dict, payload: bytes = b"") -> dict:
+        self.requests += 1
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+                sock.sendall(_encode_frame(header, payload))
+                header_size, _ = _FRAME.unpack(_recv_exactly(sock, _FRAME.size))
+                reply = json.loads(_recv_exactly(sock, header_size))
+        except OSError:
+            self.errors += 1
+            raise
+
+        if "error" in reply:
+            self.errors += 1
+            if reply.get("saturated"):
+                raise StageSaturated("whisper", reply.get("retry_after", 1))
+            raise RuntimeError(f"inference server: {reply['error']}")
+        return reply
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None) -> Transcription:
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        reply = self._request({"op": "transcribe", "language": language}, audio.tobytes())
+        return reply["text"], reply["language"], reply["language_probability"]
+
+    def server_stats(self) -> dict:
+        return self._request({"op": "stats"})
+
+    def stats(self) -> dict:
+        return {"socket": self.socket_path, "requests": self.requests, "errors": self.errors}
+
+
+class InferenceServer:
+    def __init__(self, model, socket_path: str):
+        self.model = model
+        self.socket_path = socket_path
+        self.scheduler = scheduler_from_env(lambda: model)
+        self.connections = 0
+
+    async def _read_frame(self, reader: asyncio.StreamReader) -> Tuple[dict, bytes]:
+        header_size, payload_size = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+        header = json.loads(await reader.readexactly(header_size))
+        payload = await reader.readexactly(payload_size) if payload_size else b""
+        return header, payload
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            header, payload = await self._read_frame(reader)
+            try:
+                if header.get("op") == "transcribe":
+                    audio = np.frombuffer(payload, dtype=np.float32)
+                    text, language, probability = await self.scheduler.transcribe(audio, header.get("language"))
+                    reply = {"text": text, "language": language, "language_probability": probability}
+                elif header.get("op") == "stats":
+                    reply = {"connections": self.connections, "scheduler": self.scheduler.stats()}
+                else:
+                    reply = {"error": f"unknown op {header.get('op')!r}"}
+            except StageSaturated as e:
+                reply = {"error": str(e), "saturated": True, "retry_after": e.retry_after}
+            except Exception as e:
+                logger.exception("inference request failed")
+                reply = {"error": str(e)}
+            writer.write(_encode_frame(reply))
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # client went away
+        finally:
+            writer.close()
+
+    async def serve(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        # Only processes of the same user (or group) may connect
+        os.chmod(self.socket_path, 0o660)
+        logger.info(f"Inference server listening on {self.socket_path}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=INFERENCE_SOCKET or "/tmp/mindmend-inference.sock")
+    parser.add_argument("--model", default=os.getenv("WHISPER_MODEL", "small"))
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-type", default="int8")
+    args = parser.parse_args()
+
+    from faster_whisper import WhisperModel
+
+    from log_config import setup_logging
+
+    setup_logging()
+    # Load before listening, so workers never wait on a cold model
+    model = WhisperModel(args.model, device=args.device, compute_type=args.compute_type)
+    try:
+        asyncio.run(InferenceServer(model, args.socket).serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# backend/language_detect.py
+import logging
+import os
+from typing import Tuple
+
+import numpy as np
+from langdetect import detect_langs, DetectorFactory
+
+from answer_cache import AnswerCache, normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Make langdetect deterministic
+DetectorFactory.seed = 0
+
+# [start, end) code point ranges and the language their script identifies.
+# Only scripts that (for our users) map to a single language are listed;
+# Latin text and anything unlisted goes to langdetect.
+LATIN = "latin"
+_SCRIPT_RANGES = [
+    (0x0041, 0x005B, LATIN), (0x0061, 0x007B, LATIN), (0x00C0, 0x0250, LATIN),
+    (0x0900, 0x0980, "hi"),  # Devanagari
+    (0x0980, 0x0A00, "bn"),  # Bengali
+    (0x0A00, 0x0A80, "pa"),  # Gurmukhi
+    (0x0A80, 0x0B00, "gu"),  # Gujarati
+    (0x0B00, 0x0B80, "or"),  # Odia
+    (0x0B80, 0x0C00, "ta"),  # Tamil
+    (0x0C00, 0x0C80, "te"),  # Telugu
+    (0x0C80, 0x0D00, "kn"),  # Kannada
+    (0x0D00, 0x0D80, "ml"),  # Malayalam
+]
+
+_LABELS = sorted({label for _, _, label in _SCRIPT_RANGES})
+_EDGES = []
+_EDGE_LABELS = []  # label index of [_EDGES[i], _EDGES[i + 1]), -1 for unlisted code points
+for start, end, label in _SCRIPT_RANGES:
+    if _EDGES and _EDGES[-1] == start:
+        _EDGE_LABELS[-1] = _LABELS.index(label)
+    else:
+        _EDGES.append(start)
+        _EDGE_LABELS.append(_LABELS.index(label))
+    _EDGES.append(end)
+    _EDGE_LABELS.append(-1)
+_EDGES = np.array(_EDGES, dtype=np.uint32)
+_EDGE_LABELS = np.array(_EDGE_LABELS, dtype=np.int64)
+
+
+def script_histogram(text: str) -> np.ndarray:
+    """Letter count per entry of _LABELS, from one vectorized pass over the code points."""
+    code_points = np.frombuffer(text.encode("utf-32-le"), dtype="<u4")
+    slots = np.searchsorted(_EDGES, code_points, side="right") - 1
+    labels = _EDGE_LABELS[np.clip(slots, 0, len(_EDGE_LABELS) - 1)]
+    labels = labels[(slots >= 0) & (labels >= 0)]
+    return np.bincount(labels, minlength=len(_LABELS))
+
+
+class LanguageDetector:
+    """
+    Layered language detection, memoized per normalized text.
+
+    1. A Unicode-script histogram settles text written mostly in a
+       script that identifies its language (Tamil, Devanagari, ...).
+    2. Only Latin or mixed text (English, French, Tanglish) falls
+       through to langdetect, which is far more expensive.
+    """
+
+    def __init__(self, cache_size: int = 4096, min_script_share: float = 0.5):
+        """
+        Args:
+            cache_size: Memoized results to keep (0 disables memoization)
+            min_script_share: Share of letters a non-Latin script needs to decide on its own
+        """
+        # Detection is a pure function of the text, so entries never expire
+        self.cache = AnswerCache(max_size=cache_size, ttl_seconds=float("inf"))
+        self.min_script_share = min_script_share
+        self.script_hits = 0
+        self.langdetect_calls = 0
+        self.no_letters = 0
+
+    def detect(self, text: str) -> Tuple[str, float]:
+        key = normalize_text(text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        # Case and punctuation help langdetect on short inputs, so it sees the
+        # original text; variants that normalize alike share the first result
+        result = self._detect(text)
+        self.cache.put(key, result)
+        return result
+
+    def _detect(self, text: str) -> Tuple[str, float]:
+        counts = script_histogram(text)
+        letters = int(counts.sum())
+        if letters == 0:
+            # Digits, punctuation or emoji only; langdetect would just raise
+            self.no_letters += 1
+            return "unknown", 0.0
+
+        dominant = int(np.argmax(counts))
+        share = counts[dominant] / letters
+        if _LABELS[dominant] != LATIN and share >= self.min_script_share:
+            self.script_hits += 1
+            return _LABELS[dominant], float(share)
+
+        self.langdetect_calls += 1
+        try:
+            results = detect_langs(text)
+            if results:
+                return results[0].lang, results[0].prob
+            return "unknown", 0.0
+        except Exception as e:
+            logger.warning(f"Language detection failed: {e}")
+            return "unknown", 0.0
+
+    def stats(self) -> dict:
+        """How often each layer answered; langdetect_rate is the share of calls on the expensive path."""
+        calls = self.cache.hits + self.cache.misses
+        return {
+            "calls": calls,
+            "memo_hits": self.cache.hits,
+            "script_hits": self.script_hits,
+            "langdetect_calls": self.langdetect_calls,
+            "no_letters": self.no_letters,
+            "langdetect_rate": round(self.langdetect_calls / calls, 4) if calls else 0.0,
+            "memo_size": len(self.cache)
+        }
+
+
+language_detector = LanguageDetector(
+    cache_size=int(os.getenv("LANG_DETECT_CACHE_SIZE", "4096"))
+)
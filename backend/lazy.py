@@ -0,0 +1,104 @@
+# backend/lazy.py
+import logging
+import threading
+import time
+from typing import Callable, Dict, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Every lazily loaded component, by name, for readiness and startup reporting
+RESOURCES: Dict[str, "LazyResource"] = {}
+
+
+class LazyResource(Generic[T]):
+    """
+    Thread-safe, load-on-first-use wrapper around a heavy component.
+
+    The factory runs at most once; concurrent callers block until it
+    finishes. A failed load is retried on the next call.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._value: Optional[T] = None
+        self._loaded = False
+        self.load_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        RESOURCES[name] = self
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> T:
+        """Return the component, loading it first if needed."""
+        if self._loaded:
+            return self._value
+
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                try:
+                    self._value = self._factory()
+                except Exception as e:
+                    self.error = str(e)
+                    logger.error(f"Failed to load {self.name}: {e}")
+                    raise
+                self.load_seconds = time.perf_counter() - start
+                self.error = None
+                self._loaded = True
+                logger.info(f"Loaded {self.name} in {self.load_seconds:.2f}s")
+
+        return self._value
+
+    def override(self, value: T):
+        """Use value instead of running the factory (benchmarks, offline runs)."""
+        with self._lock:
+            self._value = value
+            self._loaded = True
+            self.load_seconds = 0.0
+            self.error = None
+
+    def status(self) -> dict:
+        """Load state and timing for readiness reporting."""
+        return {
+            "loaded": self._loaded,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "error": self.error
+        }
+
+
+def warm_up(names, background: bool = True) -> Optional[threading.Thread]:
+    """
+    Load the named components, optionally on a daemon thread.
+
+    Args:
+        names: Names of registered resources to load, in order
+        background: Load on a background thread instead of blocking
+
+    Returns:
+        The warm-up thread when running in the background
+    """
+    def _run():
+        for name in names:
+            resource = RESOURCES.get(name)
+            if resource is None:
+                logger.warning(f"Unknown warm-up component: {name}")
+                continue
+            try:
+                resource.get()
+            except Exception:
+                # Already logged; the next request retries the load
+                pass
+
+    if not background:
+        _run()
+        return None
+
+    thread = threading.Thread(target=_run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,178 @@
+# backend/log_config.py
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_sampled_var: ContextVar[bool] = ContextVar("log_sampled", default=False)
+# perf_counter() when the request arrived, before its body was read
+request_started_var: ContextVar[Optional[float]] = ContextVar("request_started", default=None)
+
+# Share of requests whose logs carry full texts (questions, transcripts, answers)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+
+_listener: Optional[QueueListener] = None
+
+
+def fields(**values) -> dict:
+    """`extra=` payload for structured fields: logger.info("ask", extra=fields(score=0.8))."""
+    return {"fields": values}
+
+
+def sampled(**values) -> dict:
+    """The given fields if this request was picked for detailed logging, else nothing."""
+    return values if _sampled_var.get() else {}
+
+
+def begin_request(request_id: Optional[str] = None) -> str:
+    """Tag everything logged in the current context with a request id, and decide sampling once."""
+    request_id = request_id or uuid.uuid4().hex[:16]
+    request_id_var.set(request_id)
+    request_started_var.set(time.perf_counter())
+    _sampled_var.set(random.random() < LOG_SAMPLE_RATE)
+    return request_id
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, request_id, then any structured fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable variant for local development (LOG_FORMAT=text)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"{self.formatTime(record)} {record.levelname:<7} {record.name}"
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            line += f" [{request_id}]"
+        line += f" {record.getMessage()}"
+        extra = getattr(record, "fields", None)
+        if extra:
+            line += " " + " ".join(f"{key}={value!r}" for key, value in extra.items())
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class _EnqueueHandler(QueueHandler):
+    """
+    Hot-path half of the pipeline: capture the request id and enqueue.
+
+    Messages are not formatted here; the listener thread does that. Only
+    tracebacks are rendered eagerly, since they reference live frames.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = request_id_var.get()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None):
+    """
+    Route every logger through a queue to one background writer on stdout.
+
+    Safe to call more than once; only the first call installs handlers.
+
+    Args:
+        level: Root level (LOG_LEVEL, default INFO)
+        fmt: "json" (default) or "text" (LOG_FORMAT)
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+    fmt = fmt or os.getenv("LOG_FORMAT", "json")
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(TextFormatter() if fmt == "text" else JsonFormatter())
+
+    log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers[:] = [_EnqueueHandler(log_queue)]
+    root.setLevel(level.upper())
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+    # Flush what is queued when the process exits
+    atexit.register(_stop_listener)
+    # The writer thread does not survive fork (gunicorn preload); start a new one in the child
+    os.register_at_fork(after_in_child=_restart_listener)
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_listener():
+    global _listener
+    _listener = QueueListener(_listener.queue, *_listener.handlers, respect_handler_level=False)
+    _listener.start()
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware: assigns each request an id (or reuses X-Request-ID),
+    echoes it in the response, and writes one access record with status
+    and duration. Plain ASGI, so streaming responses pass through untouched.
+    """
+
+    def __init__(self, app, logger_name: str = "access"):
+        self.app = app
+        self.logger = logging.getLogger(logger_name)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope.get("headers") or []).get(b"x-request-id", b"").decode("latin-1")
+        request_id = begin_request(incoming[:64] or None)
+        started = time.perf_counter()
+        status = None
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            self.logger.info("request", extra=fields(
+                method=scope.get("method", "WS"),
+                path=scope["path"],
+                status=status,
+                duration_ms=round((time.perf_counter() - started) * 1000, 2)
+            ))
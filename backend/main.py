@@ -1,9 +1,12 @@
-from fastapi import FastAPI, Request, File, UploadFile
+from fastapi import FastAPI, HTTPException, Request, File, UploadFile, WebSocket
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from datetime import datetime
 import json
+import logging
 import os
+import time
 from typing import List, Dict, Any, Optional
 import base64
 import io
@@ -11,9 +14,25 @@ import numpy as np
 import wave
 
 
-# Import voice modules
-from voice_assistant import VoiceAssistant
-from tts_handler import TTSHandler
+import nlp
+from answer_cache import answer_cache
+from audio_io import decode_audio_buffer
+from faq_store import canonical_question
+from history_store import history_store_from_env
+from inference_server import INFERENCE_SOCKET, InferenceClient
+from language_detect import language_detector
+from lazy import LazyResource, RESOURCES, warm_up
+from log_config import RequestContextMiddleware, fields, sampled, setup_logging
+from metrics import CONTENT_TYPE, family, render, stage, stage_breakdown, traced
+from stage_pool import STAGES, StageSaturated, stage_stats
+from transcription_scheduler import scheduler_from_env, transcribe_single
+from tts_stream import SynthesisFailed, stream_speech, stream_stats
+from voice_stream import VoiceStreamSession
+
+
+# JSON logs through a queue to a background writer; requests only enqueue
+setup_logging()
+logger = logging.getLogger("mindmend")
 
 
 app = FastAPI()
@@ -26,11 +45,99 @@ app.add_middleware(
    allow_methods=["*"],
    allow_headers=["*"],
 )
+app.add_middleware(RequestContextMiddleware)
+
+
+# Voice components load on first use so importing the app stays fast
+# and the text-only /ask path never pays for Whisper
+def _load_voice_assistant():
+   from voice_assistant import VoiceAssistant
+   return VoiceAssistant()
+
+
+def _load_tts_handler():
+   from tts_cache import tts_cache_from_env
+   from tts_handler import TTSHandler
+   return TTSHandler(engine=TTS_ENGINE, cache=tts_cache_from_env())
+
+
+# "gtts" (online) or "pyttsx3" (offline, on a pool of worker processes; see tts_pool)
+TTS_ENGINE = os.getenv("TTS_ENGINE", "gtts")
+
+
+voice_assistant = LazyResource("whisper", _load_voice_assistant)
+tts_handler = LazyResource("tts", _load_tts_handler)
+
+
+# Group concurrent uploads into one Whisper batch (WHISPER_BATCHING=0 disables)
+WHISPER_BATCHING = os.getenv("WHISPER_BATCHING", "1") != "0"
+whisper_scheduler = scheduler_from_env(lambda: voice_assistant.get().model)
+
+
+# With INFERENCE_SOCKET set, Whisper lives in one inference_server.py process
+# shared by every worker, and is never loaded here
+inference_client = InferenceClient(INFERENCE_SOCKET) if INFERENCE_SOCKET else None
+
+
+# Comma-separated components to load in the background at startup,
+# e.g. "spacy,encoder,faq_index,whisper,tts". /ready waits for these.
+WARMUP_COMPONENTS = [name.strip() for name in os.getenv("MINDMEND_WARMUP", "").split(",") if name.strip()]
+
+
+
+
+# Seconds between checks of faq.json for edits; 0 disables watching
+FAQ_WATCH_INTERVAL = float(os.getenv("FAQ_WATCH_INTERVAL", "0"))
+
+
+
+
+# Chat history: append-only JSONL segments, group-committed by a writer
+# thread so no request waits on disk. See history_store.HistoryStore.
+history = history_store_from_env()
+HISTORY_FILE = history.directory
+chat_sessions = history.sessions
+
+
+
+
+def add_to_history(session_id: str, message: str, role: str, response: str):
+   """Record one turn; returns immediately, the write happens in the background"""
+   history.append(session_id, message, role, response)
+
+
+
+
+@app.on_event("startup")
+def start_warm_up():
+   if WARMUP_COMPONENTS:
+       warm_up(WARMUP_COMPONENTS)
+   if FAQ_WATCH_INTERVAL > 0:
+       nlp.store.watch(FAQ_WATCH_INTERVAL)
+
+
+
+
+@app.on_event("shutdown")
+def flush_history():
+   history.close()
+   if tts_handler.loaded:
+       tts_handler.get().close()
+
 
 
-# Initialize voice components
-voice_assistant = VoiceAssistant()
-tts_handler = TTSHandler(engine="gtts")
+
+def pq(question: str) -> dict:
+   """Match a question against the FAQs and shape the result for the chat endpoints"""
+   match = nlp.match_faq(question.strip())
+   faq = nlp.get_faq(match["faq_id"]) if match["faq_id"] is not None else None
+   return {
+       "original_input": question,
+       "detected_lang": match["detected_language"],
+       "matched_question": canonical_question(faq) if faq else None,
+       "answer": match["answer"],
+       "score": match["score"]
+   }
 
 
 
@@ -42,6 +149,20 @@ class Query(BaseModel):
 
 
 
+class BatchQuery(BaseModel):
+   questions: List[str]
+   top_k: int = 0
+
+
+
+
+class SpeechQuery(BaseModel):
+   text: str
+   lang: str = "en"
+
+
+
+
 class VoiceQuery(BaseModel):
    audio_base64: str
    session_id: str = "default"
@@ -57,13 +178,14 @@ class VoiceQuery(BaseModel):
 
 @app.get("/")
 def read_root(request: Request):
-   print("🔄 Page Reloaded from", request.client.host)
+   logger.debug("page load", extra=fields(client=request.client.host))
    return {"message": "Welcome to Onivah!"}
 
 
 
 
 @app.post("/ask")
+@traced("ask")
 def ask_question(query: Query, request: Request):
    user_input = query.question.strip()
    session_id = query.session_id
@@ -74,14 +196,17 @@ def ask_question(query: Query, request: Request):
    add_to_history(session_id, user_input, "user", result["answer"])
 
 
-   # ✍️ Terminal logging
-   print(f"📝 Question received from {request.client.host} [Session: {session_id}]")
-   print("\n🟣 User Question:", result["original_input"])
-   print("🌐 Detected Language:", result["detected_lang"])
-   print("🔁 Translated to English:", result.get("translated", "[no translation]"))
-   print("✅ Matched FAQ:", result["matched_question"] or "None")
-   print("💬 Bot Response:", result["answer"])
-   print("-" * 50)
+   # One structured record; full texts only for sampled requests
+   logger.info("ask", extra=fields(
+       session_id=session_id,
+       client=request.client.host,
+       detected_lang=result["detected_lang"],
+       matched_question=result["matched_question"],
+       score=result["score"],
+       encoder=nlp.FAQ_ENCODER,
+       stages_ms=stage_breakdown(),
+       **sampled(question=result["original_input"], answer=result["answer"])
+   ))
 
 
    return {"answer": result["answer"]}
@@ -89,45 +214,132 @@ def ask_question(query: Query, request: Request):
 
 
 
-@app.post("/voice/transcribe")
-async def transcribe_voice(file: UploadFile = File(...), session_id: str = "default"):
+@app.get("/history/{session_id}")
+def get_history(session_id: str, limit: int = 20):
+   """Latest turns of a session, oldest first"""
+   return {"session_id": session_id, "turns": history.recent(session_id, limit)}
+
+
+
+
+@app.post("/faq/reload", status_code=202)
+def reload_faqs():
    """
-   Transcribe voice audio file to text
-   Supports: Tamil, English, Tulu, Kannada, Telugu, Malayalam, Hindi, Tanglish, French
+   Re-read faq.json in the background, re-embedding only added or changed questions.
+   Requests keep using the current index until the new one is swapped in.
    """
-   try:
-       print(f"🎤 Received audio file: {file.filename}, type: {file.content_type}")
+   started = nlp.store.reload_async()
+   return {"started": started, **nlp.store.status()}
 
 
-       # Supported languages
-       SUPPORTED_LANGUAGES = ['ta', 'en', 'kn', 'te', 'ml', 'hi', 'fr']
 
 
-       # Read audio file
-       audio_bytes = await file.read()
+# Upper bound on questions per /ask/batch call
+MAX_BATCH_SIZE = int(os.getenv("ASK_BATCH_MAX_SIZE", "5000"))
 
 
-       # Save temporarily for processing
-       import tempfile
-       temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.webm')
-       temp_file.write(audio_bytes)
-       temp_file.close()
 
 
-       # Transcribe directly from file path (Whisper handles multiple formats)
-       # Auto-detect language from supported list
-       from faster_whisper import WhisperModel
-       model = voice_assistant.model
-       segments, info = model.transcribe(
-           temp_file.name,
-           language=None,  # Auto-detect language
-           vad_filter=True
+@app.post("/ask/batch")
+@traced("ask_batch")
+def ask_batch(query: BatchQuery):
+   """
+   Match many questions in one call, for analytics and regression replays.
+   Results are in input order and have the same shape as nlp.match_faq.
+   Nothing is added to chat history.
+   """
+   if len(query.questions) > MAX_BATCH_SIZE:
+       raise HTTPException(
+           status_code=413,
+           detail=f"At most {MAX_BATCH_SIZE} questions per batch"
        )
 
+   results = nlp.match_faqs([q.strip() for q in query.questions], top_k=query.top_k)
+   return {"results": results}
+
+
+
+
+@app.exception_handler(StageSaturated)
+def stage_saturated_handler(request: Request, exc: StageSaturated):
+   return JSONResponse(
+       status_code=503,
+       headers={"Retry-After": str(exc.retry_after)},
+       content={"success": False, "error": f"Server busy ({exc.stage}), please retry"}
+   )
+
+
+
+
+def _decode_upload(upload) -> np.ndarray:
+   """Decode an uploaded clip to 16 kHz mono float32, entirely in memory"""
+   with stage("decode"):
+       return decode_audio_buffer(upload, sampling_rate=16000)
+
+
+
+
+def _transcribe_upload(upload):
+   """Blocking STT stage: returns (text, language, language_probability)"""
+   # Auto-detect language from supported list
+   audio = _decode_upload(upload)
+   with stage("stt"):
+       return transcribe_single(voice_assistant.get().model, audio)
+
+
+
 
-       # Get detected language info
-       detected_language = info.language
-       language_probability = info.language_probability
+def _tts_lang(detected_language: str) -> str:
+   """Use detected language for TTS (Tanglish will use 'en')"""
+   return detected_language if detected_language in ['ta', 'hi', 'kn', 'te', 'ml', 'fr'] else 'en'
+
+
+
+
+async def _transcribe_audio(audio: np.ndarray):
+   """Transcribe decoded 16 kHz audio: (text, language, language_probability)"""
+   if inference_client is not None:
+       return await STAGES["stt"].run(inference_client.transcribe, audio)
+   if WHISPER_BATCHING:
+       return await whisper_scheduler.transcribe(audio)
+   return await STAGES["stt"].run(lambda: transcribe_single(voice_assistant.get().model, audio))
+
+
+
+
+def _synthesize_base64(text: str, lang: str) -> Optional[str]:
+   """Blocking TTS stage"""
+   return tts_handler.get().text_to_speech_base64(text, lang=lang)
+
+
+
+
+@app.post("/voice/transcribe")
+@traced("voice_transcribe")
+async def transcribe_voice(file: UploadFile = File(...), session_id: str = "default", include_audio: bool = True):
+   """
+   Transcribe voice audio file to text
+   Supports: Tamil, English, Tulu, Kannada, Telugu, Malayalam, Hindi, Tanglish, French
+   With include_audio=false no speech is synthesized; clients can stream the
+   answer from /voice/tts/stream with the returned tts_lang instead.
+   """
+   try:
+       # Supported languages
+       SUPPORTED_LANGUAGES = ['ta', 'en', 'kn', 'te', 'ml', 'hi', 'fr']
+
+
+       # The decoder reads the spooled upload directly; no copy, no temp file
+       upload = file.file
+
+
+       # Whisper runs off the event loop: in the shared inference server,
+       # batched with concurrent uploads by the scheduler, or directly on the STT stage
+       if WHISPER_BATCHING or inference_client is not None:
+           audio = await STAGES["stt"].run(_decode_upload, upload)
+           with stage("stt"):
+               text, detected_language, language_probability = await _transcribe_audio(audio)
+       else:
+           text, detected_language, language_probability = await STAGES["stt"].run(_transcribe_upload, upload)
 
 
        # Language name mapping
@@ -142,36 +354,20 @@ async def transcribe_voice(file: UploadFile = File(...), session_id: str = "defa
        }
 
 
-       # Combine segments
-       text = " ".join([segment.text for segment in segments]).strip()
-
-
-       # Clean up temp file
-       import os
-       os.unlink(temp_file.name)
-
-
        if text:
            lang_name = language_names.get(detected_language, detected_language.upper())
-           print(f"📝 Transcribed: {text}")
-           print(f"🌐 Detected Language: {lang_name} ({detected_language}) - Confidence: {language_probability:.2%}")
 
 
            # Check if language is supported
            if detected_language not in SUPPORTED_LANGUAGES:
-               print(f"⚠️ Warning: Detected language '{detected_language}' not in supported list")
-               print(f"✅ Supported: Tamil, English, Kannada, Telugu, Malayalam, Hindi, French, Tanglish")
-
-
-           # Process question
-           result = pq(text)
+               logger.warning("unsupported language", extra=fields(
+                   language=detected_language, supported=SUPPORTED_LANGUAGES
+               ))
 
 
-           # Add detected language info to result
-           print(f"🔁 NLP Detected Language: {result.get('detected_lang', 'unknown')}")
-           print(f"✅ Matched FAQ: {result.get('matched_question', 'None')}")
-           print(f"💬 Bot Response: {result['answer']}")
-           print("-" * 50)
+           # Process question (langdetect, encode and search are timed inside)
+           with stage("match"):
+               result = await STAGES["match"].run(pq, text)
 
 
            # Add to history
@@ -179,9 +375,25 @@ async def transcribe_voice(file: UploadFile = File(...), session_id: str = "defa
 
 
            # Generate TTS response in appropriate language
-           # Use detected language for TTS (Tanglish will use 'en')
-           tts_lang = detected_language if detected_language in ['ta', 'hi', 'kn', 'te', 'ml', 'fr'] else 'en'
-           audio_response = tts_handler.text_to_speech_base64(result["answer"], lang=tts_lang)
+           tts_lang = _tts_lang(detected_language)
+           audio_response = None
+           if include_audio:
+               audio_response = await STAGES["tts"].run(_synthesize_base64, result["answer"], tts_lang)
+
+
+           # Logged last so the stage breakdown covers TTS too
+           logger.info("voice transcribe", extra=fields(
+               session_id=session_id,
+               filename=file.filename,
+               content_type=file.content_type,
+               language=detected_language,
+               language_probability=round(language_probability, 4),
+               nlp_detected_lang=result.get("detected_lang", "unknown"),
+               matched_question=result.get("matched_question"),
+               score=result.get("score"),
+               stages_ms=stage_breakdown(),
+               **sampled(transcript=text, answer=result["answer"])
+           ))
 
 
            return {
@@ -189,6 +401,7 @@ async def transcribe_voice(file: UploadFile = File(...), session_id: str = "defa
                "transcribed_text": text,
                "answer": result["answer"],
                "audio_response": audio_response,
+               "tts_lang": tts_lang,
                "detected_language": detected_language,
                "language_name": lang_name,
                "language_probability": language_probability
@@ -200,10 +413,10 @@ async def transcribe_voice(file: UploadFile = File(...), session_id: str = "defa
            }
 
 
+   except StageSaturated:
+       raise
    except Exception as e:
-       print(f"❌ Voice transcription error: {e}")
-       import traceback
-       traceback.print_exc()
+       logger.exception("voice transcription failed", extra=fields(filename=file.filename))
        return {
            "success": False,
            "error": str(e)
@@ -213,14 +426,15 @@ async def transcribe_voice(file: UploadFile = File(...), session_id: str = "defa
 
 
 @app.post("/voice/tts")
-def text_to_speech(query: Query):
+@traced("voice_tts")
+async def text_to_speech(query: Query):
    """
    Convert text to speech
    Returns base64 encoded audio
    """
    try:
        text = query.question
-       audio_b64 = tts_handler.text_to_speech_base64(text)
+       audio_b64 = await STAGES["tts"].run(_synthesize_base64, text, "en")
 
 
        if audio_b64:
@@ -235,22 +449,222 @@ def text_to_speech(query: Query):
            }
 
 
+   except StageSaturated:
+       raise
    except Exception as e:
-       print(f"❌ TTS error: {e}")
+       logger.exception("tts failed")
        return {
            "success": False,
            "error": str(e)
        }
 
 
+def _synthesize_bytes(text: str, lang: str) -> Optional[bytes]:
+   """Blocking TTS stage, raw audio"""
+   return tts_handler.get().text_to_speech_bytes(text, lang=lang)
+
+
+
+
+async def _open_speech(text: str, lang: str, started: Optional[float] = None):
+   """Start streaming speech for text; returns (audio chunk iterator, media type)"""
+   handler = tts_handler.get() if tts_handler.loaded else await STAGES["tts"].run(tts_handler.get)
+   whole_clip_cached = handler.cache is not None and handler.cache.contains(handler.cache_key(text, lang))
+   chunks = stream_speech(text, lang, _synthesize_bytes, STAGES["tts"],
+                          whole_clip_cached=whole_clip_cached, started=started,
+                          wav=handler.engine_type != "gtts")
+   media_type = "audio/mpeg" if handler.engine_type == "gtts" else "audio/wav"
+   return chunks, media_type
+
+
+
+
+async def _speech_response(text: str, lang: str) -> StreamingResponse:
+   chunks, media_type = await _open_speech(text, lang, started=time.perf_counter())
+
+   # Produce the first chunk before answering, so saturation or a synthesis
+   # failure is still reported with a proper status code
+   try:
+       first = await chunks.__anext__()
+   except (StopAsyncIteration, SynthesisFailed) as e:
+       await chunks.aclose()
+       error = str(e) if isinstance(e, SynthesisFailed) else "TTS generation failed"
+       return JSONResponse(status_code=502, content={"success": False, "error": error})
+
+   async def body():
+       yield first
+       try:
+           async for chunk in chunks:
+               yield chunk
+       except SynthesisFailed as e:
+           # Status and headers are already sent: aborting the response is
+           # what tells the client the audio is incomplete
+           logger.error("speech stream aborted", extra=fields(error=str(e)))
+           raise
+
+   return StreamingResponse(body(), media_type=media_type)
+
+
+
+
+@app.post("/voice/tts/stream")
+async def text_to_speech_stream(query: SpeechQuery):
+   """
+   Stream speech as raw audio, sentence by sentence, while later sentences
+   are still being synthesized. No base64, no JSON envelope.
+   """
+   return await _speech_response(query.text, query.lang)
+
+
+
+
+@app.get("/voice/tts/stream")
+async def text_to_speech_stream_get(text: str, lang: str = "en"):
+   """Same as POST /voice/tts/stream, usable directly as an <audio> src"""
+   return await _speech_response(text, lang)
+
+
+
+
+async def _answer_utterance(text: str, detected_language: str, session_id: str) -> dict:
+   result = await STAGES["match"].run(pq, text)
+   add_to_history(session_id, text, "user", result["answer"])
+   return {**result, "tts_lang": _tts_lang(detected_language)}
+
+
+
+
+@app.websocket("/voice/stream")
+async def voice_stream(websocket: WebSocket, session_id: str = "default"):
+   """
+   Real-time voice conversation: the client streams PCM or Opus frames,
+   utterances are cut by VAD as they end, and each one gets its transcript,
+   answer and spoken reply on the same socket. See VoiceStreamSession for
+   the message protocol.
+   """
+   await websocket.accept()
+   session = VoiceStreamSession(
+       websocket,
+       transcribe=_transcribe_audio,
+       answer=_answer_utterance,
+       speak=_open_speech,
+       session_id=session_id,
+       partial_interval_ms=int(os.getenv("VOICE_STREAM_PARTIAL_MS", "1000"))
+   )
+   await session.run()
+
+
+
+
 # Health check endpoint
 @app.get("/health")
 def health_check():
-   """Health check endpoint"""
+   """Liveness check: answers as soon as the process is up, without loading any model"""
    return {
        "status": "healthy",
        "timestamp": datetime.now().isoformat(),
        "history_file_exists": os.path.exists(HISTORY_FILE),
        "total_sessions": len(chat_sessions),
-       "voice_enabled": True
-   }
\ No newline at end of file
+       "voice_enabled": True,
+       "history": history.stats(),
+       "answer_cache": answer_cache.stats(),
+       "language_detection": language_detector.stats(),
+       "stages": stage_stats(),
+       "whisper_batching": whisper_scheduler.stats() if WHISPER_BATCHING and inference_client is None else None,
+       "inference_server": inference_client.stats() if inference_client is not None else None,
+       "tts_cache": tts_handler.get().cache.stats() if tts_handler.loaded and tts_handler.get().cache else None,
+       "tts_stream": stream_stats(),
+       "tts_pool": tts_handler.get().pool.stats() if tts_handler.loaded and tts_handler.get().pool else None
+   }
+
+
+
+
+@app.get("/ready")
+def readiness_check():
+   """
+   Readiness check: 200 once every warm-up component has loaded, 503 before.
+   Reports per-component load times to track cold-start regressions.
+   """
+   components = {name: resource.status() for name, resource in RESOURCES.items()}
+   ready = all(RESOURCES[name].loaded for name in WARMUP_COMPONENTS if name in RESOURCES)
+   return JSONResponse(
+       status_code=200 if ready else 503,
+       content={
+           "status": "ready" if ready else "starting",
+           "warmup": WARMUP_COMPONENTS,
+           "components": components
+       }
+   )
+
+
+
+
+def _collect_metrics() -> list:
+   """Gauges and counters from the components' own stats, as metric families"""
+   stages = stage_stats()
+   families = [
+       family("mindmend_stage_workers", "gauge", "Worker threads per stage pool",
+              [({"pool": name}, s["workers"]) for name, s in stages.items()]),
+       family("mindmend_stage_running", "gauge", "Jobs running per stage pool",
+              [({"pool": name}, s["running"]) for name, s in stages.items()]),
+       family("mindmend_stage_queued", "gauge", "Jobs waiting for a worker per stage pool",
+              [({"pool": name}, s["queued"]) for name, s in stages.items()]),
+       family("mindmend_stage_completed_total", "counter", "Jobs finished per stage pool",
+              [({"pool": name}, s["completed"]) for name, s in stages.items()]),
+       family("mindmend_stage_rejected_total", "counter", "Jobs shed with 503 per stage pool",
+              [({"pool": name}, s["rejected"]) for name, s in stages.items()]),
+   ]
+
+   # Hits and misses per cache; hit rate = rate(hits) / (rate(hits) + rate(misses))
+   answers = answer_cache.stats()
+   languages = language_detector.stats()
+   caches = [("answer", answers["hits"], answers["misses"], answers["size"]),
+             ("language", languages["memo_hits"], languages["calls"] - languages["memo_hits"], languages["memo_size"])]
+   if tts_handler.loaded and tts_handler.get().cache:
+       clips = tts_handler.get().cache.stats()
+       caches.append(("tts", clips["memory_hits"] + clips["disk_hits"], clips["misses"], clips["memory_entries"]))
+   families += [
+       family("mindmend_cache_hits_total", "counter", "Cache lookups answered from the cache",
+              [({"cache": name}, hits) for name, hits, _, _ in caches]),
+       family("mindmend_cache_misses_total", "counter", "Cache lookups that had to compute",
+              [({"cache": name}, misses) for name, _, misses, _ in caches]),
+       family("mindmend_cache_entries", "gauge", "Entries held in memory per cache",
+              [({"cache": name}, size) for name, _, _, size in caches]),
+       family("mindmend_langdetect_calls_total", "counter", "Detections that fell through to langdetect",
+              [({}, languages["langdetect_calls"])]),
+   ]
+
+   families += [
+       family("mindmend_component_loaded", "gauge", "Whether a lazily loaded component is ready",
+              [({"component": name}, r.loaded) for name, r in RESOURCES.items()]),
+       family("mindmend_component_load_seconds", "gauge", "Time the component took to load",
+              [({"component": name}, r.load_seconds) for name, r in RESOURCES.items() if r.load_seconds is not None]),
+   ]
+
+   if WHISPER_BATCHING and inference_client is None:
+       batching = whisper_scheduler.stats()
+       families += [
+           family("mindmend_whisper_pending", "gauge", "Uploads waiting for a Whisper batch",
+                  [({}, batching["pending"])]),
+           family("mindmend_whisper_batches_total", "counter", "Whisper batches decoded", [({}, batching["batches"])]),
+           family("mindmend_whisper_items_total", "counter", "Uploads transcribed in batches", [({}, batching["items"])]),
+       ]
+
+   records = history.stats()
+   families += [
+       family("mindmend_history_queued", "gauge", "History records waiting for the writer", [({}, records["queued"])]),
+       family("mindmend_history_sessions", "gauge", "Chat sessions held in memory",
+              [({}, records["sessions_in_memory"])]),
+       family("mindmend_history_written_total", "counter", "History records written to disk",
+              [({}, records["written"])]),
+   ]
+   return families
+
+
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+   """Prometheus scrape target: per-stage latency histograms, queue depths, cache and model stats"""
+   return PlainTextResponse(render(_collect_metrics()), media_type=CONTENT_TYPE)
@@ -0,0 +1,369 @@
+# backend/metrics.py
+"""
+Prometheus-format metrics and per-request stage tracing.
+
+Stage timings are recorded with `with stage("stt"): ...` anywhere on a
+request's path, including stage-pool threads (they run in a copy of the
+request's context). Outside a traced request, or with METRICS_ENABLED=0,
+stage() is one ContextVar lookup returning a shared no-op.
+
+With several worker processes (gunicorn_conf.py), each worker's state is
+shared through a directory and any worker's /metrics reports all of them;
+see MultiprocessMetrics.
+"""
+import asyncio
+import atexit
+import bisect
+import functools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from log_config import request_started_var
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+# How often each worker of a multi-process server publishes its state
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+# Seconds; spans a cached langdetect lookup to a long Whisper call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, object]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value) -> str:
+    if value is None:
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# {"worker": ...} once this process is one of several workers
+_process_labels: Dict[str, str] = {}
+
+
+def family(name: str, kind: str, documentation: str, samples: Iterable[Tuple[Dict[str, object], object]]) -> List[str]:
+    """One metric family in text exposition format; samples are (labels, value) pairs."""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_format_labels({**labels, **_process_labels})} {_format_value(value)}"
+                 for labels, value in samples)
+    return lines
+
+
+class Histogram:
+    """Labelled histogram, rendered with cumulative buckets."""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # label values -> [count per bucket..., count above the last bucket], sum
+        self._counts: Dict[tuple, List[int]] = {}
+        self._sums: Dict[tuple, float] = {}
+
+    def observe(self, label_values: tuple, seconds: float):
+        slot = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            counts = self._counts.get(label_values)
+            if counts is None:
+                counts = self._counts[label_values] = [0] * (len(self.buckets) + 1)
+                self._sums[label_values] = 0.0
+            counts[slot] += 1
+            self._sums[label_values] += seconds
+
+    def state(self) -> list:
+        """JSON-serializable [label values, bucket counts, sum] per series."""
+        with self._lock:
+            return [[list(key), list(counts), self._sums[key]] for key, counts in self._counts.items()]
+
+    def render(self, states: Optional[Iterable[list]] = None) -> List[str]:
+        """Exposition lines for this process, or for the sum of several processes' state()."""
+        series: Dict[tuple, Tuple[List[int], float]] = {}
+        for state in ([self.state()] if states is None else states):
+            for label_values, counts, total in state:
+                key = tuple(label_values)
+                merged = series.get(key)
+                if merged is None:
+                    series[key] = (list(counts), total)
+                else:
+                    series[key] = ([a + b for a, b in zip(merged[0], counts)], merged[1] + total)
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total) in sorted(series.items()):
+            named = dict(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels({**named, "le": _format_value(float(bound))})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(named)
+            lines.append(f"{self.name}_sum{labels} {total!r}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+stage_seconds = Histogram("mindmend_stage_seconds", "Time spent in each pipeline stage of a request",
+                          ("endpoint", "stage"))
+request_seconds = Histogram("mindmend_request_seconds", "Handler time of traced endpoints", ("endpoint",))
+queue_wait_seconds = Histogram("mindmend_pool_queue_wait_seconds", "Time jobs wait for a stage-pool worker", ("pool",))
+
+HISTOGRAMS = [request_seconds, stage_seconds, queue_wait_seconds]
+
+
+class Trace:
+    """Stage timings of one request; stages that run more than once accumulate."""
+
+    __slots__ = ("endpoint", "started", "stages")
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        # Body upload, parsing and validation happen before the handler runs
+        received = request_started_var.get()
+        if received is not None:
+            self.record("receive", self.started - received)
+
+    def record(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        stage_seconds.observe((self.endpoint, name), seconds)
+
+    def breakdown(self) -> Dict[str, float]:
+        """Milliseconds per stage so far."""
+        return {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()}
+
+
+_trace_var: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+
+
+class _StageTimer:
+    __slots__ = ("trace", "name", "started")
+
+    def __init__(self, trace: Trace, name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+def stage(name: str):
+    """Time a block as one stage of the current request (no-op when not traced)."""
+    trace = _trace_var.get()
+    if trace is None:
+        return _NOOP
+    return _StageTimer(trace, name)
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace_var.get()
+
+
+def stage_breakdown() -> Dict[str, float]:
+    """Milliseconds per stage of the current request, for log records."""
+    trace = _trace_var.get()
+    return trace.breakdown() if trace is not None else {}
+
+
+def traced(endpoint: str):
+    """
+    Decorator for FastAPI handlers (sync or async): times the handler and
+    collects stage timings for its request. Returns the handler unchanged
+    when metrics are disabled.
+    """
+    def decorate(fn):
+        if not METRICS_ENABLED:
+            return fn
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                trace = Trace(endpoint)
+                token = _trace_var.set(trace)
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    _trace_var.reset(token)
+                    request_seconds.observe((endpoint,), time.perf_counter() - trace.started)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = Trace(endpoint)
+            token = _trace_var.set(trace)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _trace_var.reset(token)
+                request_seconds.observe((endpoint,), time.perf_counter() - trace.started)
+        return wrapper
+
+    return decorate
+
+
+class MultiprocessMetrics:
+    """
+    Metrics of all workers of a multi-process server, from any one of them.
+
+    Each worker writes its histograms and collected families to
+    directory/<worker>.json every `interval` seconds and on each scrape; the
+    worker answering /metrics merges every file. Histograms are summed
+    across workers. Other families describe one process (queue depths,
+    caches), so they keep one series per worker, labelled worker="...".
+    Other workers' values are at most `interval` seconds old, and a
+    replaced worker's counters restart from zero.
+    """
+
+    def __init__(self, directory: str, worker: str, collect: Callable[[], Iterable[List[str]]],
+                 interval: float = METRICS_FLUSH_SECONDS):
+        self.directory = directory
+        self.worker = worker
+        self.interval = interval
+        self._collect = collect
+        self._stop = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{self.worker}.json")
+
+    def _state(self, families: Optional[List[List[str]]] = None) -> dict:
+        return {
+            "worker": self.worker,
+            "families": list(self._collect()) if families is None else families,
+            "histograms": {histogram.name: histogram.state() for histogram in HISTOGRAMS}
+        }
+
+    def _write(self, state: dict):
+        try:
+            # Atomic rename: a scrape in another worker never reads a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not publish metrics of {self.worker}: {e}")
+
+    def flush(self):
+        self._write(self._state())
+
+    def start(self):
+        def _loop():
+            while not self._stop.wait(self.interval):
+                self.flush()
+
+        self.flush()
+        threading.Thread(target=_loop, name="metrics-flush", daemon=True).start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def _peer_states(self) -> List[dict]:
+        states = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json") or name == f"{self.worker}.json":
+                continue
+            try:
+                with open(os.path.join(self.directory, name), "r", encoding="utf-8") as f:
+                    states.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # worker just exiting, or a file being replaced
+        return states
+
+    def render(self, families: List[List[str]]) -> str:
+        own = self._state(families)
+        self._write(own)
+        states = sorted([own] + self._peer_states(), key=lambda state: state["worker"])
+
+        # One HELP/TYPE header per family, then every worker's samples
+        merged: Dict[str, List[str]] = {}
+        for state in states:
+            for lines_of_family in state["families"]:
+                name = lines_of_family[0].split(" ", 3)[2]
+                if name in merged:
+                    merged[name].extend(lines_of_family[2:])
+                else:
+                    merged[name] = list(lines_of_family)
+
+        lines = [line for lines_of_family in merged.values() for line in lines_of_family]
+        for histogram in HISTOGRAMS:
+            lines.extend(histogram.render([state["histograms"].get(histogram.name, []) for state in states]))
+        return "\n".join(lines) + "\n"
+
+
+_multiprocess: Optional[MultiprocessMetrics] = None
+
+
+def enable_multiprocess(directory: str, worker: str, collect: Callable[[], Iterable[List[str]]],
+                        interval: float = METRICS_FLUSH_SECONDS) -> MultiprocessMetrics:
+    """
+    Report this process as `worker` of a multi-process server (call after fork).
+
+    Args:
+        directory: Directory shared by all workers of the server
+        worker: Stable name of this worker, e.g. "worker-0"
+        collect: Returns this process's metric families (not the histograms)
+        interval: Seconds between publishes; 0 publishes on scrapes only
+    """
+    global _multiprocess
+    _process_labels["worker"] = worker
+    _multiprocess = MultiprocessMetrics(directory, worker, collect, interval)
+    if interval > 0:
+        _multiprocess.start()
+    return _multiprocess
+
+
+def render(families: Iterable[List[str]]) -> str:
+    """Join metric families and the histograms into one exposition document."""
+    if _multiprocess is not None:
+        return _multiprocess.render(list(families))
+    lines: List[str] = []
+    for lines_of_family in families:
+        lines.extend(lines_of_family)
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
@@ -2,52 +2,139 @@
 import json
 import logging
 import os
-from typing import Optional
+from typing import List, Optional
 
+import numpy as np
 import spacy
-from langdetect import detect_langs, DetectorFactory
 
-# Install model with: python -m spacy download en_core_web_md
-nlp = spacy.load("en_core_web_md")
+from answer_cache import answer_cache, normalize_text
+from encoders import DEFAULT_MULTILINGUAL_MODEL, ENCODERS, SentenceTransformerEncoder, SpacyEncoder, StaticVectorEncoder
+from faq_store import FAQStore, canonical_question
+from index_backends import backend_params_from_env, build_backend
+from language_detect import language_detector
+from lazy import LazyResource
+from metrics import stage
+from static_vectors import load_static_encoder
 
-# Deterministic language detection
-DetectorFactory.seed = 0
+# Install model with: python -m spacy download en_core_web_md
+spacy_model = LazyResource("spacy", lambda: spacy.load("en_core_web_md"))
 
 logger = logging.getLogger(__name__)
 
-FAQ_DATA = []
-FAQ_DOCS = []
+FAQ_PATH = os.path.join(os.path.dirname(__file__), "faq.json")
+
+# "spacy" (English word vectors), "static" (the same vectors from a compact
+# table, without the spaCy pipeline; see static_vectors.py) or "multilingual"
+# (sentence-transformers, matches questions in every supported language
+# without translation)
+FAQ_ENCODER = os.getenv("FAQ_ENCODER", "spacy")
+if FAQ_ENCODER not in ENCODERS:
+    raise ValueError(f"Unknown FAQ_ENCODER {FAQ_ENCODER!r}; expected one of {', '.join(ENCODERS)}")
+
+# float32 keeps word-vector scores identical to Doc.similarity; int8 sentence
+# embeddings shift scores by ~1e-3 and take a quarter of the memory
+FAQ_INDEX_DTYPE = os.getenv("FAQ_INDEX_DTYPE", "int8" if ENCODERS[FAQ_ENCODER].multilingual else "float32")
+
+# "exact", "ivf" or "hnsw"; approximate backends only kick in once the
+# FAQ set reaches FAQ_ANN_MIN_ROWS, below that a full scan is cheaper
+FAQ_INDEX_BACKEND = os.getenv("FAQ_INDEX_BACKEND", "exact")
+FAQ_ANN_MIN_ROWS = int(os.getenv("FAQ_ANN_MIN_ROWS", "10000"))
+
+FALLBACK_ANSWER = "Sorry, I don't know that. Please try rephrasing or ask a different question."
+UNAVAILABLE_ANSWER = "FAQs are not currently available. Please try again later."
+
+
+def get_nlp():
+    """Return the spaCy pipeline, loading it on first use."""
+    return spacy_model.get()
+
+
+def _load_encoder():
+    if FAQ_ENCODER == SpacyEncoder.name:
+        return SpacyEncoder(get_nlp())
+    if FAQ_ENCODER == StaticVectorEncoder.name:
+        return load_static_encoder()
+    return SentenceTransformerEncoder(os.getenv("MULTILINGUAL_MODEL", DEFAULT_MULTILINGUAL_MODEL))
+
+
+text_encoder = LazyResource("encoder", _load_encoder)
+
+
+def model_fingerprint() -> str:
+    """Identify the vector model so compiled indexes are rebuilt when it changes."""
+    return text_encoder.get().fingerprint()
 
 
-def load_faqs():
-    """Load and parse FAQ data from backend/faq.json at startup."""
-    global FAQ_DATA, FAQ_DOCS
+def encode_questions(questions: List[str]) -> np.ndarray:
+    """Raw question vectors from the configured encoder, shape (n, dim)."""
+    return text_encoder.get().encode(questions)
+
+
+def _build_search(index, row_starts):
+    return build_backend(index, row_starts, FAQ_INDEX_BACKEND, min_rows=FAQ_ANN_MIN_ROWS,
+                         params=backend_params_from_env().get(FAQ_INDEX_BACKEND))
+
+
+# Cached answers may point at entries that changed, so every swap clears them;
+# answers are also keyed by snapshot (see _answer_key), so one computed on the
+# old snapshot and stored after the swap is never served
+store = FAQStore(FAQ_PATH, encode=encode_questions, fingerprint=model_fingerprint,
+                 on_swap=answer_cache.clear, dtype=FAQ_INDEX_DTYPE, backend=_build_search)
+
+
+def load_faqs(force_rebuild: bool = False):
+    """
+    Load and parse FAQ data from backend/faq.json (CLI tools).
     
-    faq_path = os.path.join(os.path.dirname(__file__), "faq.json")
+    Errors are logged, not raised; the server loads through the `faqs`
+    resource instead, which retries a failed load.
     
+    Question vectors come from the compiled index artifact when one matches
+    the current faq.json and model; otherwise only questions missing from
+    the current index are embedded, and the result is saved.
+    
+    Args:
+        force_rebuild: Re-embed all questions even if a matching artifact exists
+    """
     try:
-        with open(faq_path, "r", encoding="utf-8") as f:
-            FAQ_DATA = json.load(f)
-        
-        if not FAQ_DATA:
-            logger.warning("FAQ file is empty")
-            return
-        
-        # Build spaCy docs for all FAQ questions
-        FAQ_DOCS = [nlp(faq["question"]) for faq in FAQ_DATA]
-        logger.info(f"Loaded {len(FAQ_DATA)} FAQs")
-        
+        store.load(force_rebuild=force_rebuild)
     except FileNotFoundError:
-        logger.error(f"FAQ file not found at {faq_path}")
+        logger.error(f"FAQ file not found at {FAQ_PATH}")
     except json.JSONDecodeError as e:
         logger.error(f"Invalid JSON in FAQ file: {e}")
     except Exception as e:
         logger.error(f"Error loading FAQs: {e}")
 
 
+def _load_faq_index():
+    # Unlike load_faqs, failures propagate: the resource stays unloaded,
+    # /ready reports the error and the next request retries the load
+    store.load()
+
+
+faqs = LazyResource("faq_index", _load_faq_index)
+
+
+def _faqs_loaded() -> bool:
+    """Load the encoder and FAQ index on first use; False while loading fails (already logged)."""
+    try:
+        faqs.get()
+    except Exception:
+        return False
+    return True
+
+
+def get_faq(faq_id) -> Optional[dict]:
+    """Look up a loaded FAQ entry by id."""
+    return store.snapshot.by_id.get(faq_id)
+
+
 def detect_language(text: str) -> tuple[str, float]:
     """
     Detect language of input text.
+
+    Script-identified languages (Tamil, Hindi, ...) skip langdetect;
+    results are memoized. See language_detect.LanguageDetector.
     
     Args:
         text: Input text to analyze
@@ -55,68 +142,46 @@ def detect_language(text: str) -> tuple[str, float]:
     Returns:
         Tuple of (language_code, confidence)
     """
-    try:
-        results = detect_langs(text)
-        if results:
-            return results[0].lang, results[0].prob
-        return "unknown", 0.0
-    except Exception as e:
-        logger.warning(f"Language detection failed: {e}")
-        return "unknown", 0.0
+    return language_detector.detect(text)
 
 
-def match_faq(text: str, threshold: Optional[float] = None) -> dict:
-    """
-    Match user input to FAQ using semantic similarity.
-    
-    Args:
-        text: User input text
-        threshold: Minimum similarity threshold (uses env var if None)
-        
-    Returns:
-        Dictionary with matched FAQ or fallback response
-    """
-    if threshold is None:
-        threshold = float(os.getenv("SIMILARITY_THRESHOLD", "0.65"))
-    
-    # Detect language
-    lang_code, lang_confidence = detect_language(text)
-    
-    # Check if FAQs are available
-    if not FAQ_DATA or not FAQ_DOCS:
-        return {
-            "text": text,
-            "detected_language": lang_code,
-            "lang_confidence": round(lang_confidence, 4),
-            "faq_id": None,
-            "answer": "FAQs are not currently available. Please try again later.",
-            "score": 0.0,
-            "used_fallback": lang_code != "en"
-        }
-    
-    # Process user input
-    user_doc = nlp(text)
-    
-    # Find best matching FAQ
-    best_score = 0.0
-    best_idx = -1
-    
-    for idx, faq_doc in enumerate(FAQ_DOCS):
-        similarity = user_doc.similarity(faq_doc)
-        if similarity > best_score:
-            best_score = similarity
-            best_idx = idx
+def _used_fallback(lang_code: str) -> bool:
+    """Non-English input matched with an English-only encoder."""
+    return lang_code != "en" and not ENCODERS[FAQ_ENCODER].multilingual
+
+
+def _answer_key(text: str, threshold: float, top_k: int, snapshot_key: Optional[str]) -> tuple:
+    return normalize_text(text), threshold, top_k, snapshot_key
+
+
+def _unavailable_result(text: str, lang_code: str, lang_confidence: float) -> dict:
+    return {
+        "text": text,
+        "detected_language": lang_code,
+        "lang_confidence": round(lang_confidence, 4),
+        "faq_id": None,
+        "answer": UNAVAILABLE_ANSWER,
+        "score": 0.0,
+        "used_fallback": _used_fallback(lang_code)
+    }
+
+
+def _build_result(text: str, lang_code: str, lang_confidence: float, hits: list,
+                  threshold: float, top_k: int, faq_data: list) -> dict:
+    """Turn one query's search hits, best first, into a match_faq result."""
+    # Non-positive similarity is no match at all
+    best_idx, best_score = hits[0] if hits and hits[0][1] > 0 else (-1, 0.0)
     
     # Round score
     best_score = round(best_score, 4)
     
     # Determine if we use fallback
-    used_fallback = lang_code != "en"
+    used_fallback = _used_fallback(lang_code)
     
     # Check if best match meets threshold
     if best_score >= threshold and best_idx >= 0:
-        faq = FAQ_DATA[best_idx]
-        return {
+        faq = faq_data[best_idx]
+        result = {
             "text": text,
             "detected_language": lang_code,
             "lang_confidence": round(lang_confidence, 4),
@@ -126,16 +191,132 @@ def match_faq(text: str, threshold: Optional[float] = None) -> dict:
             "used_fallback": used_fallback
         }
     else:
-        return {
+        result = {
             "text": text,
             "detected_language": lang_code,
             "lang_confidence": round(lang_confidence, 4),
             "faq_id": None,
-            "answer": "Sorry, I don't know that. Please try rephrasing or ask a different question.",
+            "answer": FALLBACK_ANSWER,
             "score": best_score,
             "used_fallback": used_fallback
         }
+    
+    if top_k > 0:
+        result["alternatives"] = [
+            {
+                "faq_id": faq_data[idx]["id"],
+                "question": canonical_question(faq_data[idx]),
+                "score": round(score, 4)
+            }
+            for idx, score in hits[:top_k]
+        ]
+    
+    return result
+
+
+def match_faq(text: str, threshold: Optional[float] = None, top_k: int = 0) -> dict:
+    """
+    Match user input to FAQ using semantic similarity.
+    
+    Args:
+        text: User input text
+        threshold: Minimum similarity threshold (uses env var if None)
+        top_k: If > 0, include the top-k FAQs as "alternatives" for
+            "did you mean" suggestions
+        
+    Returns:
+        Dictionary with matched FAQ or fallback response
+    """
+    if threshold is None:
+        threshold = float(os.getenv("SIMILARITY_THRESHOLD", "0.65"))
+    
+    # Repeated questions skip language detection, parsing and scoring
+    cached = answer_cache.get(_answer_key(text, threshold, top_k, store.snapshot.key))
+    if cached is not None:
+        return {**cached, "text": text}
+    
+    # Detect language
+    with stage("langdetect"):
+        lang_code, lang_confidence = detect_language(text)
+    
+    # First call loads the encoder and the FAQ index
+    loaded = _faqs_loaded()
+    snapshot = store.snapshot
+    faq_data, faq_index = snapshot.data, snapshot.index
+    
+    # Check if FAQs are available
+    if not loaded or not faq_data or faq_index is None:
+        return _unavailable_result(text, lang_code, lang_confidence)
+    
+    # Embed user input; multilingual encoders take it as-is, untranslated
+    with stage("encode"):
+        user_vector = text_encoder.get().encode_one(text)
+    
+    # Exact backend: one matrix-vector product over all FAQs; ANN: a few clusters
+    with stage("search"):
+        hits = snapshot.search.search(user_vector, max(1, top_k))
+    result = _build_result(text, lang_code, lang_confidence, hits, threshold, top_k, faq_data)
+    
+    answer_cache.put(_answer_key(text, threshold, top_k, snapshot.key), dict(result))
+    return result
 
 
-# Load FAQs at module import
-load_faqs()
\ No newline at end of file
+def match_faqs(texts: List[str], threshold: Optional[float] = None, top_k: int = 0,
+               batch_size: int = 256, n_process: Optional[int] = None) -> List[dict]:
+    """
+    Match many inputs at once; each result has the same shape as match_faq.
+    
+    Uncached inputs are embedded in batches and scored against the FAQ
+    matrix in a single matrix multiplication.
+    
+    Args:
+        texts: User input texts
+        threshold: Minimum similarity threshold (uses env var if None)
+        top_k: If > 0, include the top-k FAQs as "alternatives"
+        batch_size: Texts per encoder batch
+        n_process: Worker processes for spaCy's nlp.pipe (uses env var if None)
+        
+    Returns:
+        One result dictionary per input, in input order
+    """
+    if threshold is None:
+        threshold = float(os.getenv("SIMILARITY_THRESHOLD", "0.65"))
+    if n_process is None:
+        n_process = int(os.getenv("NLP_PIPE_PROCESSES", "1"))
+    
+    results: List[Optional[dict]] = [None] * len(texts)
+    pending = []
+    current_key = store.snapshot.key
+    for i, text in enumerate(texts):
+        cached = answer_cache.get(_answer_key(text, threshold, top_k, current_key))
+        if cached is not None:
+            results[i] = {**cached, "text": text}
+        else:
+            pending.append(i)
+    
+    if not pending:
+        return results
+    
+    with stage("langdetect"):
+        languages = [detect_language(texts[i]) for i in pending]
+    
+    loaded = _faqs_loaded()
+    snapshot = store.snapshot
+    faq_data, faq_index = snapshot.data, snapshot.index
+    
+    if not loaded or not faq_data or faq_index is None:
+        for i, (lang_code, lang_confidence) in zip(pending, languages):
+            results[i] = _unavailable_result(texts[i], lang_code, lang_confidence)
+        return results
+    
+    with stage("encode"):
+        vectors = text_encoder.get().encode([texts[i] for i in pending], batch_size=batch_size, n_process=n_process)
+    with stage("search"):
+        hits = snapshot.search.search_batch(vectors, max(1, top_k))
+    
+    for row, (i, (lang_code, lang_confidence)) in enumerate(zip(pending, languages)):
+        result = _build_result(texts[i], lang_code, lang_confidence, hits[row], threshold, top_k, faq_data)
+        answer_cache.put(_answer_key(texts[i], threshold, top_k, snapshot.key), dict(result))
+        results[i] = result
+    
+    return results
\ No newline at end of file
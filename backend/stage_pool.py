@@ -0,0 +1,146 @@
+# backend/stage_pool.py
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, TypeVar
+
+from metrics import METRICS_ENABLED, queue_wait_seconds
+
+T = TypeVar("T")
+
+
+class StageSaturated(Exception):
+    """Raised when a stage already has as much work in flight as it accepts."""
+
+    def __init__(self, stage: str, retry_after: int):
+        super().__init__(f"{stage} stage is saturated")
+        self.stage = stage
+        self.retry_after = retry_after
+
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class StagePool:
+    """
+    Bounded thread pool for one blocking pipeline stage (STT, matching, TTS).
+
+    At most `workers` jobs run at once and at most `max_queue` more wait.
+    Anything beyond that is rejected immediately with StageSaturated, so
+    overload turns into fast 503s instead of an ever-growing backlog.
+    """
+
+    def __init__(self, name: str, workers: int, max_queue: int, retry_after: int = 1, window: int = 1024):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-stage")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        # Recent samples for percentiles, in seconds
+        self._queue_wait = deque(maxlen=window)
+        self._service_time = deque(maxlen=window)
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run fn(*args, **kwargs) on this stage's threads without blocking the event loop."""
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise StageSaturated(self.name, self.retry_after)
+            self._in_flight += 1
+
+        submitted = time.perf_counter()
+        # Carry the request id (and other context) onto the worker thread
+        context = contextvars.copy_context()
+
+        def _call():
+            started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+                self._queue_wait.append(started - submitted)
+            if METRICS_ENABLED:
+                queue_wait_seconds.observe((self.name,), started - submitted)
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._service_time.append(time.perf_counter() - started)
+
+        try:
+            future = self._executor.submit(_call)
+        except RuntimeError:
+            self._release(None)
+            raise
+        # Released when the job really finishes (or is cancelled before starting),
+        # not when the awaiting request goes away
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            if future is not None and not future.cancelled():
+                self.completed += 1
+
+    def stats(self) -> dict:
+        """Queue depth and recent queue-wait / service-time percentiles (ms)."""
+        with self._lock:
+            waits = list(self._queue_wait)
+            services = list(self._service_time)
+            in_flight, running = self._in_flight, self._running
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "running": running,
+            "queued": in_flight - running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_ms": {
+                "p50": round(percentile(waits, 50) * 1000, 2),
+                "p95": round(percentile(waits, 95) * 1000, 2)
+            },
+            "service_ms": {
+                "p50": round(percentile(services, 50) * 1000, 2),
+                "p95": round(percentile(services, 95) * 1000, 2)
+            }
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+def _pool_from_env(name: str, workers: int, max_queue: int) -> StagePool:
+    prefix = name.upper()
+    return StagePool(
+        name,
+        workers=int(os.getenv(f"{prefix}_WORKERS", str(workers))),
+        max_queue=int(os.getenv(f"{prefix}_QUEUE", str(max_queue))),
+        retry_after=int(os.getenv(f"{prefix}_RETRY_AFTER", "2"))
+    )
+
+
+# Whisper is CPU-bound and shares one model, matching is short, gTTS waits on the network.
+# With micro-batching on, "stt" only decodes uploads and the batcher owns the model.
+STAGES: Dict[str, StagePool] = {
+    "stt": _pool_from_env("stt", workers=2, max_queue=8),
+    "match": _pool_from_env("match", workers=4, max_queue=64),
+    "tts": _pool_from_env("tts", workers=4, max_queue=16),
+}
+
+
+def stage_stats() -> dict:
+    return {name: pool.stats() for name, pool in STAGES.items()}
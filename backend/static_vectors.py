@@ -0,0 +1,282 @@
+# backend/static_vectors.py
+"""
+Compact word-vector table for FAQ_ENCODER=static.
+
+    python static_vectors.py build --model en_core_web_md --dtype float16
+    python static_vectors.py compare --model en_core_web_md --queries "I feel anxious" "Can't sleep"
+
+spaCy's Doc.vector is the mean of its tokens' static vectors; the tagger,
+parser, lemmatizer and NER that spacy.load() runs never contribute to it.
+`build` copies the model's tokenizer rules and vector table once into
+STATIC_VECTORS_DIR (float16, or int8 with one scale per row), and
+StaticVectorEncoder then only tokenizes and looks rows up. The table is
+memory-mapped, so preforked workers share one copy, and servers only
+need the spaCy model installed to build it.
+
+`compare` encodes the FAQ questions and sample queries with both paths
+and reports top-match agreement, score drift, encode latency and memory.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+import spacy
+
+from encoders import SpacyEncoder, StaticVectorEncoder
+from faq_index import quantize
+
+logger = logging.getLogger(__name__)
+
+# Bump when the on-disk layout changes
+TABLE_FORMAT_VERSION = 1
+
+TABLE_DTYPES = ("float32", "float16", "int8")
+
+STATIC_VECTORS_DIR = os.getenv(
+    "STATIC_VECTORS_DIR",
+    os.path.join(os.path.dirname(__file__), ".static_vectors")
+)
+STATIC_VECTORS_MODEL = os.getenv("STATIC_VECTORS_MODEL", "en_core_web_md")
+# float32 reproduces the spaCy scores exactly; float16 drifts by ~1e-4
+STATIC_VECTORS_DTYPE = os.getenv("STATIC_VECTORS_DTYPE", "float16")
+# 1.0 averages every token like Doc.vector; lower values let content words dominate
+STATIC_STOPWORD_WEIGHT = float(os.getenv("STATIC_STOPWORD_WEIGHT", "1.0"))
+
+
+class VectorTable:
+    """
+    Static word vectors keyed by spaCy string hash (Token.orth).
+
+    Several keys may share a row, as in spaCy's pruned tables; keys are
+    sorted so a whole document is looked up with one searchsorted call.
+    """
+
+    def __init__(self, keys: np.ndarray, rows: np.ndarray, vectors: np.ndarray,
+                 scales: Optional[np.ndarray] = None, source: str = "unknown"):
+        self.keys = keys
+        self.rows = rows
+        self.vectors = vectors
+        self.scales = scales
+        self.source = source
+
+    @classmethod
+    def from_vocab(cls, vocab, source: str, dtype: str = "float16") -> "VectorTable":
+        """Copy a spaCy vocab's vector table, stored as `dtype`."""
+        if dtype not in TABLE_DTYPES:
+            raise ValueError(f"Unsupported table dtype {dtype!r}; expected one of {', '.join(TABLE_DTYPES)}")
+        vectors = vocab.vectors
+        if vectors.mode != "default":
+            raise ValueError(f"Only spaCy's default vector tables are supported, not {vectors.mode!r}")
+        if not vectors.key2row:
+            raise ValueError(f"{source} has no word vectors")
+
+        keys = np.fromiter(vectors.key2row.keys(), dtype=np.uint64, count=len(vectors.key2row))
+        rows = np.fromiter(vectors.key2row.values(), dtype=np.int32, count=len(vectors.key2row))
+        order = np.argsort(keys)
+        matrix, scales = quantize(np.asarray(vectors.data, dtype=np.float32), dtype)
+        return cls(keys[order], rows[order], matrix, scales, source)
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    @property
+    def dtype(self) -> str:
+        return str(self.vectors.dtype)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.keys, self.rows, self.vectors, self.scales)
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def lookup(self, keys: np.ndarray) -> np.ndarray:
+        """Rows for string hashes; (n, dim) float32, zero for keys without a vector."""
+        out = np.zeros((len(keys), self.dim), dtype=np.float32)
+        if not len(keys):
+            return out
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = self.keys[positions] == keys
+        rows = self.rows[positions[found]]
+        out[found] = self.vectors[rows]
+        if self.scales is not None:
+            out[found] *= self.scales[rows][:, None]
+        return out
+
+
+def _paths(table_dir: str, model: str, dtype: str) -> dict:
+    # Models may be given as a package name or a local directory
+    name = os.path.basename(os.path.normpath(model))
+    base = os.path.join(table_dir, f"static_vectors-{name}-{dtype}")
+    paths = {name: f"{base}.{name}.npy" for name in ("keys", "rows", "vectors", "scales")}
+    paths.update(tokenizer=base + ".tokenizer.bin", meta=base + ".json")
+    return paths
+
+
+def _write_atomic(table_dir: str, path: str, write):
+    # Temp file first, so a worker never opens a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=table_dir, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def save_table(table: VectorTable, tokenizer_bytes: bytes, table_dir: str, model: str, lang: str):
+    os.makedirs(table_dir, exist_ok=True)
+    paths = _paths(table_dir, model, table.dtype)
+    for name in ("keys", "rows", "vectors", "scales"):
+        array = getattr(table, name)
+        if array is not None:
+            _write_atomic(table_dir, paths[name], lambda f, a=array: np.save(f, a))
+    _write_atomic(table_dir, paths["tokenizer"], lambda f: f.write(tokenizer_bytes))
+
+    meta = {
+        "format_version": TABLE_FORMAT_VERSION,
+        "source": table.source,
+        "lang": lang,
+        "keys": len(table.keys),
+        "rows": len(table.vectors),
+        "dim": table.dim,
+        "dtype": table.dtype,
+    }
+    # Metadata goes last: its presence marks the table as complete
+    _write_atomic(table_dir, paths["meta"], lambda f: f.write(json.dumps(meta).encode("utf-8")))
+    logger.info(f"Saved {table.source} vector table ({len(table.keys)} keys, {len(table.vectors)} x "
+                f"{table.dim} {table.dtype}, {table.nbytes / 1e6:.1f} MB) to {table_dir}")
+
+
+def load_table(table_dir: str, model: str, dtype: str) -> Optional[Tuple[VectorTable, dict]]:
+    """Memory-map a saved table; None when it is missing or from an older layout."""
+    paths = _paths(table_dir, model, dtype)
+    try:
+        with open(paths["meta"], "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("format_version") != TABLE_FORMAT_VERSION:
+        return None
+
+    scales = np.load(paths["scales"], mmap_mode="r") if dtype == "int8" else None
+    table = VectorTable(np.load(paths["keys"], mmap_mode="r"), np.load(paths["rows"], mmap_mode="r"),
+                        np.load(paths["vectors"], mmap_mode="r"), scales, meta["source"])
+    return table, meta
+
+
+def build_table(model: str = STATIC_VECTORS_MODEL, dtype: str = STATIC_VECTORS_DTYPE,
+                table_dir: str = STATIC_VECTORS_DIR) -> VectorTable:
+    """Extract the vector table and tokenizer from an installed spaCy model."""
+    nlp = spacy.load(model)
+    source = SpacyEncoder(nlp).fingerprint()
+    table = VectorTable.from_vocab(nlp.vocab, source, dtype)
+    save_table(table, nlp.tokenizer.to_bytes(), table_dir, model, nlp.lang)
+    return table
+
+
+def load_static_encoder(model: str = STATIC_VECTORS_MODEL, dtype: str = STATIC_VECTORS_DTYPE,
+                        table_dir: str = STATIC_VECTORS_DIR,
+                        stopword_weight: float = STATIC_STOPWORD_WEIGHT) -> StaticVectorEncoder:
+    """
+    Open the saved table for `model`, building it first if it is missing
+    or the installed model's version changed. A saved table is used as-is
+    when the model is not installed at all.
+    """
+    loaded = load_table(table_dir, model, dtype)
+    installed = spacy.util.get_package_version(model)
+    if loaded is not None and installed and not loaded[1]["source"].endswith(f"-{installed}"):
+        logger.info(f"{model} is now {installed}; rebuilding its vector table")
+        loaded = None
+    if loaded is None:
+        build_table(model, dtype, table_dir)
+        loaded = load_table(table_dir, model, dtype)
+        if loaded is None:
+            raise RuntimeError(f"Vector table for {model} could not be loaded from {table_dir}")
+
+    table, meta = loaded
+    tokenizer = spacy.blank(meta["lang"]).tokenizer
+    with open(_paths(table_dir, model, dtype)["tokenizer"], "rb") as f:
+        tokenizer.from_bytes(f.read())
+    logger.info(f"Memory-mapped {table.source} vector table ({len(table.keys)} keys, "
+                f"{len(table.vectors)} x {table.dim} {table.dtype})")
+    return StaticVectorEncoder(table, tokenizer, stopword_weight)
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm", "r") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
+
+def _encode_latency_ms(encoder, queries: List[str], rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        for query in queries:
+            started = time.perf_counter()
+            encoder.encode_one(query)
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def compare(model: str, dtype: str, stopword_weight: float, queries: List[str], rounds: int):
+    """Score queries against the FAQ questions with both encoders and print the differences."""
+    from faq_store import phrasings
+
+    with open(os.path.join(os.path.dirname(__file__), "faq.json"), "r", encoding="utf-8") as f:
+        questions = [text for faq in json.load(f) for text in phrasings(faq)]
+    queries = queries or questions
+
+    rss = _rss_mb()
+    static = load_static_encoder(model, dtype, stopword_weight=stopword_weight)
+    static.encode_one("warm up")
+    static_mb = _rss_mb() - rss
+
+    rss = _rss_mb()
+    full = SpacyEncoder(spacy.load(model))
+    full.encode_one("warm up")
+    full_mb = _rss_mb() - rss
+
+    full_scores = _normalize(full.encode(queries)) @ _normalize(full.encode(questions)).T
+    static_scores = _normalize(static.encode(queries)) @ _normalize(static.encode(questions)).T
+    full_top = full_scores.argmax(axis=1)
+    static_top = static_scores.argmax(axis=1)
+    rows = np.arange(len(queries))
+    drift = np.abs(static_scores[rows, static_top] - full_scores[rows, full_top])
+
+    print(f"{'encoder':<44} {'encode p50':>11} {'memory':>9}")
+    print(f"{full.fingerprint():<44} {_encode_latency_ms(full, queries, rounds):>9.3f}ms {full_mb:>7.1f}MB")
+    print(f"{static.fingerprint():<44} {_encode_latency_ms(static, queries, rounds):>9.3f}ms {static_mb:>7.1f}MB")
+    print(f"top match agreement: {np.mean(full_top == static_top) * 100:.1f}% of {len(queries)} queries")
+    print(f"top score drift: mean {drift.mean():.2e}, max {drift.max():.2e}")
+    for n in np.flatnonzero(full_top != static_top)[:10]:
+        print(f"  {queries[n]!r}: {questions[full_top[n]]!r} -> {questions[static_top[n]]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["build", "compare"])
+    parser.add_argument("--model", default=STATIC_VECTORS_MODEL)
+    parser.add_argument("--dtype", choices=TABLE_DTYPES, default=STATIC_VECTORS_DTYPE)
+    parser.add_argument("--stopword-weight", type=float, default=STATIC_STOPWORD_WEIGHT)
+    parser.add_argument("--queries", nargs="*", default=[], help="Queries to compare (default: the FAQ questions)")
+    parser.add_argument("--rounds", type=int, default=20, help="Timing rounds per query")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "build":
+        table = build_table(args.model, args.dtype)
+        print(f"{table.source}: {len(table.keys)} keys, {len(table.vectors)} x {table.dim} {table.dtype} "
+              f"({table.nbytes / 1e6:.1f} MB) in {STATIC_VECTORS_DIR}")
+    else:
+        compare(args.model, args.dtype, args.stopword_weight, args.queries, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
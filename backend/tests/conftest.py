@@ -0,0 +1,75 @@
+# backend/tests/conftest.py
+import json
+import os
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+# Backend modules import each other by bare name, as when run from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class HashEncoder:
+    """Deterministic bag-of-words vectors, so tests need no spaCy model."""
+
+    name = "hash"
+    multilingual = False
+
+    def __init__(self, dim: int = 32):
+        self.dim = dim
+        self.calls = 0
+
+    def fingerprint(self) -> str:
+        return f"hash-{self.dim}"
+
+    def _word(self, word: str) -> np.ndarray:
+        return np.random.default_rng(zlib.crc32(word.encode("utf-8"))).standard_normal(self.dim).astype(np.float32)
+
+    def encode_one(self, text: str) -> np.ndarray:
+        words = text.lower().replace("?", " ").split()
+        if not words:
+            return np.zeros(self.dim, dtype=np.float32)
+        return np.mean([self._word(word) for word in words], axis=0)
+
+    def encode(self, texts, batch_size: int = 256, n_process: int = 1) -> np.ndarray:
+        self.calls += 1
+        return np.stack([self.encode_one(text) for text in texts])
+
+
+@pytest.fixture
+def encoder():
+    return HashEncoder()
+
+
+@pytest.fixture
+def write_faqs(tmp_path):
+    path = tmp_path / "faq.json"
+
+    def write(entries):
+        path.write_text(json.dumps(entries), encoding="utf-8")
+        return str(path)
+
+    return write
+
+
+@pytest.fixture
+def faq_nlp(tmp_path, monkeypatch, encoder, write_faqs):
+    """nlp wired to a temporary faq.json, index directory and the hash encoder."""
+    import lazy
+    import nlp
+    from answer_cache import answer_cache
+    from faq_store import FAQStore
+
+    monkeypatch.setattr(lazy, "RESOURCES", dict(lazy.RESOURCES))
+    text_encoder = lazy.LazyResource("encoder", lambda: encoder)
+    monkeypatch.setattr(nlp, "text_encoder", text_encoder)
+    monkeypatch.setattr(nlp, "faqs", lazy.LazyResource("faq_index", nlp._load_faq_index))
+    monkeypatch.setattr(nlp, "detect_language", lambda text: ("en", 1.0))
+    store = FAQStore(write_faqs([]), encode=nlp.encode_questions, fingerprint=nlp.model_fingerprint,
+                     index_dir=str(tmp_path / "index"), on_swap=answer_cache.clear)
+    monkeypatch.setattr(nlp, "store", store)
+    answer_cache.clear()
+    yield nlp
+    answer_cache.clear()
@@ -0,0 +1,42 @@
+# backend/tests/fake_modules/pyttsx3.py
+"""
+Stand-in for pyttsx3 in pool worker processes.
+
+The text picks the behaviour: "crash" exits the process, "hang" never
+returns, "fail" raises, anything else is written to the output path.
+"""
+import os
+import time
+from types import SimpleNamespace
+
+
+class _Engine:
+    def __init__(self):
+        self.properties = {"voices": [SimpleNamespace(id="v1", name="Male"), SimpleNamespace(id="v2", name="Female")]}
+        self.pending = None
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def getProperty(self, name):
+        return self.properties.get(name)
+
+    def save_to_file(self, text, path):
+        self.pending = (text, path)
+
+    def runAndWait(self):
+        text, path = self.pending
+        if text == "crash":
+            os._exit(1)
+        if text == "hang":
+            time.sleep(60)
+        if text == "fail":
+            raise OSError("no audio device")
+        with open(path, "wb") as f:
+            f.write(f"{os.getpid()}:{text}".encode("utf-8"))
+
+
+def init():
+    if os.environ.get("FAKE_PYTTSX3_INIT_FAILS") == "1":
+        raise RuntimeError("no speech driver")
+    return _Engine()
@@ -0,0 +1,49 @@
+# backend/tests/test_answer_cache.py
+import answer_cache as answer_cache_module
+from answer_cache import AnswerCache, normalize_text
+
+
+def test_normalize_text_folds_case_punctuation_and_spacing():
+    assert normalize_text("What is anxiety?") == normalize_text("  what is ANXIETY ") == "what is anxiety"
+    assert normalize_text("Straße") == normalize_text("STRASSE")
+
+
+def test_evicts_least_recently_used():
+    cache = AnswerCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_expired_entries_miss(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache_module.time, "monotonic", lambda: now[0])
+    cache = AnswerCache(ttl_seconds=10)
+    cache.put("a", 1)
+    now[0] += 9
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats()["expirations"] == 1
+
+
+def test_zero_size_disables_caching():
+    cache = AnswerCache(max_size=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None and len(cache) == 0
+
+
+def test_clear_counts_invalidations():
+    cache = AnswerCache()
+    cache.put("a", 1)
+    cache.clear()
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["invalidations"] == 1
+    assert stats["hit_rate"] == 0.0
@@ -0,0 +1,109 @@
+# backend/tests/test_faq_index.py
+import numpy as np
+import pytest
+import spacy
+
+from faq_index import FAQIndex, best_of, load_index, save_index, top_k_of
+from index_backends import ExactBackend, IVFBackend
+
+
+def reference_top_k(scores, k):
+    """The original linear scan: highest score first, first FAQ wins ties."""
+    order = sorted(range(len(scores)), key=lambda i: (-scores[i], i))
+    return [(i, float(scores[i])) for i in order[:k]]
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((64, 16)).astype(np.float32)
+
+
+def test_top_k_keeps_first_of_tied_rows():
+    scores = np.array([0.2, 0.9, 0.5, 0.9, 0.9, 0.1, 0.5, 0.9], dtype=np.float32)
+    for k in range(1, len(scores) + 1):
+        assert top_k_of(scores, k) == reference_top_k(scores, k)
+
+
+def test_top_k_is_consistent_across_k_with_duplicate_rows(vectors):
+    # Duplicate questions score identically; the lowest row must always win
+    rows = np.concatenate([vectors, vectors[::3], vectors[::7]])
+    index = FAQIndex(rows)
+    for query in vectors[:20]:
+        scores = index.scores(query)
+        first = top_k_of(scores, 1)[0]
+        assert best_of(scores) == first
+        for k in (2, 3, 5, 10):
+            hits = top_k_of(scores, k)
+            assert hits[0] == first
+            assert hits == reference_top_k(scores, k)
+
+
+def test_top_k_handles_small_rows():
+    assert top_k_of(np.array([], dtype=np.float32), 3) == []
+    assert top_k_of(np.array([0.5, 0.5], dtype=np.float32), 5) == [(0, 0.5), (1, 0.5)]
+    assert top_k_of(np.array([0.5], dtype=np.float32), 0) == []
+
+
+def test_best_of_rejects_non_positive_scores():
+    assert best_of(np.array([-0.2, 0.0], dtype=np.float32)) == (-1, 0.0)
+    assert best_of(np.array([0.1, 0.3, 0.3], dtype=np.float32)) == (1, pytest.approx(0.3))
+
+
+def test_scores_match_doc_similarity():
+    nlp = spacy.blank("en")
+    rng = np.random.default_rng(1)
+    words = "anxiety stress sleep help feel sad therapy panic calm breathe what is how can i".split()
+    for word in words:
+        nlp.vocab.set_vector(word, rng.standard_normal(24).astype(np.float32))
+
+    questions = ["what is anxiety", "how can i sleep", "what is anxiety", "therapy help", "zzz unknown"]
+    docs = [nlp(q) for q in questions]
+    index = FAQIndex(np.stack([doc.vector for doc in docs]))
+
+    for query in ["i feel anxiety", "can i sleep calm", "panic", "unknown words only"]:
+        query_doc = nlp(query)
+        expected = [doc.similarity(query_doc) if doc.vector_norm and query_doc.vector_norm else 0.0 for doc in docs]
+        np.testing.assert_allclose(index.scores(query_doc.vector), expected, rtol=1e-5, atol=1e-6)
+        # Baseline answer: max(..., key=similarity) keeps the first maximum
+        best = max(range(len(docs)), key=lambda i: expected[i])
+        if expected[best] > 0:
+            assert index.best(query_doc.vector)[0] == best
+            assert ExactBackend(index).search(query_doc.vector, 3)[0][0] == best
+
+
+def test_exact_backend_pools_phrasings_by_entry(vectors):
+    index = FAQIndex(vectors[:6])
+    backend = ExactBackend(index, np.array([0, 2, 3]))
+    query = vectors[4]
+    hits = backend.search(query, 3)
+    scores = index.scores(query)
+    pooled = [scores[0:2].max(), scores[2:3].max(), scores[3:6].max()]
+    assert hits[0][0] == 2
+    assert [score for _, score in hits] == sorted(pooled, reverse=True)
+
+
+def test_ivf_clamps_lists_to_the_training_sample(vectors):
+    index = FAQIndex(vectors)
+    backend = IVFBackend(index, n_lists=32, n_probe=16, train_size=10)
+    assert backend.n_lists == 10
+    assert backend.offsets[-1] == len(vectors)
+    # Probing every list is an exact search
+    backend.n_probe = backend.n_lists
+    assert backend.search(vectors[5], 3) == ExactBackend(index).search(vectors[5], 3)
+
+
+@pytest.mark.parametrize("dtype,tolerance", [("float32", 1e-6), ("float16", 2e-3), ("int8", 2e-2)])
+def test_quantized_scores_stay_close(vectors, dtype, tolerance):
+    exact = FAQIndex(vectors).scores(vectors[0])
+    quantized = FAQIndex(vectors, dtype=dtype)
+    np.testing.assert_allclose(quantized.scores(vectors[0]), exact, atol=tolerance)
+    np.testing.assert_allclose(quantized.scores_batch(vectors[:4])[0], quantized.scores(vectors[0]), atol=1e-5)
+
+
+def test_saved_index_round_trips(tmp_path, vectors):
+    index = FAQIndex(vectors, dtype="int8")
+    save_index(index, str(tmp_path), "abc")
+    loaded = load_index(str(tmp_path), "abc")
+    assert loaded is not None
+    np.testing.assert_array_equal(loaded.scores(vectors[3]), index.scores(vectors[3]))
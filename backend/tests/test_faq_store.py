@@ -0,0 +1,97 @@
+# backend/tests/test_faq_store.py
+import numpy as np
+import pytest
+
+from faq_index import FAQIndex
+from faq_store import FAQStore, canonical_question, phrasings
+from index_backends import ExactBackend
+
+FAQS = [
+    {"question": "What is anxiety?", "answer": "Anxiety is worry."},
+    {"question": "How can I sleep better?", "aliases": ["I can't sleep"], "answer": "Keep a routine."},
+    {"question": "What is therapy?", "answer": "Talking with a professional."},
+]
+
+
+@pytest.fixture
+def make_store(tmp_path, encoder, write_faqs):
+    swaps = []
+
+    def make(entries):
+        return FAQStore(write_faqs(entries), encode=encoder.encode, fingerprint=encoder.fingerprint,
+                        index_dir=str(tmp_path / "index"), on_swap=lambda: swaps.append(1))
+
+    make.swaps = swaps
+    return make
+
+
+def best_entry(store, encoder, text):
+    return store.snapshot.search.search(encoder.encode_one(text), 1)[0][0]
+
+
+def test_phrasings_skip_blanks_and_duplicates():
+    assert phrasings({"question": "A?", "questions": ["B?", "A?", " "], "aliases": ["", "C"]}) == ["A?", "B?", "C"]
+
+
+def test_entries_without_phrasings_are_skipped(make_store, encoder):
+    entries = [FAQS[0], {"question": "  ", "aliases": [""], "answer": "blank"}, FAQS[1],
+               {"question": "", "answer": "blank at the end"}]
+    store = make_store(entries)
+    summary = store.load()
+
+    assert summary["skipped"] == [1, 3]
+    assert [faq["id"] for faq in store.snapshot.data] == [0, 2]
+    assert best_entry(store, encoder, "I can't sleep") == 1
+    assert store.snapshot.data[1]["answer"] == "Keep a routine."
+
+
+def test_reload_embeds_only_changed_phrasings(make_store, encoder, write_faqs):
+    store = make_store(FAQS)
+    assert store.load()["embedded"] == 4
+    first_key = store.snapshot.key
+
+    assert store.load()["status"] == "unchanged"
+
+    write_faqs([FAQS[0], {**FAQS[1], "aliases": ["sleep problems"]}, FAQS[2]])
+    summary = store.reload()
+    assert summary["embedded"] == 1
+    assert summary["reused"] == 3
+    assert summary["removed"] == 1
+    assert store.snapshot.key != first_key
+    assert len(make_store.swaps) == 2
+
+
+def test_saved_index_is_reused_by_a_new_store(make_store, encoder):
+    make_store(FAQS).load()
+    calls = encoder.calls
+    summary = make_store(FAQS).load()
+    assert summary["embedded"] == 0
+    assert encoder.calls == calls
+
+
+def test_failed_reload_keeps_the_current_snapshot(make_store, tmp_path):
+    store = make_store(FAQS)
+    store.load()
+    snapshot = store.snapshot
+    (tmp_path / "faq.json").write_text("{not json", encoding="utf-8")
+
+    assert store.reload()["status"] == "failed"
+    assert store.snapshot is snapshot
+
+
+def test_backend_rejects_entries_without_rows():
+    index = FAQIndex(np.eye(4, dtype=np.float32))
+    with pytest.raises(ValueError):
+        ExactBackend(index, np.array([0, 2, 2]))
+    with pytest.raises(ValueError):
+        ExactBackend(index, np.array([0, 2, 4]))
+
+
+def test_entries_may_list_only_questions(make_store, encoder):
+    entry = {"questions": ["Why do I feel low?", "I feel sad"], "answer": "That happens."}
+    assert canonical_question(entry) == "Why do I feel low?"
+    assert canonical_question({"question": " ", "aliases": ["Alias"]}) == "Alias"
+
+    store = make_store([FAQS[0], entry])
+    assert store.load()["embedded"] == 3
+    assert best_entry(store, encoder, "I feel sad") == 1
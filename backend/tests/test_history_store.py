@@ -0,0 +1,151 @@
+# backend/tests/test_history_store.py
+import json
+import os
+from datetime import datetime, timedelta
+
+from history_store import HistoryStore, iter_records, read_segment, segment_paths
+
+
+def make_store(directory, **kwargs):
+    kwargs.setdefault("flush_interval", 0.01)
+    return HistoryStore(directory=str(directory), **kwargs)
+
+
+def test_turns_survive_a_restart(tmp_path):
+    store = make_store(tmp_path)
+    for n in range(3):
+        store.append("s1", f"message {n}", response=f"reply {n}")
+    store.append("s2", "other session")
+    store.close()
+    assert store.stats()["written"] == 4
+
+    fresh = make_store(tmp_path)
+    turns = fresh.recent("s1")
+    assert [turn["message"] for turn in turns] == ["message 0", "message 1", "message 2"]
+    assert fresh.recent("s1", limit=1)[0]["response"] == "reply 2"
+    fresh.close()
+
+
+def write_segment(directory, seq, records):
+    with open(directory / f"history-{seq:06d}.jsonl", "w", encoding="utf-8") as f:
+        f.write("".join(json.dumps(record) + "\n" for record in records))
+    return str(directory / f"history-{seq:06d}.jsonl")
+
+
+def turn(message, days_ago=0.0):
+    return {"timestamp": (datetime.now() - timedelta(days=days_ago)).isoformat(), "session_id": "s1",
+            "message": message}
+
+
+def test_segments_rotate_and_small_ones_are_merged(tmp_path):
+    store = make_store(tmp_path, segment_bytes=1, max_batch=1, compact_segments=100)
+    for n in range(5):
+        store.append("s1", f"message {n}")
+    store.close()
+
+    # Every single-record commit closes its segment
+    assert len(segment_paths(str(tmp_path))) == 6
+
+    store = make_store(tmp_path, segment_bytes=1024)
+    summary = store.compact()
+    store.close()
+
+    assert summary == {"segments": 5, "rewritten": 5, "kept": 5, "dropped": 0}
+    paths = segment_paths(str(tmp_path))
+    assert len(paths) == 2
+    assert [record["message"] for record in read_segment(paths[0])] == [f"message {n}" for n in range(5)]
+
+
+def test_full_segments_are_not_rewritten(tmp_path):
+    compacted = write_segment(tmp_path, 1, [turn(f"old {n}") for n in range(50)])
+    write_segment(tmp_path, 2, [turn("small 1")])
+    write_segment(tmp_path, 3, [turn("small 2")])
+    # The last one stays active
+    write_segment(tmp_path, 4, [turn("small 3")])
+    before = os.stat(compacted)
+
+    store = make_store(tmp_path, segment_bytes=os.path.getsize(compacted))
+    summary = store.compact()
+    store.close()
+
+    assert summary["rewritten"] == 2
+    assert os.stat(compacted).st_ino == before.st_ino and os.stat(compacted).st_mtime == before.st_mtime
+    assert [record["message"] for record in iter_records(str(tmp_path))][-3:] == ["small 1", "small 2", "small 3"]
+
+    # Nothing undersized and nothing expired: the next compaction is a no-op
+    store = make_store(tmp_path, segment_bytes=1)
+    assert store.compact()["rewritten"] == 0
+    store.close()
+
+
+def test_compaction_without_retention_leaves_full_segments(tmp_path):
+    store = make_store(tmp_path, segment_bytes=1, max_batch=1, compact_segments=3)
+    for n in range(6):
+        store.append("s1", f"message {n}")
+    store.close()
+
+    assert store.compactions == 0
+    assert len(segment_paths(str(tmp_path))) == 7
+    assert [record["message"] for record in iter_records(str(tmp_path))] == [f"message {n}" for n in range(6)]
+
+
+def test_compaction_drops_records_past_retention(tmp_path):
+    write_segment(tmp_path, 1, [turn("old 1", days_ago=30), turn("old 2", days_ago=20)])
+    write_segment(tmp_path, 2, [turn("old 3", days_ago=10), turn("new 1", days_ago=1)])
+    recent = write_segment(tmp_path, 3, [turn("new 2")])
+    before = os.stat(recent)
+
+    # segment_bytes=0 closes the last existing segment, as the CLI does
+    store = make_store(tmp_path, segment_bytes=0, retention_days=7)
+    summary = store.compact()
+    store.close()
+
+    assert summary == {"segments": 3, "rewritten": 2, "kept": 1, "dropped": 3}
+    assert [record["message"] for record in iter_records(str(tmp_path))] == ["new 1", "new 2"]
+    assert os.stat(recent).st_ino == before.st_ino
+
+
+def test_fully_expired_segments_are_removed(tmp_path):
+    write_segment(tmp_path, 1, [turn("old", days_ago=30)])
+    write_segment(tmp_path, 2, [turn("new")])
+
+    store = make_store(tmp_path, segment_bytes=0, retention_days=7)
+    assert store.compact() == {"segments": 2, "rewritten": 1, "kept": 0, "dropped": 1}
+    store.close()
+    assert [os.path.basename(p) for p in segment_paths(str(tmp_path))][:1] == ["history-000002.jsonl"]
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    path = tmp_path / "history-000001.jsonl"
+    record = {"timestamp": datetime.now().isoformat(), "session_id": "s1", "message": "kept"}
+    path.write_text(json.dumps(record) + "\n" + '{"timestamp": "20', encoding="utf-8")
+
+    assert [record["message"] for record in read_segment(str(path))] == ["kept"]
+
+
+def test_reopened_worker_reads_every_directory(tmp_path):
+    store = make_store(tmp_path)
+    store.append("s1", "from the parent")
+    store.reopen(os.path.join(str(tmp_path), "worker-1"))
+    store.append("s1", "from the worker")
+    store.close()
+
+    assert segment_paths(os.path.join(str(tmp_path), "worker-1"))
+    fresh = make_store(tmp_path)
+    assert [turn["message"] for turn in fresh.recent("s1")] == ["from the parent", "from the worker"]
+    fresh.close()
+
+
+def test_sessions_are_bounded_in_memory(tmp_path):
+    store = make_store(tmp_path, max_sessions=2, session_ttl=0.0)
+    for n in range(3):
+        store.append(f"s{n}", "hello")
+    assert list(store.sessions) == ["s1", "s2"]
+    assert store.evicted_sessions == 1
+
+    assert store.evict_idle() == 2
+    assert not store.sessions
+    store.close()
+
+    # Evicted sessions are still on disk
+    assert store.recent("s0")[0]["message"] == "hello"
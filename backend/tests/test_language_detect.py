@@ -0,0 +1,30 @@
+# backend/tests/test_language_detect.py
+import language_detect
+from language_detect import LanguageDetector
+
+
+class FakeResult:
+    lang = "fr"
+    prob = 0.9
+
+
+def test_langdetect_sees_the_original_text(monkeypatch):
+    seen = []
+    monkeypatch.setattr(language_detect, "detect_langs", lambda text: seen.append(text) or [FakeResult()])
+    detector = LanguageDetector()
+
+    assert detector.detect("Qu'est-ce que l'anxiété ?") == ("fr", 0.9)
+    assert seen == ["Qu'est-ce que l'anxiété ?"]
+
+    # Variants that normalize alike are memoized
+    assert detector.detect("qu est ce que l anxiété") == ("fr", 0.9)
+    assert len(seen) == 1
+    assert detector.stats()["memo_hits"] == 1
+
+
+def test_script_identifies_language_without_langdetect(monkeypatch):
+    monkeypatch.setattr(language_detect, "detect_langs", lambda text: (_ for _ in ()).throw(AssertionError(text)))
+    detector = LanguageDetector()
+    assert detector.detect("மன அழுத்தம் என்றால் என்ன?")[0] == "ta"
+    assert detector.detect("चिंता क्या है?")[0] == "hi"
+    assert detector.detect("12345 !!") == ("unknown", 0.0)
@@ -0,0 +1,65 @@
+# backend/tests/test_metrics.py
+import json
+
+import pytest
+
+import metrics
+from metrics import family, render, stage, traced
+
+
+@pytest.fixture
+def isolated_metrics(monkeypatch):
+    monkeypatch.setattr(metrics, "_multiprocess", None)
+    monkeypatch.setattr(metrics, "_process_labels", {})
+    for histogram in metrics.HISTOGRAMS:
+        monkeypatch.setattr(histogram, "_counts", {})
+        monkeypatch.setattr(histogram, "_sums", {})
+
+
+def sample(text, line_prefix):
+    return [line for line in text.splitlines() if line.startswith(line_prefix)]
+
+
+def test_traced_requests_record_stages(isolated_metrics):
+    @traced("ask")
+    def handler():
+        with stage("encode"):
+            pass
+        with stage("encode"):
+            pass
+        return metrics.stage_breakdown()
+
+    assert set(handler()) == {"encode"}
+    text = render([])
+    assert 'mindmend_stage_seconds_count{endpoint="ask",stage="encode"} 2' in text
+    assert 'mindmend_request_seconds_count{endpoint="ask"} 1' in text
+
+
+def test_stage_outside_a_request_is_a_no_op(isolated_metrics):
+    with stage("encode"):
+        pass
+    assert sample(render([]), "mindmend_stage_seconds_count") == []
+
+
+def test_workers_are_merged_into_one_scrape(isolated_metrics, tmp_path):
+    # Another worker's published state
+    metrics.stage_seconds.observe(("ask", "encode"), 0.002)
+    peer = {
+        "worker": "worker-1",
+        "families": [family("mindmend_stage_queued", "gauge", "Jobs waiting", [({"pool": "stt"}, 4)])],
+        "histograms": {histogram.name: histogram.state() for histogram in metrics.HISTOGRAMS}
+    }
+    peer["families"][0][2] = peer["families"][0][2].replace('}', ',worker="worker-1"}')
+    (tmp_path / "worker-1.json").write_text(json.dumps(peer), encoding="utf-8")
+
+    metrics.enable_multiprocess(str(tmp_path), "worker-0", lambda: [], interval=0)
+    text = render([family("mindmend_stage_queued", "gauge", "Jobs waiting", [({"pool": "stt"}, 1)])])
+
+    assert sample(text, "mindmend_stage_queued") == [
+        'mindmend_stage_queued{pool="stt",worker="worker-0"} 1',
+        'mindmend_stage_queued{pool="stt",worker="worker-1"} 4',
+    ]
+    assert text.count("# TYPE mindmend_stage_queued gauge") == 1
+    # Both workers observed one encode stage (this process and the copy in worker-1.json)
+    assert 'mindmend_stage_seconds_count{endpoint="ask",stage="encode"} 2' in text
+    assert (tmp_path / "worker-0.json").exists()
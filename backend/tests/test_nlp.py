@@ -0,0 +1,70 @@
+# backend/tests/test_nlp.py
+import os
+
+FAQS = [
+    {"question": "What is anxiety?", "answer": "Anxiety is worry."},
+    {"question": "How can I sleep better?", "answer": "Keep a routine."},
+]
+
+
+def test_failed_faq_load_is_reported_and_retried(faq_nlp, write_faqs):
+    os.remove(faq_nlp.store.path)
+
+    result = faq_nlp.match_faq("What is anxiety?")
+    assert result["answer"] == faq_nlp.UNAVAILABLE_ANSWER
+    status = faq_nlp.faqs.status()
+    assert status["loaded"] is False
+    assert status["error"]
+
+    write_faqs(FAQS)
+    result = faq_nlp.match_faq("What is anxiety?")
+    assert result["faq_id"] == 0
+    assert result["answer"] == "Anxiety is worry."
+    status = faq_nlp.faqs.status()
+    assert status["loaded"] is True
+    assert status["error"] is None
+
+
+def test_unavailable_answers_are_not_cached(faq_nlp, write_faqs):
+    os.remove(faq_nlp.store.path)
+    assert faq_nlp.match_faqs(["How can I sleep better?"])[0]["answer"] == faq_nlp.UNAVAILABLE_ANSWER
+    write_faqs(FAQS)
+    assert faq_nlp.match_faqs(["How can I sleep better?"])[0]["faq_id"] == 1
+
+
+def test_answer_computed_across_a_reload_is_not_served_afterwards(faq_nlp, write_faqs, monkeypatch):
+    write_faqs(FAQS)
+    assert faq_nlp.match_faq("What is anxiety?")["answer"] == "Anxiety is worry."
+    faq_nlp.answer_cache.clear()
+
+    # The reload lands while the request is still scoring against the old snapshot
+    old = faq_nlp.store.snapshot
+    search = old.search.search
+
+    def search_then_reload(vector, k):
+        hits = search(vector, k)
+        write_faqs([{**FAQS[0], "answer": "Anxiety is a response to stress."}, FAQS[1]])
+        faq_nlp.store.load()
+        return hits
+
+    monkeypatch.setattr(old.search, "search", search_then_reload)
+    assert faq_nlp.match_faq("What is anxiety?")["answer"] == "Anxiety is worry."
+    assert faq_nlp.store.snapshot.key != old.key
+
+    assert faq_nlp.match_faq("What is anxiety?")["answer"] == "Anxiety is a response to stress."
+    assert faq_nlp.match_faqs(["what is anxiety"])[0]["answer"] == "Anxiety is a response to stress."
+
+
+def test_repeated_questions_are_answered_from_the_cache(faq_nlp, write_faqs):
+    write_faqs(FAQS)
+    faq_nlp.match_faq("How can I sleep better?")
+    hits = faq_nlp.answer_cache.hits
+    assert faq_nlp.match_faq("  how can i SLEEP better ")["faq_id"] == 1
+    assert faq_nlp.answer_cache.hits == hits + 1
+
+
+def test_entries_without_a_question_key_show_their_first_phrasing(faq_nlp, write_faqs):
+    write_faqs([FAQS[0], {"questions": ["Why do I feel low?", "I feel sad"], "answer": "That happens."}])
+    result = faq_nlp.match_faq("I feel sad", top_k=2)
+    assert result["faq_id"] == 1
+    assert result["alternatives"][0]["question"] == "Why do I feel low?"
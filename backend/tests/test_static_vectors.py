@@ -0,0 +1,84 @@
+# backend/tests/test_static_vectors.py
+import shutil
+
+import numpy as np
+import pytest
+import spacy
+
+from encoders import StaticVectorEncoder
+from static_vectors import VectorTable, load_static_encoder
+
+WORDS = "anxiety stress sleep help feel sad therapy panic calm what is how can i".split()
+
+
+@pytest.fixture
+def vector_nlp():
+    nlp = spacy.blank("en")
+    rng = np.random.default_rng(2)
+    for word in WORDS:
+        nlp.vocab.set_vector(word, rng.standard_normal(24).astype(np.float32))
+    return nlp
+
+
+def static_encoder(nlp, dtype="float32", stopword_weight=1.0):
+    return StaticVectorEncoder(VectorTable.from_vocab(nlp.vocab, "en_test-0", dtype), nlp.tokenizer, stopword_weight)
+
+
+def test_float32_table_reproduces_doc_vector(vector_nlp):
+    encoder = static_encoder(vector_nlp)
+    texts = ["what is anxiety", "how can i sleep?", "I feel sad and stressed", "zzz unknown", ""]
+    for text in texts:
+        np.testing.assert_array_equal(encoder.encode_one(text), vector_nlp(text).vector)
+    np.testing.assert_array_equal(encoder.encode(texts), np.stack([vector_nlp(text).vector for text in texts]))
+
+
+def test_out_of_vocabulary_tokens_count_as_zeros(vector_nlp):
+    encoder = static_encoder(vector_nlp)
+    anxiety = vector_nlp.vocab["anxiety"].vector
+    np.testing.assert_allclose(encoder.encode_one("anxiety zzz qqq"), anxiety / 3, rtol=1e-6)
+    assert not encoder.encode_one("zzz qqq").any()
+
+
+def test_stopword_weighting_drops_punctuation(vector_nlp):
+    encoder = static_encoder(vector_nlp, stopword_weight=0.5)
+    anxiety = vector_nlp.vocab["anxiety"].vector
+    stop = vector_nlp.vocab["what"].vector
+    assert vector_nlp.vocab["what"].is_stop and not vector_nlp.vocab["anxiety"].is_stop
+
+    np.testing.assert_allclose(encoder.encode_one("anxiety!?"), anxiety, rtol=1e-6)
+    np.testing.assert_allclose(encoder.encode_one("what anxiety"), (0.5 * stop + anxiety) / 1.5, rtol=1e-5, atol=1e-6)
+    # Only punctuation: falls back to the plain mean instead of dividing by zero
+    assert np.isfinite(encoder.encode_one("?!")).all()
+    assert encoder.fingerprint() == "static_en_test-0-float32-stop0.5"
+
+
+def test_lookup_returns_zero_rows_for_missing_keys(vector_nlp):
+    table = VectorTable.from_vocab(vector_nlp.vocab, "en_test-0", "float32")
+    present = vector_nlp.vocab.strings["sleep"]
+    missing = np.array([present, 1, table.keys.max() + np.uint64(1), np.iinfo(np.uint64).max], dtype=np.uint64)
+
+    rows = table.lookup(missing)
+    np.testing.assert_array_equal(rows[0], vector_nlp.vocab["sleep"].vector)
+    assert not rows[1:].any()
+    assert table.lookup(np.array([], dtype=np.uint64)).shape == (0, 24)
+
+
+@pytest.mark.parametrize("dtype,tolerance", [("float16", 2e-3), ("int8", 3e-2)])
+def test_quantized_tables_stay_close(vector_nlp, dtype, tolerance):
+    exact = static_encoder(vector_nlp).encode_one("how can i calm panic")
+    quantized = static_encoder(vector_nlp, dtype).encode_one("how can i calm panic")
+    np.testing.assert_allclose(quantized, exact, atol=tolerance)
+
+
+def test_saved_table_is_memory_mapped_and_reused(vector_nlp, tmp_path):
+    model_dir = str(tmp_path / "en_test")
+    vector_nlp.to_disk(model_dir)
+
+    encoder = load_static_encoder(model=model_dir, dtype="float32", table_dir=str(tmp_path / "tables"))
+    assert isinstance(encoder.table.vectors, np.memmap)
+    np.testing.assert_array_equal(encoder.encode_one("help me sleep"), vector_nlp("help me sleep").vector)
+
+    # The model is gone: the saved table and tokenizer are used as they are
+    shutil.rmtree(model_dir)
+    reloaded = load_static_encoder(model=model_dir, dtype="float32", table_dir=str(tmp_path / "tables"))
+    np.testing.assert_array_equal(reloaded.encode_one("help me sleep"), encoder.encode_one("help me sleep"))
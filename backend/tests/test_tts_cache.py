@@ -0,0 +1,81 @@
+# backend/tests/test_tts_cache.py
+import os
+import time
+
+import pytest
+
+from tts_cache import PinnedCacheFull, TTSCache, cache_key
+
+
+def age(cache, key, seconds_ago):
+    stamp = time.time() - seconds_ago
+    os.utime(cache._path(key), (stamp, stamp))
+
+
+def test_memory_then_disk_tier(tmp_path):
+    cache = TTSCache(cache_dir=str(tmp_path), max_memory_bytes=1024)
+    key = cache_key("hello", "en", "gtts", "")
+    cache.put(key, b"x" * 100)
+    assert cache.get(key) == b"x" * 100
+    assert cache.memory_hits == 1
+
+    fresh = TTSCache(cache_dir=str(tmp_path), max_memory_bytes=1024)
+    assert fresh.contains(key)
+    assert fresh.get(key) == b"x" * 100
+    assert fresh.disk_hits == 1
+    assert fresh.get(key) is not None and fresh.memory_hits == 1
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = TTSCache(cache_dir=str(tmp_path), max_memory_bytes=0, max_disk_bytes=1000)
+    keys = [cache_key(f"answer {n}", "en", "gtts", "") for n in range(4)]
+    for n, key in enumerate(keys[:3]):
+        cache.put(key, b"a" * 300)
+        age(cache, key, 100 - n)
+
+    # Reading the oldest clip makes it the most recently used
+    assert cache.get(keys[0]) is not None
+    cache.put(keys[3], b"a" * 300)
+
+    assert [cache.contains(key) for key in keys] == [True, False, True, True]
+    assert cache.stats()["disk_bytes"] == 900
+    assert cache.disk_evictions == 1
+
+
+def test_disk_budget_counts_existing_clips(tmp_path):
+    cache = TTSCache(cache_dir=str(tmp_path), max_memory_bytes=0, max_disk_bytes=0)
+    for n in range(5):
+        key = cache_key(f"text {n}", "en", "gtts", "")
+        cache.put(key, b"b" * 400)
+        age(cache, key, 100 - n)
+
+    bounded = TTSCache(cache_dir=str(tmp_path), max_memory_bytes=0, max_disk_bytes=1000)
+    assert bounded.stats()["disk_bytes"] == 2000
+    bounded.put(cache_key("one more", "en", "gtts", ""), b"b" * 400)
+    assert bounded.stats()["disk_bytes"] <= 900
+    assert bounded.contains(cache_key("one more", "en", "gtts", ""))
+
+
+def test_pinned_clips_are_never_evicted(tmp_path):
+    pinned = cache_key("faq answer", "en", "gtts", "")
+    TTSCache(cache_dir=str(tmp_path), max_memory_bytes=0, max_disk_bytes=0).pin(pinned, b"p" * 500)
+
+    cache = TTSCache(cache_dir=str(tmp_path), max_memory_bytes=0, max_disk_bytes=1000)
+    assert cache.stats()["disk_bytes"] == 0
+    assert cache.stats()["pinned_bytes"] == 500
+    for n in range(5):
+        cache.put(cache_key(f"user text {n}", "en", "gtts", ""), b"u" * 400)
+
+    assert cache.disk_evictions > 0
+    assert cache.is_pinned(pinned)
+    assert cache.get(pinned) == b"p" * 500
+
+
+def test_pinning_past_the_budget_fails(tmp_path):
+    cache = TTSCache(cache_dir=str(tmp_path), max_memory_bytes=0, max_pinned_bytes=1000)
+    cache.pin(cache_key("a", "en", "gtts", ""), b"p" * 600)
+    # Re-pinning the same clip does not count twice
+    cache.pin(cache_key("a", "en", "gtts", ""), b"p" * 600)
+    with pytest.raises(PinnedCacheFull):
+        cache.pin(cache_key("b", "en", "gtts", ""), b"p" * 600)
+    assert not cache.contains(cache_key("b", "en", "gtts", ""))
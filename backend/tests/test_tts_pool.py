@@ -0,0 +1,90 @@
+# backend/tests/test_tts_pool.py
+import os
+
+import pytest
+
+from tts_pool import Pyttsx3Pool
+
+FAKE_MODULES = os.path.join(os.path.dirname(__file__), "fake_modules")
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    # Spawned workers inherit sys.path, so they import the fake pyttsx3
+    monkeypatch.syspath_prepend(FAKE_MODULES)
+    pools = []
+
+    def make(**kwargs):
+        kwargs.setdefault("size", 1)
+        kwargs.setdefault("timeout", 5.0)
+        kwargs.setdefault("start_timeout", 30.0)
+        pool = Pyttsx3Pool(**kwargs)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def worker_pid(audio: bytes) -> int:
+    return int(audio.split(b":", 1)[0])
+
+
+def test_synthesizes_on_a_worker(make_pool):
+    pool = make_pool()
+    audio = pool.synthesize("hello")
+    assert audio.endswith(b":hello")
+    assert worker_pid(audio) != os.getpid()
+    assert pool.voice == "v2"
+    assert pool.stats()["completed"] == 1
+
+
+def test_engine_error_keeps_the_worker(make_pool):
+    pool = make_pool()
+    first = worker_pid(pool.synthesize("hello"))
+    with pytest.raises(RuntimeError, match="no audio device"):
+        pool.synthesize("fail")
+    assert worker_pid(pool.synthesize("hello")) == first
+    assert pool.stats()["failed"] == 1 and pool.restarts == 0
+
+
+def test_crashed_worker_is_replaced(make_pool):
+    pool = make_pool()
+    first = worker_pid(pool.synthesize("hello"))
+    with pytest.raises(RuntimeError, match="crashed"):
+        pool.synthesize("crash")
+    assert worker_pid(pool.synthesize("hello")) != first
+    assert pool.restarts == 1
+
+
+def test_hung_worker_is_killed(make_pool):
+    pool = make_pool(timeout=1.0)
+    with pytest.raises(TimeoutError):
+        pool.synthesize("hang")
+    assert pool.timeouts == 1 and pool.restarts == 1
+    assert pool.synthesize("hello").endswith(b":hello")
+
+
+def test_busy_pool_rejects_after_queue_timeout(make_pool):
+    pool = make_pool(queue_timeout=0.1)
+    worker = pool._idle.get()
+    try:
+        with pytest.raises(TimeoutError, match="no pyttsx3 worker free"):
+            pool.synthesize("hello")
+    finally:
+        pool._idle.put(worker)
+    assert pool.rejected == 1
+
+
+def test_workers_are_recycled(make_pool):
+    pool = make_pool(max_jobs_per_worker=2)
+    pids = [worker_pid(pool.synthesize("hello")) for _ in range(3)]
+    assert pids[0] == pids[1] != pids[2]
+    assert pool.restarts == 1
+
+
+def test_broken_engine_fails_at_start(make_pool, monkeypatch):
+    monkeypatch.setenv("FAKE_PYTTSX3_INIT_FAILS", "1")
+    with pytest.raises(RuntimeError, match="no speech driver"):
+        make_pool()
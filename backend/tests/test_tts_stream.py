@@ -0,0 +1,72 @@
+# backend/tests/test_tts_stream.py
+import asyncio
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from tts_stream import SynthesisFailed, WavJoiner, split_sentences, stream_speech
+
+
+class InlineStage:
+    async def run(self, fn, *args):
+        return fn(*args)
+
+
+def wav_clip(samples: np.ndarray, rate: int = 22050) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def collect(text, synthesize, **kwargs) -> bytes:
+    async def main():
+        return b"".join([chunk async for chunk in stream_speech(text, "en", synthesize, InlineStage(), **kwargs)])
+    return asyncio.run(main())
+
+
+ANSWER = ("Anxiety is a natural response to stress and worry. "
+          "Talking to a mental health professional can help a lot. "
+          "Breathing exercises are a good place to start today.")
+
+
+def test_wav_sentences_join_into_one_playable_stream():
+    assert len(split_sentences(ANSWER)) == 3
+    pcm = {}
+
+    def synthesize(sentence, lang):
+        pcm[sentence] = np.arange(len(sentence) * 10, dtype=np.int16)
+        return wav_clip(pcm[sentence])
+
+    audio = collect(ANSWER, synthesize, wav=True)
+
+    assert audio.count(b"RIFF") == 1
+    with wave.open(io.BytesIO(audio), "rb") as f:
+        assert f.getframerate() == 22050
+        frames = f.readframes(10 ** 6)
+    assert frames == b"".join(pcm[s].astype("<i2").tobytes() for s in split_sentences(ANSWER))
+
+
+def test_single_wav_clip_is_sent_unchanged():
+    clip = wav_clip(np.zeros(100, dtype=np.int16))
+    assert collect("Short answer.", lambda sentence, lang: clip, wav=True) == clip
+
+
+def test_failed_sentence_fails_the_stream():
+    def synthesize(sentence, lang):
+        return None if sentence.startswith("Talking") else wav_clip(np.zeros(10, dtype=np.int16))
+
+    with pytest.raises(SynthesisFailed, match="sentence 2 of 3"):
+        collect(ANSWER, synthesize, wav=True)
+
+
+def test_mismatched_clip_formats_are_rejected():
+    joiner = WavJoiner()
+    joiner.feed(wav_clip(np.zeros(10, dtype=np.int16), rate=22050))
+    with pytest.raises(SynthesisFailed):
+        joiner.feed(wav_clip(np.zeros(10, dtype=np.int16), rate=16000))
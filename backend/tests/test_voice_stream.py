@@ -0,0 +1,96 @@
+# backend/tests/test_voice_stream.py
+import asyncio
+import json
+
+import numpy as np
+
+from voice_stream import VoiceStreamSession
+
+
+class FakeWebSocket:
+    def __init__(self, fail_after: int = -1, incoming=()):
+        self.sent = []
+        self.fail_after = fail_after
+        self.incoming = list(incoming)
+
+    async def receive(self):
+        if not self.incoming:
+            return {"type": "websocket.disconnect"}
+        return {"type": "websocket.receive", "text": self.incoming.pop(0)}
+
+    async def send_text(self, text):
+        if self.fail_after >= 0 and len(self.sent) >= self.fail_after:
+            raise RuntimeError('Cannot call "send" once a close message has been sent.')
+        self.sent.append(json.loads(text))
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+
+def run_utterances(websocket, transcribe, count):
+    async def answer(text, language, session_id):
+        return {"answer": f"answer to {text}", "tts_lang": "en"}
+
+    async def speak(text, lang):
+        raise AssertionError("TTS is disabled")
+
+    async def main():
+        session = VoiceStreamSession(websocket, transcribe, answer, speak)
+        session.tts_enabled = False
+        for _ in range(count):
+            session._utterances.put_nowait(np.zeros(160, dtype=np.float32))
+        worker = asyncio.create_task(session._process_utterances())
+        await asyncio.sleep(0.05)
+        done = worker.done()
+        worker.cancel()
+        return done
+
+    return asyncio.run(main())
+
+
+def test_failed_utterance_does_not_end_the_session():
+    results = iter([RuntimeError("CUDA failed"), ("hello", "en", 0.9), ("again", "en", 0.9)])
+
+    async def transcribe(audio):
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    websocket = FakeWebSocket()
+    finished = run_utterances(websocket, transcribe, 3)
+
+    assert not finished
+    assert [message["type"] for message in websocket.sent] == ["error", "final", "answer", "final", "answer"]
+    assert websocket.sent[0]["error"] == "CUDA failed"
+    assert websocket.sent[-1]["answer"] == "answer to again"
+
+
+def test_closed_socket_stops_the_worker():
+    async def transcribe(audio):
+        return "hello", "en", 0.9
+
+    websocket = FakeWebSocket(fail_after=1)
+    assert run_utterances(websocket, transcribe, 2)
+    assert [message["type"] for message in websocket.sent] == ["final"]
+
+
+def test_non_object_control_messages_get_an_error_frame():
+    async def transcribe(audio):
+        raise AssertionError("no audio was sent")
+
+    async def answer(text, language, session_id):
+        raise AssertionError("no audio was sent")
+
+    async def speak(text, lang):
+        raise AssertionError("no audio was sent")
+
+    messages = ["5", "[]", "null", '"start"', "not json", json.dumps({"type": "start", "tts": False})]
+    websocket = FakeWebSocket(incoming=messages)
+    session = VoiceStreamSession(websocket, transcribe, answer, speak)
+    asyncio.run(session.run())
+
+    assert [message["type"] for message in websocket.sent] == ["error"] * 5
+    assert all("JSON objects" in message["error"] for message in websocket.sent)
+    # The session kept reading after the bad messages
+    assert session.tts_enabled is False
@@ -0,0 +1,242 @@
+# backend/transcription_scheduler.py
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from stage_pool import StageSaturated, percentile
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Whisper's encoder window; longer utterances go through the regular long-form path
+MAX_BATCHED_SECONDS = 30.0
+
+# (text, language, language_probability)
+Transcription = Tuple[str, str, float]
+
+
+def transcribe_batch(model, audios: List[np.ndarray], language: Optional[str] = None,
+                     beam_size: int = 5) -> List[Transcription]:
+    """
+    Transcribe several short utterances with one encoder pass and one batched decode.
+
+    Each utterance keeps its own detected language: prompts are built per
+    item, which faster-whisper's BatchedInferencePipeline (one language per
+    batch, made for chunks of a single file) does not allow.
+
+    Args:
+        model: faster_whisper.WhisperModel
+        audios: 16 kHz mono float32 arrays, each at most 30 s long
+        language: Force a language for every item, or None to auto-detect
+        beam_size: Beam size for decoding
+
+    Returns:
+        One (text, language, language_probability) per input, in order
+    """
+    from faster_whisper.tokenizer import Tokenizer
+    from faster_whisper.vad import get_speech_timestamps
+
+    results: List[Optional[Transcription]] = [None] * len(audios)
+    voiced = []
+    for i, audio in enumerate(audios):
+        # Same role as vad_filter=True: silent clips would otherwise hallucinate text
+        if get_speech_timestamps(audio):
+            voiced.append(i)
+        else:
+            results[i] = ("", language or "en", 0.0)
+
+    if not voiced:
+        return results
+
+    extractor = model.feature_extractor
+    features = []
+    for i in voiced:
+        mel = extractor(audios[i])[:, :extractor.nb_max_frames]
+        pad = extractor.nb_max_frames - mel.shape[1]
+        features.append(np.pad(mel, ((0, 0), (0, pad))) if pad > 0 else mel)
+    encoder_output = model.encode(np.stack(features).astype(np.float32))
+
+    if language is None and model.model.is_multilingual:
+        detected = [
+            (scores[0][0][2:-2], scores[0][1])
+            for scores in model.model.detect_language(encoder_output)
+        ]
+    else:
+        detected = [(language or "en", 1.0)] * len(voiced)
+
+    tokenizers = [
+        Tokenizer(model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language=lang)
+        for lang, _ in detected
+    ]
+    prompts = [tokenizer.sot_sequence + [tokenizer.no_timestamps] for tokenizer in tokenizers]
+
+    outputs = model.model.generate(
+        encoder_output,
+        prompts,
+        beam_size=beam_size,
+        max_length=448,
+        suppress_blank=True,
+        suppress_tokens=[-1]
+    )
+
+    for i, tokenizer, (lang, prob), output in zip(voiced, tokenizers, detected, outputs):
+        text = tokenizer.decode(output.sequences_ids[0]).strip()
+        results[i] = (text, lang, float(prob))
+
+    return results
+
+
+def transcribe_single(model, audio: np.ndarray, language: Optional[str] = None) -> Transcription:
+    """Unbatched path, also used for utterances longer than one encoder window."""
+    segments, info = model.transcribe(audio, language=language, vad_filter=True)
+    text = " ".join([segment.text for segment in segments]).strip()
+    return text, info.language, info.language_probability
+
+
+class _Job:
+    __slots__ = ("audio", "language", "future", "enqueued")
+
+    def __init__(self, audio: np.ndarray, language: Optional[str]):
+        self.audio = audio
+        self.language = language
+        self.future: Future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class TranscriptionScheduler:
+    """
+    Groups concurrent transcription requests into micro-batches.
+
+    A single worker thread owns the model. It takes the first waiting
+    utterance, keeps collecting for up to max_wait_ms or until
+    max_batch_size items are queued, runs them as one batch and fans the
+    results back to each caller's future.
+    """
+
+    def __init__(self, model_getter: Callable[[], object], max_batch_size: int = 8,
+                 max_wait_ms: float = 50.0, max_pending: int = 64, retry_after: int = 2):
+        """
+        Args:
+            model_getter: Returns the WhisperModel; called on the worker thread
+            max_batch_size: Most utterances decoded together
+            max_wait_ms: How long the first utterance waits for company
+            max_pending: Queue bound; beyond it submit() raises StageSaturated
+            retry_after: Retry-After seconds reported when saturated
+        """
+        self._model_getter = model_getter
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self._queue: "queue.Queue[_Job]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+        self._batch_sizes = deque(maxlen=1024)
+        self._queue_wait = deque(maxlen=1024)
+        self._service_time = deque(maxlen=1024)
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="whisper-batcher", daemon=True)
+                self._worker.start()
+
+    def submit(self, audio: np.ndarray, language: Optional[str] = None) -> Future:
+        """Queue one 16 kHz mono float32 utterance; the future resolves to a Transcription."""
+        if self._queue.qsize() >= self.max_pending:
+            self.rejected += 1
+            raise StageSaturated("whisper", self.retry_after)
+        self._ensure_worker()
+        job = _Job(np.asarray(audio, dtype=np.float32), language)
+        self._queue.put(job)
+        return job.future
+
+    async def transcribe(self, audio: np.ndarray, language: Optional[str] = None) -> Transcription:
+        """Awaitable submit() for async endpoints."""
+        return await asyncio.wrap_future(self.submit(audio, language))
+
+    def _collect(self) -> List[_Job]:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            for job in batch:
+                self._queue_wait.append(started - job.enqueued)
+            try:
+                self._process(batch)
+            except Exception as e:
+                logger.error(f"Transcription batch of {len(batch)} failed: {e}")
+                for job in batch:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+            self._service_time.append(time.perf_counter() - started)
+            self.batches += 1
+            self.items += len(batch)
+            self._batch_sizes.append(len(batch))
+
+    def _process(self, batch: List[_Job]):
+        model = self._model_getter()
+        short = [job for job in batch if len(job.audio) <= MAX_BATCHED_SECONDS * SAMPLE_RATE]
+        long = [job for job in batch if len(job.audio) > MAX_BATCHED_SECONDS * SAMPLE_RATE]
+
+        # One decode call per forced language; auto-detected items share a call
+        by_language = {}
+        for job in short:
+            by_language.setdefault(job.language, []).append(job)
+        for language, jobs in by_language.items():
+            results = transcribe_batch(model, [job.audio for job in jobs], language=language)
+            for job, result in zip(jobs, results):
+                job.future.set_result(result)
+
+        for job in long:
+            job.future.set_result(transcribe_single(model, job.audio, job.language))
+
+    def stats(self) -> dict:
+        sizes = list(self._batch_sizes)
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "pending": self._queue.qsize(),
+            "batches": self.batches,
+            "items": self.items,
+            "rejected": self.rejected,
+            "mean_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            "queue_wait_ms_p95": round(percentile(list(self._queue_wait), 95) * 1000, 2),
+            "batch_ms_p95": round(percentile(list(self._service_time), 95) * 1000, 2)
+        }
+
+
+def scheduler_from_env(model_getter: Callable[[], object]) -> TranscriptionScheduler:
+    return TranscriptionScheduler(
+        model_getter,
+        max_batch_size=int(os.getenv("WHISPER_BATCH_SIZE", "8")),
+        max_wait_ms=float(os.getenv("WHISPER_BATCH_WAIT_MS", "50")),
+        max_pending=int(os.getenv("WHISPER_BATCH_QUEUE", "64")),
+        retry_after=int(os.getenv("STT_RETRY_AFTER", "2"))
+    )
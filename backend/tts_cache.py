@@ -0,0 +1,343 @@
+# backend/tts_cache.py
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Languages the voice endpoints synthesize answers in
+SUPPORTED_TTS_LANGS = ["ta", "hi", "kn", "te", "ml", "fr", "en"]
+
+CACHE_DIR = os.getenv(
+    "TTS_CACHE_DIR",
+    os.path.join(os.path.dirname(__file__), ".tts_cache")
+)
+
+# Once the disk tier exceeds its budget, least recently used clips are
+# deleted until it is back under this fraction of it
+DISK_EVICT_TARGET = 0.9
+
+# Subdirectory of the cache for clips written by `warm`; never evicted
+PINNED_DIR = "pinned"
+
+
+class PinnedCacheFull(RuntimeError):
+    """The pinned clips would exceed their budget."""
+
+
+def cache_key(text: str, lang: str, engine: str, voice_settings: str) -> str:
+    """Content address of one synthesized clip."""
+    digest = hashlib.sha256()
+    for part in (engine, lang, voice_settings, text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class TTSCache:
+    """
+    Two-tier cache of synthesized audio: an in-memory LRU bounded by
+    total bytes, in front of a directory of content-addressed files.
+
+    Disk entries survive restarts and are shared by all workers on a host.
+    The disk tier is bounded too: any text posted to the TTS endpoints
+    lands in it, so clips are evicted by modification time, which disk
+    hits refresh. Clips pinned by `warm` (the FAQ answers) live in a
+    separate namespace with its own budget and are never evicted, so
+    user traffic cannot push them out.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = CACHE_DIR, max_memory_bytes: int = 64 * 1024 * 1024,
+                 max_disk_bytes: int = 512 * 1024 * 1024, max_pinned_bytes: int = 1024 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Directory for the disk tier, or None for memory only
+            max_memory_bytes: Budget for the memory tier
+            max_disk_bytes: Budget for evictable clips on disk (0: unbounded)
+            max_pinned_bytes: Budget for pinned clips on disk (0: unbounded)
+        """
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.max_pinned_bytes = max_pinned_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+        self._disk_bytes = 0
+        self._pinned_bytes = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            if max_disk_bytes:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+            self._pinned_bytes = sum(size for _, size, _ in self._disk_entries(pinned=True))
+
+    def _path(self, key: str, pinned: bool = False) -> str:
+        # Two-level fan-out keeps directories small with thousands of clips
+        root = os.path.join(self.cache_dir, PINNED_DIR) if pinned else self.cache_dir
+        return os.path.join(root, key[:2], key + ".audio")
+
+    def _disk_entries(self, pinned: bool = False) -> List[Tuple[float, int, str]]:
+        """(mtime, size, path) of every evictable (or pinned) clip on disk, including other workers' writes."""
+        root = os.path.join(self.cache_dir, PINNED_DIR) if pinned else self.cache_dir
+        if not os.path.isdir(root):
+            return []
+        entries = []
+        for fanout in os.scandir(root):
+            if not fanout.is_dir() or (not pinned and fanout.name == PINNED_DIR):
+                continue
+            for entry in os.scandir(fanout.path):
+                if not entry.name.endswith(".audio"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict_disk(self):
+        """Delete the least recently used clips until the disk tier is under DISK_EVICT_TARGET of its budget."""
+        # One eviction pass at a time; concurrent writers just skip it
+        if not self._evict_lock.acquire(blocking=False):
+            return
+        try:
+            entries = sorted(self._disk_entries())
+            total = sum(size for _, size, _ in entries)
+            target = int(self.max_disk_bytes * DISK_EVICT_TARGET)
+            evicted = 0
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass  # another worker evicted it first
+                except OSError as e:
+                    logger.warning(f"Could not evict TTS cache entry {path}: {e}")
+                    continue
+                total -= size
+                evicted += 1
+            with self._lock:
+                self._disk_bytes = total
+                self.disk_evictions += evicted
+        finally:
+            self._evict_lock.release()
+
+    def _remember(self, key: str, audio: bytes):
+        if len(audio) > self.max_memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= len(old)
+            self._memory[key] = audio
+            self._memory_bytes += len(audio)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+
+        if self.cache_dir:
+            audio = self._read(self._path(key, pinned=True))
+            if audio:
+                self.disk_hits += 1
+                self._remember(key, audio)
+                return audio
+
+            path = self._path(key)
+            audio = self._read(path)
+            if audio:
+                self.disk_hits += 1
+                if self.max_disk_bytes:
+                    # Mark as recently used for eviction
+                    try:
+                        os.utime(path)
+                    except OSError:
+                        pass
+                self._remember(key, audio)
+                return audio
+
+        self.misses += 1
+        return None
+
+    @staticmethod
+    def _read(path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _write(path: str, audio: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Atomic rename so concurrent readers never see a partial clip
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+
+    def contains(self, key: str) -> bool:
+        """True if the clip is cached, without touching hit counters or LRU order."""
+        if key in self._memory:
+            return True
+        return bool(self.cache_dir) and (self.is_pinned(key) or os.path.exists(self._path(key)))
+
+    def is_pinned(self, key: str) -> bool:
+        return bool(self.cache_dir) and os.path.exists(self._path(key, pinned=True))
+
+    def pin(self, key: str, audio: bytes):
+        """
+        Store a clip that is never evicted.
+
+        Raises:
+            PinnedCacheFull: The clip would take the pinned clips past max_pinned_bytes
+            OSError: The clip could not be written
+        """
+        if not self.cache_dir:
+            raise ValueError("pinning needs a cache directory")
+        path = self._path(key, pinned=True)
+        with self._lock:
+            # Re-pinning a clip replaces it rather than adding to the total
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            total = self._pinned_bytes - previous + len(audio)
+            if self.max_pinned_bytes and total > self.max_pinned_bytes:
+                raise PinnedCacheFull(
+                    f"pinned TTS clips need more than {self.max_pinned_bytes / 2 ** 20:.1f} MB; "
+                    f"raise TTS_CACHE_PINNED_MB or warm fewer languages"
+                )
+            self._pinned_bytes = total
+        self._write(path, audio)
+
+    def put(self, key: str, audio: bytes):
+        self._remember(key, audio)
+        if not self.cache_dir:
+            return
+        try:
+            self._write(self._path(key), audio)
+        except OSError as e:
+            logger.warning(f"Could not write TTS cache entry {key}: {e}")
+            return
+
+        if self.max_disk_bytes:
+            # A running estimate; each eviction pass recounts from the directory
+            with self._lock:
+                self._disk_bytes += len(audio)
+                over_budget = self._disk_bytes > self.max_disk_bytes
+            if over_budget:
+                self._evict_disk()
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "disk_bytes": self._disk_bytes,
+            "disk_evictions": self.disk_evictions,
+            "pinned_bytes": self._pinned_bytes,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+def tts_cache_from_env() -> Optional[TTSCache]:
+    """
+    Cache configured from TTS_CACHE / TTS_CACHE_DIR / TTS_CACHE_MEMORY_MB /
+    TTS_CACHE_DISK_MB / TTS_CACHE_PINNED_MB, or None if disabled.
+    """
+    if os.getenv("TTS_CACHE", "1") == "0":
+        return None
+    return TTSCache(
+        cache_dir=CACHE_DIR or None,
+        max_memory_bytes=int(float(os.getenv("TTS_CACHE_MEMORY_MB", "64")) * 1024 * 1024),
+        max_disk_bytes=_disk_budget(),
+        max_pinned_bytes=_pinned_budget()
+    )
+
+
+def _disk_budget() -> int:
+    return int(float(os.getenv("TTS_CACHE_DISK_MB", "512")) * 1024 * 1024)
+
+
+def _pinned_budget() -> int:
+    return int(float(os.getenv("TTS_CACHE_PINNED_MB", "1024")) * 1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-synthesize every FAQ answer into the TTS cache")
+    parser.add_argument("command", choices=["warm"])
+    parser.add_argument("--engine", default="gtts", choices=["gtts", "pyttsx3"])
+    parser.add_argument("--langs", nargs="+", default=SUPPORTED_TTS_LANGS)
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent synthesis jobs")
+    args = parser.parse_args()
+
+    import nlp
+    from tts_handler import TTSHandler
+
+    with open(nlp.FAQ_PATH, "r", encoding="utf-8") as f:
+        answers = {faq["answer"] for faq in json.load(f)}
+    answers.update([nlp.FALLBACK_ANSWER, nlp.UNAVAILABLE_ANSWER])
+
+    cache = TTSCache(cache_dir=CACHE_DIR, max_memory_bytes=0, max_disk_bytes=0, max_pinned_bytes=_pinned_budget())
+    # Clips are pinned below rather than going through the evictable tier
+    handler = TTSHandler(engine=args.engine)
+
+    jobs = [
+        (text, lang) for text in sorted(answers) for lang in args.langs
+        if not cache.is_pinned(handler.cache_key(text, lang))
+    ]
+    print(f"🔊 {len(jobs)} clips to pin ({len(answers)} answers x {len(args.langs)} languages, rest pinned)")
+
+    def warm_one(job) -> bool:
+        key = handler.cache_key(*job)
+        # A clip already in the evictable tier is promoted without synthesizing it again
+        audio = cache.get(key) or handler.text_to_speech_bytes(*job)
+        if audio is None:
+            return False
+        cache.pin(key, audio)
+        return True
+
+    # pyttsx3 runs at most one job per pool worker process
+    workers = args.workers if args.engine == "gtts" else min(args.workers, handler.pool.size)
+    failed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for done, ok in enumerate(pool.map(warm_one, jobs), 1):
+                if not ok:
+                    failed += 1
+                if done % 100 == 0:
+                    print(f"   {done}/{len(jobs)}")
+    except (PinnedCacheFull, OSError) as e:
+        raise SystemExit(f"❌ Could not pin every FAQ clip: {e}")
+    finally:
+        handler.close()
+
+    print(f"✅ Pinned {len(jobs) - failed} clips in {os.path.join(CACHE_DIR, PINNED_DIR)} "
+          f"({cache.stats()['pinned_bytes'] / 2 ** 20:.1f} MB, {failed} failed)")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
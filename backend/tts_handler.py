@@ -1,73 +1,106 @@
 from gtts import gTTS
 import io
+import logging
 import base64
+import threading
 from typing import Optional
-import pyttsx3
+
+from metrics import stage
+from tts_cache import TTSCache, cache_key
+from tts_pool import Pyttsx3Pool, configure_engine, pyttsx3_pool_from_env
+
+logger = logging.getLogger(__name__)
 
 
 class TTSHandler:
-    def __init__(self, engine="gtts"):
+    def __init__(self, engine="gtts", cache: Optional[TTSCache] = None, pool: Optional[Pyttsx3Pool] = None):
         """
         Initialize TTS Handler
         engine: 'gtts' (online) or 'pyttsx3' (offline)
+        cache: optional TTSCache; clips already synthesized are served from it
+        pool: pyttsx3 worker pool (default: configured from TTS_POOL_* variables)
         """
         self.engine_type = engine
+        self.cache = cache
+        self.pool = None
+        # Engine for local playback in speak(); synthesis for requests goes through the pool
+        self._speaker = None
+        self._engine_lock = threading.Lock()
 
         if engine == "pyttsx3":
-            self.engine = pyttsx3.init()
-            self.engine.setProperty('rate', 150)  # Speed
-            self.engine.setProperty('volume', 0.9)  # Volume
+            # pyttsx3 engines are not thread-safe: each pool worker process owns one
+            self.pool = pool or pyttsx3_pool_from_env()
+
+        logger.info(f"TTS engine: {engine}")
 
-            # Get available voices
-            voices = self.engine.getProperty('voices')
-            # Set to female voice if available
-            for voice in voices:
-                if 'female' in voice.name.lower() or 'zira' in voice.name.lower():
-                    self.engine.setProperty('voice', voice.id)
-                    break
+    def voice_settings(self) -> str:
+        """Everything besides text and language that changes the audio"""
+        if self.engine_type == "gtts":
+            return "slow=False"
+        return self.pool.voice_settings()
 
-        print(f"🔊 TTS Engine: {engine}")
+    def cache_key(self, text: str, lang: str = "en") -> str:
+        return cache_key(text, lang, self.engine_type, self.voice_settings())
 
     def text_to_speech_bytes(self, text: str, lang: str = "en") -> Optional[bytes]:
-        """Convert text to speech and return audio bytes"""
+        """Convert text to speech and return audio bytes, using the cache when configured"""
+        if self.cache is None:
+            return self._synthesize(text, lang)
+
+        key = self.cache_key(text, lang)
+        audio = self.cache.get(key)
+        if audio is None:
+            audio = self._synthesize(text, lang)
+            if audio:
+                self.cache.put(key, audio)
+        return audio
+
+    def _synthesize(self, text: str, lang: str) -> Optional[bytes]:
         try:
             if self.engine_type == "gtts":
                 # Google TTS (online, better quality)
                 tts = gTTS(text=text, lang=lang, slow=False)
 
-                # Save to bytes
+                # Save to a per-request buffer
                 audio_bytes = io.BytesIO()
                 tts.write_to_fp(audio_bytes)
-                audio_bytes.seek(0)
 
-                return audio_bytes.read()
+                return audio_bytes.getvalue()
 
             else:
-                # pyttsx3 (offline)
-                temp_file = "temp_audio.mp3"
-                self.engine.save_to_file(text, temp_file)
-                self.engine.runAndWait()
-
-                with open(temp_file, 'rb') as f:
-                    return f.read()
+                # pyttsx3 (offline) on a free pool worker; it renders into a
+                # per-request scratch file on tmpfs
+                return self.pool.synthesize(text)
 
         except Exception as e:
-            print(f"❌ TTS Error: {e}")
+            logger.exception(f"TTS synthesis failed ({self.engine_type}, {lang}): {e}")
             return None
 
+    def close(self):
+        """Stop the pyttsx3 workers, if any."""
+        if self.pool is not None:
+            self.pool.close()
+
     def text_to_speech_base64(self, text: str, lang: str = "en") -> Optional[str]:
         """Convert text to speech and return base64 encoded audio"""
-        audio_bytes = self.text_to_speech_bytes(text, lang)
+        with stage("tts"):
+            audio_bytes = self.text_to_speech_bytes(text, lang)
 
         if audio_bytes:
-            return base64.b64encode(audio_bytes).decode('utf-8')
+            with stage("base64"):
+                return base64.b64encode(audio_bytes).decode('utf-8')
         return None
 
     def speak(self, text: str):
         """Directly play the audio (blocking)"""
         if self.engine_type == "pyttsx3":
-            self.engine.say(text)
-            self.engine.runAndWait()
+            # Playback needs this process's audio device, so it uses a local engine
+            with self._engine_lock:
+                if self._speaker is None:
+                    import pyttsx3
+                    self._speaker = configure_engine(pyttsx3.init(), self.pool.rate, self.pool.volume)
+                self._speaker.say(text)
+                self._speaker.runAndWait()
         else:
             # For gTTS, you'd need to use a player like pygame or playsound
             try:
@@ -0,0 +1,260 @@
+# backend/tts_pool.py
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Preferred voices, matched against voice names in order
+VOICE_HINTS = ("female", "zira")
+
+
+def configure_engine(engine, rate: int = 150, volume: float = 0.9, voice_hints: Tuple[str, ...] = VOICE_HINTS):
+    """Apply the app's voice settings to a pyttsx3 engine."""
+    engine.setProperty('rate', rate)
+    engine.setProperty('volume', volume)
+    for voice in engine.getProperty('voices'):
+        name = (voice.name or "").lower()
+        if any(hint in name for hint in voice_hints):
+            engine.setProperty('voice', voice.id)
+            break
+    return engine
+
+
+def _worker_main(conn, rate: int, volume: float, voice_hints: Tuple[str, ...]):
+    """Worker process: owns one engine and renders one job at a time into the path it is given."""
+    try:
+        import pyttsx3
+        engine = configure_engine(pyttsx3.init(), rate, volume, voice_hints)
+        conn.send(("ready", engine.getProperty('voice')))
+    except Exception as e:
+        conn.send(("error", f"pyttsx3 init failed: {e!r}"))
+        return
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if job is None:
+            break
+        text, path = job
+        try:
+            engine.save_to_file(text, path)
+            engine.runAndWait()
+            conn.send(("ok", None))
+        except Exception as e:
+            conn.send(("error", repr(e)))
+
+
+class _Worker:
+    __slots__ = ("process", "conn", "jobs")
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.jobs = 0
+
+
+class Pyttsx3Pool:
+    """
+    Offline TTS on a pool of worker processes, one pyttsx3 engine each.
+
+    pyttsx3 engines are not safe to share between threads, so each worker
+    process owns one and renders one job at a time. Idle workers wait in
+    a queue; callers take one, wait up to `timeout` for the clip, and put
+    it back. A worker that crashes or overruns its job is killed and
+    replaced, and the job fails rather than hanging its caller.
+    """
+
+    def __init__(self, size: int = 2, timeout: float = 30.0, queue_timeout: float = 10.0,
+                 rate: int = 150, volume: float = 0.9, voice_hints: Tuple[str, ...] = VOICE_HINTS,
+                 start_timeout: float = 30.0, max_jobs_per_worker: int = 0):
+        """
+        Args:
+            size: Worker processes (parallel synthesis jobs)
+            timeout: Seconds one job may take before its worker is killed
+            queue_timeout: Seconds to wait for a free worker before failing the job
+            rate: Speech rate (words per minute)
+            volume: Volume, 0.0 to 1.0
+            voice_hints: Substrings of the preferred voice name
+            start_timeout: Seconds a new worker may take to initialize its engine
+            max_jobs_per_worker: Replace a worker after this many jobs (0: never),
+                for engines that leak memory
+        """
+        self.size = size
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.rate = rate
+        self.volume = volume
+        self.voice_hints = voice_hints
+        self.start_timeout = start_timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.voice: Optional[str] = None
+
+        # Fresh interpreters: forking a process that runs threads (the server) is unsafe
+        self._context = multiprocessing.get_context("spawn")
+        # Idle workers; None marks a slot whose worker must be (re)started
+        self._idle: "queue.Queue[Optional[_Worker]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.rejected = 0
+
+        # Start every worker now: a broken engine fails at load time, and no request pays for a spawn
+        for _ in range(size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main, args=(child_conn, self.rate, self.volume, self.voice_hints),
+            name="pyttsx3-worker", daemon=True
+        )
+        process.start()
+        child_conn.close()
+
+        if not parent_conn.poll(self.start_timeout):
+            self._kill(process)
+            raise RuntimeError(f"pyttsx3 worker did not start within {self.start_timeout:.0f}s")
+        try:
+            status, detail = parent_conn.recv()
+        except EOFError:
+            status, detail = "error", f"pyttsx3 worker exited during startup (code {process.exitcode})"
+        if status != "ready":
+            self._kill(process)
+            raise RuntimeError(detail)
+        self.voice = detail
+        return _Worker(process, parent_conn)
+
+    @staticmethod
+    def _kill(process):
+        process.terminate()
+        process.join(1.0)
+        if process.is_alive():
+            process.kill()
+            process.join(1.0)
+
+    def _retire(self, worker: Optional[_Worker], reason: str):
+        if worker is None:
+            return
+        logger.warning(f"Replacing pyttsx3 worker {worker.process.pid}: {reason}")
+        worker.conn.close()
+        self._kill(worker.process)
+        with self._lock:
+            self.restarts += 1
+
+    def synthesize(self, text: str, suffix: str = ".wav") -> bytes:
+        """
+        Render text to audio bytes on a free worker.
+
+        Raises:
+            TimeoutError: No worker was free within queue_timeout, or the job ran past timeout
+            RuntimeError: The engine failed, or its worker crashed
+        """
+        from audio_io import scratch_path
+
+        if self._closed:
+            raise RuntimeError("pyttsx3 pool is closed")
+        try:
+            worker = self._idle.get(timeout=self.queue_timeout)
+        except queue.Empty:
+            with self._lock:
+                self.rejected += 1
+            raise TimeoutError(f"no pyttsx3 worker free within {self.queue_timeout:.0f}s")
+
+        path = None
+        try:
+            if worker is None or not worker.process.is_alive():
+                self._retire(worker, "exited")
+                worker = None
+                worker = self._spawn()
+
+            path = scratch_path(suffix)
+            try:
+                worker.conn.send((text, path))
+                if not worker.conn.poll(self.timeout):
+                    with self._lock:
+                        self.timeouts += 1
+                    self._retire(worker, f"job ran past {self.timeout:.0f}s")
+                    worker = None
+                    raise TimeoutError(f"pyttsx3 synthesis took longer than {self.timeout:.0f}s")
+                status, error = worker.conn.recv()
+            except (EOFError, BrokenPipeError, ConnectionResetError) as e:
+                self._retire(worker, f"crashed ({e!r})")
+                worker = None
+                raise RuntimeError("pyttsx3 worker crashed during synthesis") from e
+
+            worker.jobs += 1
+            if status != "ok":
+                raise RuntimeError(error)
+            with open(path, "rb") as f:
+                audio = f.read()
+            with self._lock:
+                self.completed += 1
+            return audio
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            if path is not None and os.path.exists(path):
+                os.unlink(path)
+            if worker is not None and self.max_jobs_per_worker and worker.jobs >= self.max_jobs_per_worker:
+                self._retire(worker, f"recycled after {worker.jobs} jobs")
+                worker = None
+            if worker is not None and self._closed:
+                worker.conn.send(None)
+                worker = None
+            # Hand the slot back; an empty slot is refilled by its next user
+            self._idle.put(worker)
+
+    def voice_settings(self) -> str:
+        return f"rate={self.rate};volume={self.volume};voice={self.voice}"
+
+    def close(self):
+        """Stop every worker; jobs still running are abandoned."""
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is None:
+                continue
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.process.join(2.0)
+            if worker.process.is_alive():
+                self._kill(worker.process)
+
+    def stats(self) -> dict:
+        idle = self._idle.qsize()
+        return {
+            "size": self.size,
+            "busy": self.size - idle,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+            "rejected": self.rejected
+        }
+
+
+def pyttsx3_pool_from_env() -> Pyttsx3Pool:
+    """Pool configured from TTS_POOL_* variables."""
+    return Pyttsx3Pool(
+        size=int(os.getenv("TTS_POOL_SIZE", str(min(4, os.cpu_count() or 1)))),
+        timeout=float(os.getenv("TTS_POOL_TIMEOUT", "30")),
+        queue_timeout=float(os.getenv("TTS_POOL_QUEUE_TIMEOUT", "10")),
+        max_jobs_per_worker=int(os.getenv("TTS_POOL_MAX_JOBS", "0"))
+    )
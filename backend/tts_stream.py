@@ -0,0 +1,157 @@
+# backend/tts_stream.py
+import asyncio
+import re
+import struct
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+from stage_pool import StagePool, percentile
+
+# Sentence ends in Latin, Devanagari (danda) and other scripts we answer in
+_SENTENCE_END = re.compile(r"(?<=[.!?।॥])\s+")
+
+# Fragments shorter than this are merged into the next sentence, so gTTS
+# isn't called for "Yes." on its own
+MIN_SENTENCE_CHARS = 40
+
+CHUNK_BYTES = 16 * 1024
+
+# RIFF and data chunk size of a WAV stream whose length is not known up front
+WAV_UNKNOWN_SIZE = 0xFFFFFFFF
+
+# Recent time-to-first-audio samples, in seconds
+_ttfa = deque(maxlen=1024)
+
+
+class SynthesisFailed(RuntimeError):
+    """A sentence could not be synthesized, so the answer cannot be spoken in full."""
+
+
+def _wav_parts(clip: bytes) -> Tuple[bytes, bytes, bytes]:
+    """Split a WAV clip into (header through the data chunk's size, fmt chunk, PCM data)."""
+    if len(clip) < 12 or clip[:4] != b"RIFF" or clip[8:12] != b"WAVE":
+        raise SynthesisFailed("TTS engine did not return a WAV clip")
+    offset = 12
+    fmt = None
+    while offset + 8 <= len(clip):
+        chunk_id = clip[offset:offset + 4]
+        size, = struct.unpack_from("<I", clip, offset + 4)
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            fmt = clip[body:body + size]
+        elif chunk_id == b"data" and fmt is not None:
+            return clip[:body], fmt, clip[body:body + size]
+        # Chunks are padded to an even length
+        offset = body + size + (size & 1)
+    raise SynthesisFailed("WAV clip has no fmt and data chunks")
+
+
+class WavJoiner:
+    """
+    Joins per-sentence WAV clips into one WAV stream.
+
+    Players stop at the end of the first header's data chunk, so only the
+    first clip keeps its header, with its sizes marked unknown as in a
+    live WAV stream; later clips contribute their PCM data only.
+    """
+
+    def __init__(self):
+        self.fmt: Optional[bytes] = None
+
+    def feed(self, clip: bytes) -> bytes:
+        header, fmt, data = _wav_parts(clip)
+        if self.fmt is None:
+            self.fmt = fmt
+            header = bytearray(header)
+            struct.pack_into("<I", header, 4, WAV_UNKNOWN_SIZE)
+            struct.pack_into("<I", header, len(header) - 4, WAV_UNKNOWN_SIZE)
+            return bytes(header) + data
+        if fmt != self.fmt:
+            raise SynthesisFailed("TTS clips of one answer differ in sample format")
+        return data
+
+
+def split_sentences(text: str, min_chars: int = MIN_SENTENCE_CHARS) -> List[str]:
+    """Split an answer into sentences, merging very short fragments forward."""
+    sentences = []
+    carry = ""
+    for part in _SENTENCE_END.split(text.strip()):
+        carry = f"{carry} {part}".strip() if carry else part.strip()
+        if len(carry) >= min_chars:
+            sentences.append(carry)
+            carry = ""
+    if carry:
+        if sentences:
+            sentences[-1] = f"{sentences[-1]} {carry}"
+        else:
+            sentences.append(carry)
+    return sentences
+
+
+async def stream_speech(text: str, lang: str, synthesize: Callable[[str, str], Optional[bytes]],
+                        stage: StagePool, whole_clip_cached: bool = False, lookahead: int = 2,
+                        started: Optional[float] = None, wav: bool = False) -> AsyncIterator[bytes]:
+    """
+    Yield audio for `text` as it is produced, sentence by sentence.
+
+    Up to `lookahead` sentences are synthesized ahead on the TTS stage
+    while earlier ones are being sent, so the client can start playback
+    after the first sentence instead of the whole answer.
+
+    Args:
+        text: Answer to speak
+        lang: TTS language code
+        synthesize: Blocking (text, lang) -> audio bytes
+        stage: Stage pool the synthesis runs on
+        whole_clip_cached: The full answer is already cached; send it in one go
+        lookahead: Sentences synthesized ahead of the one being sent
+        started: perf_counter() at request start, for time-to-first-audio
+        wav: Clips are WAV files; join them into one stream (see WavJoiner)
+            instead of sending them back to back
+
+    Raises:
+        SynthesisFailed: A sentence produced no audio; the stream stops
+            there rather than silently skipping part of the answer
+    """
+    started = time.perf_counter() if started is None else started
+    sentences = [text] if whole_clip_cached else (split_sentences(text) or [text])
+    remaining = iter(sentences)
+    pending = deque()
+    joiner = WavJoiner() if wav and len(sentences) > 1 else None
+
+    def refill():
+        while len(pending) < lookahead:
+            sentence = next(remaining, None)
+            if sentence is None:
+                return
+            pending.append(asyncio.ensure_future(stage.run(synthesize, sentence, lang)))
+
+    first = True
+    try:
+        refill()
+        for number in range(1, len(sentences) + 1):
+            audio = await pending.popleft()
+            refill()
+            if not audio:
+                raise SynthesisFailed(f"TTS failed for sentence {number} of {len(sentences)}")
+            if joiner is not None:
+                audio = joiner.feed(audio)
+            for offset in range(0, len(audio), CHUNK_BYTES):
+                if first:
+                    _ttfa.append(time.perf_counter() - started)
+                    first = False
+                yield audio[offset:offset + CHUNK_BYTES]
+    finally:
+        # Client went away or a stage failed: drop work nobody will receive
+        for future in pending:
+            future.cancel()
+
+
+def stream_stats() -> dict:
+    samples = list(_ttfa)
+    return {
+        "samples": len(samples),
+        "ttfa_ms_p50": round(percentile(samples, 50) * 1000, 1),
+        "ttfa_ms_p95": round(percentile(samples, 95) * 1000, 1)
+    }
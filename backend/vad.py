@@ -0,0 +1,182 @@
+# backend/vad.py
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+class RingBuffer:
+    """
+    Preallocated circular buffer of audio samples.
+
+    Writes never allocate; reads return the most recent samples as one
+    contiguous array.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float32):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._write = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def write(self, samples: np.ndarray):
+        n = len(samples)
+        if n >= self.capacity:
+            samples = samples[-self.capacity:]
+            n = self.capacity
+        end = self._write + n
+        if end <= self.capacity:
+            self._data[self._write:end] = samples
+        else:
+            first = self.capacity - self._write
+            self._data[self._write:] = samples[:first]
+            self._data[:n - first] = samples[first:]
+        self._write = end % self.capacity
+        self._size = min(self.capacity, self._size + n)
+
+    def read_last(self, n: Optional[int] = None) -> np.ndarray:
+        """Copy of the newest n samples (all buffered samples if n is None)."""
+        n = self._size if n is None else min(n, self._size)
+        start = (self._write - n) % self.capacity
+        if start + n <= self.capacity:
+            return self._data[start:start + n].copy()
+        return np.concatenate((self._data[start:], self._data[:n - (self.capacity - start)]))
+
+    def keep_last(self, n: int):
+        """Forget everything but the newest n samples."""
+        self._size = min(self._size, n)
+
+    def clear(self):
+        self._size = 0
+
+
+class EnergyVAD:
+    """
+    Frame-level voice activity detection from RMS energy.
+
+    The threshold tracks the background noise floor, so steady fan or
+    street noise does not count as speech. Costs one vectorized RMS per
+    chunk, which is negligible next to a Whisper call.
+    """
+
+    def __init__(self, frame_ms: int = 30, sample_rate: int = SAMPLE_RATE,
+                 min_rms: float = 0.01, noise_ratio: float = 3.0, noise_adapt: float = 0.05):
+        """
+        Args:
+            frame_ms: Frame length the decision is made on
+            sample_rate: Input sample rate
+            min_rms: Absolute floor below which nothing is speech (0.01 ~ -40 dBFS)
+            noise_ratio: Speech must be this many times louder than the noise floor
+            noise_adapt: Smoothing factor for the noise floor estimate
+        """
+        self.frame_len = int(sample_rate * frame_ms / 1000)
+        self.min_rms = min_rms
+        self.noise_ratio = noise_ratio
+        self.noise_adapt = noise_adapt
+        self.noise_floor = min_rms / noise_ratio
+
+    def frame_rms(self, samples: np.ndarray) -> np.ndarray:
+        """RMS of each whole frame in samples; a trailing partial frame is ignored."""
+        n_frames = len(samples) // self.frame_len
+        frames = samples[:n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+        return np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+
+    def speech_frames(self, samples: np.ndarray) -> np.ndarray:
+        """Boolean speech decision per whole frame, updating the noise floor on silent frames."""
+        rms = self.frame_rms(samples)
+        flags = np.empty(len(rms), dtype=bool)
+        for i, energy in enumerate(rms):
+            threshold = max(self.min_rms, self.noise_floor * self.noise_ratio)
+            flags[i] = energy >= threshold
+            if not flags[i]:
+                self.noise_floor += self.noise_adapt * (energy - self.noise_floor)
+        return flags
+
+    def has_speech(self, samples: np.ndarray, min_frames: int = 3) -> bool:
+        """True if samples contain at least min_frames speech frames."""
+        return int(self.speech_frames(samples).sum()) >= min_frames
+
+
+class UtteranceSegmenter:
+    """
+    Cuts a continuous audio stream into utterances.
+
+    An utterance opens after min_speech_ms of speech (keeping pre_roll_ms
+    before it, so soft onsets are not clipped) and closes after
+    min_silence_ms of silence or max_utterance_s of audio. Memory is
+    bounded by one preallocated ring buffer.
+    """
+
+    def __init__(self, vad: Optional[EnergyVAD] = None, sample_rate: int = SAMPLE_RATE,
+                 min_speech_ms: int = 200, min_silence_ms: int = 600, pre_roll_ms: int = 300,
+                 max_utterance_s: float = 20.0, partial_interval_ms: int = 0):
+        self.vad = vad or EnergyVAD(sample_rate=sample_rate)
+        self.frame_len = self.vad.frame_len
+        self.min_speech = int(sample_rate * min_speech_ms / 1000)
+        self.min_silence = int(sample_rate * min_silence_ms / 1000)
+        self.pre_roll = int(sample_rate * pre_roll_ms / 1000)
+        self.max_utterance = int(sample_rate * max_utterance_s)
+        self.partial_interval = int(sample_rate * partial_interval_ms / 1000)
+        self.buffer = RingBuffer(self.max_utterance + self.pre_roll)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.in_speech = False
+        self._speech_run = 0
+        self._silence_run = 0
+        self._since_partial = 0
+
+    def feed(self, samples: np.ndarray) -> List[Tuple[str, np.ndarray]]:
+        """
+        Add samples and return any events they complete.
+
+        Returns:
+            List of ("partial", audio_so_far) and ("final", utterance) tuples
+        """
+        samples = np.concatenate((self._pending, np.asarray(samples, dtype=np.float32)))
+        n_whole = len(samples) // self.frame_len * self.frame_len
+        self._pending = samples[n_whole:]
+
+        events = []
+        flags = self.vad.speech_frames(samples[:n_whole])
+        for i, speech in enumerate(flags):
+            frame = samples[i * self.frame_len:(i + 1) * self.frame_len]
+            self.buffer.write(frame)
+
+            if not self.in_speech:
+                self._speech_run = self._speech_run + self.frame_len if speech else 0
+                if self._speech_run >= self.min_speech:
+                    self.in_speech = True
+                    self._silence_run = 0
+                    self._since_partial = 0
+                else:
+                    # Idle: keep only the pre-roll plus the speech run so far
+                    self.buffer.keep_last(self.pre_roll + self._speech_run)
+                continue
+
+            self._silence_run = 0 if speech else self._silence_run + self.frame_len
+            self._since_partial += self.frame_len
+
+            if self._silence_run >= self.min_silence or len(self.buffer) >= self.max_utterance:
+                events.append(("final", self.buffer.read_last()))
+                self.reset()
+            elif self.partial_interval and self._since_partial >= self.partial_interval:
+                events.append(("partial", self.buffer.read_last()))
+                self._since_partial = 0
+
+        return events
+
+    def flush(self) -> Optional[np.ndarray]:
+        """Close the open utterance, if any (e.g. when the client stops sending)."""
+        utterance = self.buffer.read_last() if self.in_speech else None
+        self.reset()
+        return utterance
+
+    def reset(self):
+        self.buffer.clear()
+        self.in_speech = False
+        self._speech_run = 0
+        self._silence_run = 0
+        self._since_partial = 0
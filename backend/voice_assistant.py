@@ -4,10 +4,12 @@ import sounddevice as sd
 from faster_whisper import WhisperModel
 import io
 import wave
-from typing import Optional
+from typing import Optional, Union
 import threading
 import queue
 
+from vad import EnergyVAD, RingBuffer
+
 
 class VoiceAssistant:
     def __init__(self):
@@ -23,8 +25,12 @@ class VoiceAssistant:
 
         # Wake word detection
         self.WAKE_WORDS = ["hello", "hey", "hi"]
+        self.WAKE_WINDOW = 2.0  # seconds of audio each wake-word check sees
+        self.WAKE_HOP = 1.0  # seconds of new speech between checks; windows overlap by the rest
+        self.WAKE_MIN_SPEECH_FRAMES = 5  # ~150 ms of speech before Whisper is worth running
         self.is_listening = False
         self.is_awake = False
+        self.wake_checks = 0  # Whisper calls made by the wake-word loop
 
         # Audio buffer
         self.audio_queue = queue.Queue()
@@ -32,15 +38,12 @@ class VoiceAssistant:
 
         print("✅ Voice Assistant initialized!")
 
-    def detect_wake_word(self, audio_data: np.ndarray) -> bool:
+    def detect_wake_word(self, audio_data: Union[np.ndarray, memoryview]) -> bool:
         """Detect wake word using Whisper"""
         try:
-            # Convert numpy array to audio file in memory
-            audio_bytes = self._numpy_to_wav_bytes(audio_data)
-
             # Transcribe
             segments, info = self.model.transcribe(
-                audio_bytes,
+                self._as_model_input(audio_data),
                 language="en",
                 vad_filter=True,
                 vad_parameters=dict(min_silence_duration_ms=500)
@@ -61,15 +64,12 @@ class VoiceAssistant:
             print(f"❌ Wake word detection error: {e}")
             return False
 
-    def transcribe_audio(self, audio_data: np.ndarray) -> Optional[str]:
+    def transcribe_audio(self, audio_data: Union[np.ndarray, memoryview]) -> Optional[str]:
         """Transcribe audio to text using Faster Whisper"""
         try:
-            # Convert to WAV bytes
-            audio_bytes = self._numpy_to_wav_bytes(audio_data)
-
             # Transcribe
             segments, info = self.model.transcribe(
-                audio_bytes,
+                self._as_model_input(audio_data),
                 language="en",  # or None for auto-detection
                 vad_filter=True
             )
@@ -82,8 +82,24 @@ class VoiceAssistant:
             print(f"❌ Transcription error: {e}")
             return None
 
+    def _as_model_input(self, audio_data: Union[np.ndarray, memoryview]) -> np.ndarray:
+        """
+        Mono float32 samples at SAMPLE_RATE, the layout Whisper consumes.
+
+        Whisper takes a float32 array as-is, so float32 input (or a
+        memoryview over a float32 capture buffer) is passed through without
+        a copy; int16 input is scaled once. Nothing is WAV-encoded.
+        """
+        if isinstance(audio_data, memoryview):
+            audio_data = np.frombuffer(audio_data, dtype=np.float32)
+        if audio_data.dtype == np.int16:
+            audio_data = audio_data.astype(np.float32) / 32768.0
+        elif audio_data.dtype != np.float32:
+            audio_data = audio_data.astype(np.float32)
+        return np.ascontiguousarray(audio_data.reshape(-1))
+
     def _numpy_to_wav_bytes(self, audio_data: np.ndarray) -> io.BytesIO:
-        """Convert numpy array to WAV format in memory"""
+        """Convert numpy array to WAV format in memory (for callers that need a file)"""
         byte_io = io.BytesIO()
 
         # Ensure audio is in correct format
@@ -112,7 +128,8 @@ class VoiceAssistant:
         )
         sd.wait()
 
-        return recording.flatten()
+        # (n, 1) -> (n,) as a view; flatten() would copy the whole recording
+        return recording.reshape(-1)
 
     async def listen_for_wake_word(self):
         """Continuously listen for wake word"""
@@ -123,6 +140,11 @@ class VoiceAssistant:
                 print(f"⚠️ Audio status: {status}")
             self.audio_queue.put(indata.copy())
 
+        window = RingBuffer(int(self.SAMPLE_RATE * self.WAKE_WINDOW))
+        vad = EnergyVAD(sample_rate=self.SAMPLE_RATE)
+        hop = int(self.SAMPLE_RATE * self.WAKE_HOP)
+        unchecked_speech = 0  # samples of speech heard since the last Whisper check
+
         # Start audio stream
         with sd.InputStream(
                 callback=audio_callback,
@@ -131,28 +153,34 @@ class VoiceAssistant:
                 blocksize=self.CHUNK_SIZE
         ):
             self.is_listening = True
-            buffer = []
 
             while self.is_listening:
                 try:
                     # Get audio chunk
-                    audio_chunk = self.audio_queue.get(timeout=1)
-                    buffer.append(audio_chunk)
-
-                    # Keep last 2 seconds
-                    if len(buffer) > int(2 / self.CHUNK_DURATION):
-                        buffer.pop(0)
-
-                    # Check for wake word every 2 seconds
-                    if len(buffer) >= int(2 / self.CHUNK_DURATION):
-                        audio_data = np.concatenate(buffer).flatten()
-
-                        if self.detect_wake_word(audio_data):
+                    audio_chunk = self.audio_queue.get(timeout=1)[:, 0]
+                    window.write(audio_chunk)
+
+                    # Cheap energy gate: silence never reaches Whisper
+                    speech_frames = int(vad.speech_frames(audio_chunk).sum())
+                    if speech_frames:
+                        unchecked_speech += speech_frames * vad.frame_len
+
+                    # Check once speech pauses, or every hop during long speech.
+                    # The window is not cleared afterwards, so a wake word
+                    # straddling two checks is still seen whole by the next one.
+                    speech_ended = speech_frames == 0
+                    if unchecked_speech >= vad.frame_len * self.WAKE_MIN_SPEECH_FRAMES and \
+                            (speech_ended or unchecked_speech >= hop):
+                        unchecked_speech = 0
+                        self.wake_checks += 1
+
+                        if self.detect_wake_word(window.read_last()):
                             print("🎉 Wake word detected!")
                             self.is_awake = True
                             return True
-
-                        buffer = []
+                    elif speech_ended:
+                        # Too short to be a word (a click or a cough)
+                        unchecked_speech = 0
 
                 except queue.Empty:
                     continue
@@ -0,0 +1,191 @@
+# backend/voice_stream.py
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Optional, Tuple
+
+import numpy as np
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from audio_io import StreamDecoder
+from stage_pool import StageSaturated
+from vad import UtteranceSegmenter
+
+logger = logging.getLogger(__name__)
+
+# (text, language, language_probability)
+Transcribe = Callable[[np.ndarray], Awaitable[Tuple[str, str, float]]]
+# (question, detected language, session_id) -> pq()-style result plus "tts_lang"
+Answer = Callable[[str, str, str], Awaitable[dict]]
+# (text, lang) -> (audio chunks, media type)
+Speak = Callable[[str, str], Awaitable[Tuple[AsyncIterator[bytes], str]]]
+
+
+class _SocketClosed(Exception):
+    """The client is gone; nothing more can be sent on this socket."""
+
+
+class VoiceStreamSession:
+    """
+    One real-time voice conversation over a WebSocket.
+
+    Protocol (JSON text messages, audio as binary messages):
+        client -> {"type": "start", "format": "pcm16"|"f32"|"opus", "sample_rate": 16000,
+                   "partials": false, "tts": true}          optional, before audio
+        client -> binary audio frames
+        client -> {"type": "stop"}                           closes the open utterance
+        server -> {"type": "partial", "text"}                while an utterance is open
+        server -> {"type": "final", "text", "language", "language_probability"}
+        server -> {"type": "answer", "answer", "matched_question", "tts_lang"}
+        server -> {"type": "audio_start", "media_type"}, binary chunks, {"type": "audio_end"}
+        server -> {"type": "error", "error", "retry_after"?}
+
+    Incoming audio is segmented as it arrives; each closed utterance is
+    transcribed, answered and spoken in order while the socket keeps
+    receiving. Audio memory per connection is one bounded ring buffer.
+    """
+
+    def __init__(self, websocket: WebSocket, transcribe: Transcribe, answer: Answer, speak: Speak,
+                 session_id: str = "default", max_pending: int = 3, partial_interval_ms: int = 1000):
+        self.websocket = websocket
+        self._transcribe = transcribe
+        self._answer = answer
+        self._speak = speak
+        self.session_id = session_id
+        self.partial_interval_ms = partial_interval_ms
+        self.decoder = StreamDecoder()
+        self.segmenter = UtteranceSegmenter()
+        self.tts_enabled = True
+        self._utterances: "asyncio.Queue[np.ndarray]" = asyncio.Queue(maxsize=max_pending)
+        self._partial_task: Optional[asyncio.Task] = None
+        self._send_lock = asyncio.Lock()
+
+    async def _send(self, send, payload):
+        async with self._send_lock:
+            try:
+                await send(payload)
+            except (WebSocketDisconnect, RuntimeError, OSError) as e:
+                # Starlette raises RuntimeError for sends after close, servers an OSError
+                raise _SocketClosed() from e
+
+    async def _send_json(self, message: dict):
+        await self._send(self.websocket.send_text, json.dumps(message))
+
+    def _configure(self, message: dict):
+        self.decoder = StreamDecoder(message.get("format", "pcm16"), int(message.get("sample_rate", 16000)))
+        partials = message.get("partials", False)
+        self.segmenter = UtteranceSegmenter(partial_interval_ms=self.partial_interval_ms if partials else 0)
+        self.tts_enabled = message.get("tts", True)
+
+    async def run(self):
+        worker = asyncio.create_task(self._process_utterances())
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    await self._on_audio(message["bytes"])
+                elif message.get("text") is not None:
+                    await self._on_control(message["text"])
+        except (WebSocketDisconnect, _SocketClosed):
+            pass
+        finally:
+            worker.cancel()
+            if self._partial_task is not None:
+                self._partial_task.cancel()
+
+    async def _on_control(self, text: str):
+        try:
+            message = json.loads(text)
+        except json.JSONDecodeError:
+            message = None
+        if not isinstance(message, dict):
+            await self._send_json({"type": "error", "error": "Control messages must be JSON objects"})
+            return
+
+        if message.get("type") == "start":
+            try:
+                self._configure(message)
+            except (ValueError, ImportError) as e:
+                await self._send_json({"type": "error", "error": str(e)})
+        elif message.get("type") == "stop":
+            utterance = self.segmenter.flush()
+            if utterance is not None:
+                await self._enqueue(utterance)
+
+    async def _on_audio(self, data: bytes):
+        try:
+            samples = self.decoder.decode(data)
+        except Exception as e:
+            await self._send_json({"type": "error", "error": f"Could not decode audio frame: {e}"})
+            return
+
+        for kind, audio in self.segmenter.feed(samples):
+            if kind == "final":
+                await self._enqueue(audio)
+            elif self._partial_task is None or self._partial_task.done():
+                # Skip partials while one is still being transcribed
+                self._partial_task = asyncio.create_task(self._send_partial(audio))
+
+    async def _enqueue(self, utterance: np.ndarray):
+        try:
+            self._utterances.put_nowait(utterance)
+        except asyncio.QueueFull:
+            await self._send_json({"type": "error", "error": "Too many utterances pending; utterance dropped"})
+
+    async def _send_partial(self, audio: np.ndarray):
+        try:
+            text, _, _ = await self._transcribe(audio)
+            if text:
+                await self._send_json({"type": "partial", "text": text})
+        except (StageSaturated, _SocketClosed):
+            pass
+        except Exception as e:
+            logger.warning(f"Partial transcription failed: {e}")
+
+    async def _process_utterances(self):
+        while True:
+            utterance = await self._utterances.get()
+            try:
+                await self._handle_utterance(utterance)
+                continue
+            except _SocketClosed:
+                return
+            except StageSaturated as e:
+                error = {"type": "error", "error": f"Server busy ({e.stage})", "retry_after": e.retry_after}
+            except Exception as e:
+                # A failed transcription, answer or synthesis only costs this utterance
+                logger.exception(f"Voice stream utterance failed: {e}")
+                error = {"type": "error", "error": str(e)}
+            try:
+                await self._send_json(error)
+            except _SocketClosed:
+                return
+
+    async def _handle_utterance(self, utterance: np.ndarray):
+        text, language, probability = await self._transcribe(utterance)
+        if not text:
+            return
+        await self._send_json({
+            "type": "final",
+            "text": text,
+            "language": language,
+            "language_probability": probability
+        })
+
+        result = await self._answer(text, language, self.session_id)
+        await self._send_json({
+            "type": "answer",
+            "answer": result["answer"],
+            "matched_question": result.get("matched_question"),
+            "tts_lang": result["tts_lang"]
+        })
+
+        if not self.tts_enabled:
+            return
+        chunks, media_type = await self._speak(result["answer"], result["tts_lang"])
+        await self._send_json({"type": "audio_start", "media_type": media_type})
+        async for chunk in chunks:
+            await self._send(self.websocket.send_bytes, chunk)
+        await self._send_json({"type": "audio_end"})